@@ -0,0 +1,98 @@
+from datetime import date, datetime
+
+import pytest
+
+pytest.importorskip("pandas")
+
+from trading_system.akshare_system import akshare_router
+from trading_system.akshare_system.akshare_cache import MARKET_TZ
+from trading_system.akshare_system.akshare_router import AkShareRouter
+
+
+# a Sunday
+NOW = datetime(2026, 10, 18, 10, 0, tzinfo=MARKET_TZ)
+
+
+class WeekdayCalendar:
+    """ Trading days are the weekdays except 2026-10-01 """
+
+    @staticmethod
+    def is_trade_date(day: date) -> bool:
+        return day.weekday() < 5 and day != date(2026, 10, 1)
+
+
+@pytest.fixture
+def router(monkeypatch):
+    monkeypatch.setattr(akshare_router, "get_akshare_cache", lambda: WeekdayCalendar())
+    return AkShareRouter()
+
+
+@pytest.mark.parametrize("text, dates, relative", [
+    ("郑商所2023年7月3日的仓单日报", ["20230703"], False),
+    ("大商所从20230703到20230707的仓单", ["20230703", "20230707"], False),
+    ("2023-07-03至2023/07/07的日行情", ["20230703", "20230707"], False),
+    ("获取今天的日交易数据", ["20261018"], True),
+    ("上周五的持仓排名", ["20261009"], True),
+    ("本周五的持仓排名", ["20261016"], True),
+    ("最近5天的日行情", ["20261013", "20261018"], True),
+    ("获取实时行情", [], False),
+])
+def test_extract_dates(text, dates, relative):
+    found, is_relative, unparsed = AkShareRouter.extract_dates(text, NOW)
+    assert found == dates
+    assert is_relative is relative
+    assert unparsed == []
+
+
+@pytest.mark.parametrize("text", [
+    "获取大商所7月10日的持仓排名",
+    "获取上期所2023年7月的日行情",
+    "获取上期所2023年12月的日行情",
+    "下载郑商所上周的日行情",
+    "获取2023年的交易日历",
+    "去年的仓单",
+])
+def test_extract_dates_unparsed(text):
+    found, _, unparsed = AkShareRouter.extract_dates(text, NOW)
+    assert found == []
+    assert unparsed
+
+
+def test_extract_arguments_single_day(router):
+    args = router.extract_arguments("futures_czce_warehouse_receipt", "郑商所2023年7月3日的仓单日报", NOW)
+    assert args == {"trade_date": "20230703"}
+
+
+def test_extract_arguments_range(router):
+    args = router.extract_arguments("futures_dce_warehouse_receipt", "大商所从20230703到20230707的仓单", NOW)
+    assert args == {"start_date": "20230703", "end_date": "20230707"}
+
+
+def test_extract_arguments_relative_day_snapped(router):
+    args = router.extract_arguments("futures_dce_position_rank", "获取大商所今天的持仓排名", NOW)
+    assert args == {"date": "20261016"}
+
+
+def test_extract_arguments_relative_range_snapped(router):
+    # 2026-10-10 is a Saturday and 2026-10-18 a Sunday
+    args = router.extract_arguments("get_futures_daily", "获取中金所最近8天的日行情", NOW)
+    assert args == {"start_date": "20261012", "end_date": "20261016", "market": "CFFEX"}
+
+
+def test_extract_arguments_no_time_expression(router):
+    args = router.extract_arguments("futures_rule", "获取交易日历", NOW)
+    assert args == {"trade_date": "20261016"}
+
+
+@pytest.mark.parametrize("name, text", [
+    ("futures_dce_position_rank", "获取大商所7月10日的持仓排名"),
+    ("get_futures_daily", "获取上期所2023年7月的日行情"),
+    ("get_futures_daily", "下载郑商所上周的日行情"),
+    ("futures_rule", "获取2023年的交易日历"),
+])
+def test_unparsed_period_is_not_confident(router, name, text):
+    args = router.extract_arguments(name, text, NOW)
+    assert not set(args) & {"date", "trade_date", "start_date", "end_date"}
+    route = router.route(text, NOW)
+    assert route.name == name
+    assert not route.confident
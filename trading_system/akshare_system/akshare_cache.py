@@ -0,0 +1,343 @@
+"""
+Persistent result cache of the AkShare function calls.
+
+Results are stored as Parquet files indexed by a small SQLite table, keyed on the function name and
+the normalized arguments. How long an entry stays valid depends on the function:
+- realtime quotes expire after `realtime_ttl`
+- dated queries whose dates are all settled (before today, or today after the close) never expire,
+  otherwise they expire after `intraday_ttl` on a trading day, or at the next trading day otherwise
+- reference tables (rules, fees, contract details) expire after `reference_ttl`
+
+    python -m trading_system.akshare_system.akshare_cache --stats
+    python -m trading_system.akshare_system.akshare_cache --purge --func futures_zh_spot
+"""
+import io
+import json
+import time
+import pickle
+import sqlite3
+import hashlib
+import argparse
+import threading
+from pathlib import Path
+from datetime import date, datetime, time as dtime, timedelta
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional
+from zoneinfo import ZoneInfo
+
+import pandas as pd
+
+
+MARKET_TZ = ZoneInfo("Asia/Shanghai")
+# daily data of a trading day is final after the day session closes
+SETTLE_TIME = dtime(16, 0)
+
+REALTIME_FUNCTIONS = {"futures_zh_spot", "futures_zh_realtime", "futures_zh_minute_sina"}
+REFERENCE_FUNCTIONS = {"futures_comm_info", "futures_contract_detail", "tool_trade_date_hist_sina"}
+DATE_ARGS = {"date", "trade_date", "start_date", "end_date", "start_day", "end_day"}
+# dated functions using the current day when the end date is omitted
+DEFAULT_TODAY_ARGS = {"get_futures_daily": "end_date", "futures_spot_price_daily": "end_day"}
+
+
+def normalize_date(value: Any) -> Any:
+    """ "2020-03-06", "2020/03/06", date(2020, 3, 6) -> "20200306", anything else is kept """
+    if isinstance(value, (date, datetime)):
+        return value.strftime("%Y%m%d")
+    if isinstance(value, str):
+        digits = value.strip().replace("-", "").replace("/", "")
+        if len(digits) == 8 and digits.isdigit():
+            return digits
+        return value.strip()
+    return value
+
+
+def normalize_args(args: Dict[str, Any]) -> Dict[str, Any]:
+    """ Arguments with the same meaning get the same cache key """
+    result = {}
+    for name, value in args.items():
+        if value is None:
+            continue
+        if name in DATE_ARGS:
+            value = normalize_date(value)
+        elif isinstance(value, str):
+            value = value.strip()
+        elif isinstance(value, (list, tuple)):
+            value = [v.strip() if isinstance(v, str) else v for v in value]
+        result[name] = value
+    return result
+
+
+def market_now() -> datetime:
+    return datetime.now(MARKET_TZ)
+
+
+class AkShareCache:
+    """ Memoize AkShare calls on disk, concurrent identical calls share one fetch """
+
+    def __init__(
+            self,
+            cache_dir: str = ".akshare_cache",
+            realtime_ttl: float = 60,
+            intraday_ttl: float = 10 * 60,
+            reference_ttl: float = 24 * 3600,
+            default_ttl: float = 3600,
+    ):
+        """
+        @param cache_dir: directory of the Parquet files and the index database
+        @param realtime_ttl: seconds realtime quotes stay valid
+        @param intraday_ttl: seconds a dated query covering an unsettled trading day stays valid
+        @param reference_ttl: seconds rules, fees and contract details stay valid
+        @param default_ttl: seconds the results of other functions stay valid
+        """
+        self.cache_dir = Path(cache_dir).absolute()
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.realtime_ttl = realtime_ttl
+        self.intraday_ttl = intraday_ttl
+        self.reference_ttl = reference_ttl
+        self.default_ttl = default_ttl
+
+        self._lock = threading.Lock()
+        self._in_flight: Dict[str, Future] = {}
+        self._trade_dates: Optional[List[date]] = None
+        self._trade_date_set = set()
+        self._stats = {"hits": 0, "misses": 0, "expired": 0, "shared": 0, "stores": 0, "errors": 0}
+
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS akshare_cache ("
+                "key TEXT PRIMARY KEY, func TEXT, args TEXT, file TEXT, created REAL, expires REAL, "
+                "rows INTEGER, bytes INTEGER, hits INTEGER DEFAULT 0)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS akshare_cache_func ON akshare_cache (func)")
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(str(self.cache_dir / "index.db"), timeout=30)
+
+    # -----------------------------------------------------------------------------------------------------------------
+    # expiry
+
+    def trade_dates(self) -> List[date]:
+        """ Trading calendar of the Chinese exchanges, weekdays when it can not be downloaded """
+        if self._trade_dates is None:
+            try:
+                import akshare as ak
+                df = self.call("tool_trade_date_hist_sina", ak.tool_trade_date_hist_sina, {})
+                self._trade_dates = sorted(pd.to_datetime(df["trade_date"]).dt.date)
+            except Exception:
+                self._trade_dates = []
+            self._trade_date_set = set(self._trade_dates)
+        return self._trade_dates
+
+    def is_trade_date(self, day: date) -> bool:
+        trade_dates = self.trade_dates()
+        if trade_dates and trade_dates[0] <= day <= trade_dates[-1]:
+            return day in self._trade_date_set
+        return day.weekday() < 5
+
+    def next_trade_date(self, day: date) -> date:
+        day += timedelta(days=1)
+        while not self.is_trade_date(day):
+            day += timedelta(days=1)
+        return day
+
+    def expires_at(self, func_name: str, args: Dict[str, Any], now: Optional[datetime] = None) -> Optional[float]:
+        """ Expiry timestamp of a result fetched `now`, None never expires """
+        now = now or market_now()
+        if func_name in REALTIME_FUNCTIONS:
+            return now.timestamp() + self.realtime_ttl
+        if func_name in REFERENCE_FUNCTIONS:
+            return now.timestamp() + self.reference_ttl
+
+        dates = [args[name] for name in DATE_ARGS if isinstance(args.get(name), str) and args[name].isdigit()]
+        if func_name in DEFAULT_TODAY_ARGS and DEFAULT_TODAY_ARGS[func_name] not in args:
+            dates.append(now.strftime("%Y%m%d"))
+        if not dates:
+            return now.timestamp() + self.default_ttl
+
+        last = datetime.strptime(max(dates), "%Y%m%d").date()
+        today = now.date()
+        if last < today or (last == today and now.time() >= SETTLE_TIME):
+            # settled, the exchanges never revise it
+            return None
+        if self.is_trade_date(today):
+            return now.timestamp() + self.intraday_ttl
+        # nothing is published until the next trading day
+        return datetime.combine(self.next_trade_date(today), dtime(0, 0), MARKET_TZ).timestamp()
+
+    # -----------------------------------------------------------------------------------------------------------------
+    # storage
+
+    @staticmethod
+    def make_key(func_name: str, args: Dict[str, Any]) -> str:
+        payload = json.dumps(args, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(f"{func_name}\x00{payload}".encode()).hexdigest()
+
+    def _write(self, func_name: str, key: str, result: Any) -> Path:
+        """ DataFrames as Parquet, results Parquet can not hold (mixed object columns, dicts) are pickled """
+        folder = self.cache_dir / func_name
+        folder.mkdir(exist_ok=True)
+        if isinstance(result, pd.DataFrame):
+            buffer = io.BytesIO()
+            try:
+                result.to_parquet(buffer)
+                path = folder / f"{key}.parquet"
+            except (ValueError, TypeError, NotImplementedError, ImportError):
+                # pyarrow errors derive from these
+                buffer = io.BytesIO(pickle.dumps(result))
+                path = folder / f"{key}.pkl"
+        else:
+            buffer = io.BytesIO(pickle.dumps(result))
+            path = folder / f"{key}.pkl"
+
+        tmp = path.with_suffix(path.suffix + ".tmp")
+        tmp.write_bytes(buffer.getvalue())
+        tmp.replace(path)
+        return path
+
+    @staticmethod
+    def _read(path: Path) -> Any:
+        if path.suffix == ".parquet":
+            return pd.read_parquet(path)
+        return pickle.loads(path.read_bytes())
+
+    def get(self, func_name: str, args: Dict[str, Any]) -> Any:
+        """ Cached result, or None when missing or expired """
+        key = self.make_key(func_name, normalize_args(args))
+        with self._connect() as conn:
+            row = conn.execute("SELECT file, expires FROM akshare_cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self._stats["misses"] += 1
+                return None
+            file, expires = row
+            if expires is not None and expires < time.time():
+                self._stats["expired"] += 1
+                return None
+            try:
+                result = self._read(self.cache_dir / file)
+            except (OSError, ValueError, pickle.UnpicklingError):
+                # file removed by hand or truncated, fetch again
+                conn.execute("DELETE FROM akshare_cache WHERE key = ?", (key,))
+                self._stats["misses"] += 1
+                return None
+            conn.execute("UPDATE akshare_cache SET hits = hits + 1 WHERE key = ?", (key,))
+        self._stats["hits"] += 1
+        return result
+
+    def put(self, func_name: str, args: Dict[str, Any], result: Any) -> None:
+        args = normalize_args(args)
+        key = self.make_key(func_name, args)
+        path = self._write(func_name, key, result)
+        expires = self.expires_at(func_name, args)
+        rows = len(result) if hasattr(result, "__len__") else 0
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO akshare_cache (key, func, args, file, created, expires, rows, bytes) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, func_name, json.dumps(args, ensure_ascii=False, default=str),
+                 str(path.relative_to(self.cache_dir)), time.time(), expires, rows, path.stat().st_size)
+            )
+        self._stats["stores"] += 1
+
+    def call(self, func_name: str, func: Callable, args: Dict[str, Any], use_cache: bool = True) -> Any:
+        """
+        Cached `func(**args)`
+        @param use_cache: False fetches again and refreshes the stored result
+        """
+        if use_cache:
+            result = self.get(func_name, args)
+            if result is not None:
+                return result
+
+        key = self.make_key(func_name, normalize_args(args))
+        with self._lock:
+            future = self._in_flight.get(key)
+            owner = future is None
+            if owner:
+                future = self._in_flight[key] = Future()
+            else:
+                self._stats["shared"] += 1
+        if not owner:
+            return future.result()
+
+        try:
+            result = func(**args)
+            if result is not None:
+                self.put(func_name, args, result)
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            self._stats["errors"] += 1
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._in_flight.pop(key, None)
+
+    # -----------------------------------------------------------------------------------------------------------------
+    # maintenance
+
+    def stats(self) -> Dict[str, Any]:
+        """ Counters of this process, and the stored entries per function """
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT func, COUNT(*), SUM(bytes), SUM(hits), SUM(expires IS NULL) FROM akshare_cache GROUP BY func"
+            ).fetchall()
+        lookups = self._stats["hits"] + self._stats["misses"] + self._stats["expired"]
+        hit_rate = self._stats["hits"] / lookups if lookups else 0.0
+        return {
+            **self._stats,
+            "hit_rate": round(hit_rate, 4),
+            "entries": sum(r[1] for r in rows),
+            "bytes": sum(r[2] or 0 for r in rows),
+            "functions": {r[0]: {"entries": r[1], "bytes": r[2] or 0, "hits": r[3] or 0, "permanent": r[4] or 0}
+                          for r in rows},
+        }
+
+    def purge(self, func_name: str = "", expired_only: bool = False) -> int:
+        """
+        Remove stored results and return their number
+        @param func_name: only the results of this function, default: all functions
+        @param expired_only: keep the entries that are still valid
+        """
+        conditions, params = [], []
+        if func_name:
+            conditions.append("func = ?")
+            params.append(func_name)
+        if expired_only:
+            conditions.append("expires IS NOT NULL AND expires < ?")
+            params.append(time.time())
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+
+        with self._lock, self._connect() as conn:
+            files = [r[0] for r in conn.execute(f"SELECT file FROM akshare_cache{where}", params)]
+            conn.execute(f"DELETE FROM akshare_cache{where}", params)
+        for file in files:
+            (self.cache_dir / file).unlink(missing_ok=True)
+        return len(files)
+
+
+_akshare_cache: Optional[AkShareCache] = None
+
+
+def get_akshare_cache() -> AkShareCache:
+    """ Cache shared by the AkShare tools, created in the working directory by the first call """
+    global _akshare_cache
+    if _akshare_cache is None:
+        _akshare_cache = AkShareCache()
+    return _akshare_cache
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Inspect or purge the AkShare result cache")
+    parser.add_argument("--cache-dir", default=".akshare_cache")
+    parser.add_argument("--stats", action="store_true", help="show the stored entries per function")
+    parser.add_argument("--purge", action="store_true", help="remove stored results")
+    parser.add_argument("--func", default="", help="only purge the results of this function")
+    parser.add_argument("--expired", action="store_true", help="only purge expired results")
+    args = parser.parse_args()
+
+    cache = AkShareCache(args.cache_dir)
+    if args.purge:
+        print(f"{cache.purge(args.func, args.expired)} entries removed.")
+    if args.stats or not args.purge:
+        print(json.dumps(cache.stats(), indent=4, ensure_ascii=False))
@@ -1,7 +1,14 @@
-from typing import Dict
+import time
+import asyncio
+from typing import Dict, List
+from concurrent.futures import ThreadPoolExecutor
 import akshare as ak
 import json
 
+from trading_system.akshare_system.akshare_cache import get_akshare_cache
+from trading_system.akshare_system.akshare_fanout import FANOUT_SPECS, get_fanout_executor
+from trading_system.utilities import run_blocking
+
 
 # 先假设我们有一个字典包含所有可能的函数
 AKSHARE_FUNCTIONS_DICT = {
@@ -23,11 +30,64 @@ AKSHARE_FUNCTIONS_DICT = {
 }
 
 
-def function_call(input_dict: Dict[str, str]):
+def function_call(input_dict: Dict[str, str], use_cache: bool = True):
+    """
+    @param input_dict: function call of the LLM, eg: {"name": "futures_rule", "arguments": '{"trade_date": "20230710"}'}
+    @param use_cache: False fetches the data again and refreshes the cached result
+    """
     # 解析函数名和参数
     func_name = input_dict['name']
     args = json.loads(input_dict['arguments'])
 
-    # 从字典中获取函数并调用它
+    # 从字典中获取函数并调用它, 结果缓存在磁盘上, 见 akshare_cache.py
     func = AKSHARE_FUNCTIONS_DICT[func_name]
-    return func(**args)
+    if func_name in FANOUT_SPECS:
+        # 按交易所和日期分段并发获取, 见 akshare_fanout.py
+        return get_fanout_executor().run(func_name, func, args, use_cache=use_cache)
+    return get_akshare_cache().call(func_name, func, args, use_cache=use_cache)
+
+
+def _split_calls(input_dict: Dict[str, str]) -> Dict[str, Dict[str, str]]:
+    """ The calls of a `multi_function_call` as single function calls, repeated names get a suffix: name#2 """
+    calls = json.loads(input_dict['arguments'])['calls']
+    result = {}
+    for call in calls:
+        arguments = call.get('arguments') or {}
+        key, n = call['name'], 1
+        while key in result:
+            n += 1
+            key = f"{call['name']}#{n}"
+        result[key] = {
+            'name': call['name'],
+            'arguments': arguments if isinstance(arguments, str) else json.dumps(arguments, ensure_ascii=False),
+        }
+    return result
+
+
+def _timed_call(call: Dict[str, str], use_cache: bool) -> Dict:
+    t0 = time.perf_counter()
+    try:
+        result, error = function_call(call, use_cache), ""
+    except Exception as e:
+        result, error = None, f"{type(e).__name__}: {e}"
+    return {'name': call['name'], 'result': result, 'seconds': round(time.perf_counter() - t0, 3), 'error': error}
+
+
+def function_calls(input_dict: Dict[str, str], use_cache: bool = True, max_workers: int = 8) -> Dict[str, Dict]:
+    """
+    Execute the calls of a `multi_function_call` concurrently
+    @return: eg: {"futures_spot_price": {"name": ..., "result": df, "seconds": 1.2, "error": ""}, "futures_spot_price#2": ...}
+    """
+    calls = _split_calls(input_dict)
+    if not calls:
+        return {}
+    with ThreadPoolExecutor(max_workers=min(len(calls), max_workers)) as pool:
+        futures = {key: pool.submit(_timed_call, call, use_cache) for key, call in calls.items()}
+    return {key: future.result() for key, future in futures.items()}
+
+
+async def afunction_calls(input_dict: Dict[str, str], use_cache: bool = True) -> Dict[str, Dict]:
+    """ Async `function_calls`, the calls run in the shared executor """
+    calls = _split_calls(input_dict)
+    results: List[Dict] = await asyncio.gather(*[run_blocking(_timed_call, call, use_cache) for call in calls.values()])
+    return dict(zip(calls, results))
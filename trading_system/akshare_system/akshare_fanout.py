@@ -0,0 +1,205 @@
+"""
+Fan-out of long AkShare futures queries.
+
+A request is split by market and by date chunk, the chunks run on a bounded thread pool with a
+rate limit per exchange website and retries with exponential backoff, and the results are
+concatenated in request order. Chunks are aligned to calendar months and go through the result
+cache, so a settled month is fetched only once whatever range it was requested in.
+
+    executor = get_fanout_executor()
+    df = executor.run("get_futures_daily", ak.get_futures_daily, {"start_date": "20220101", "end_date": "20221231"})
+"""
+import time
+import random
+import threading
+from collections import defaultdict
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from trading_system.utilities import print_red
+from trading_system.akshare_system.akshare_cache import get_akshare_cache, market_now, normalize_date
+
+
+MARKETS = ["CFFEX", "CZCE", "SHFE", "DCE", "INE", "GFEX"]
+MARKET_HOSTS = {
+    "CFFEX": "www.cffex.com.cn",
+    "CZCE": "www.czce.com.cn",
+    "SHFE": "www.shfe.com.cn",
+    "DCE": "www.dce.com.cn",
+    "INE": "www.ine.cn",
+    "GFEX": "www.gfex.com.cn",
+}
+
+# range: the function loops over the days of [start, end] itself, the range is cut into chunks
+# day: the function takes a single trading day, the request is split into days
+# aliases: argument names of the function schemas mapped to the ones of akshare
+FANOUT_SPECS = {
+    "get_futures_daily": {"range": ("start_date", "end_date"), "market": "market"},
+    "futures_spot_price_daily": {
+        "range": ("start_day", "end_day"), "host": "www.100ppi.com",
+        "aliases": {"start_date": "start_day", "end_date": "end_day"},
+    },
+    "futures_czce_warehouse_receipt": {"day": "trade_date", "host": MARKET_HOSTS["CZCE"]},
+    "futures_shfe_warehouse_receipt": {"day": "trade_date", "host": MARKET_HOSTS["SHFE"]},
+    "futures_dce_warehouse_receipt": {"day": "trade_date", "host": MARKET_HOSTS["DCE"]},
+}
+
+
+class HostRateLimiter:
+    """ At most one request every `min_interval` seconds to each host """
+
+    def __init__(self, min_interval: float = 0.5):
+        self.min_interval = min_interval
+        self._next_slot = defaultdict(float)
+        self._lock = threading.Lock()
+
+    def wait(self, host: str) -> None:
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot[host])
+            self._next_slot[host] = slot + self.min_interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+def _to_frame(result: Any) -> Optional[pd.DataFrame]:
+    """ Warehouse receipts come as {variety: DataFrame}, they are stacked with a `var` column """
+    if isinstance(result, dict):
+        frames = [df.assign(var=var) for var, df in result.items() if isinstance(df, pd.DataFrame)]
+        return pd.concat(frames, ignore_index=True) if frames else None
+    return result
+
+
+class FanOutExecutor:
+    """ Split, fetch concurrently and concatenate the AkShare queries of `FANOUT_SPECS` """
+
+    def __init__(
+            self,
+            max_workers: int = 8,
+            chunk_months: int = 1,
+            min_interval: float = 0.5,
+            max_retries: int = 3,
+            backoff: float = 1.0,
+    ):
+        """
+        @param max_workers: chunks fetched at the same time
+        @param chunk_months: calendar months per chunk of a range function, counted from January
+        @param min_interval: seconds between two requests to the same website
+        @param max_retries: retries of a failing chunk
+        @param backoff: seconds before the first retry, doubled on every further retry
+        """
+        self.max_workers = max_workers
+        self.chunk_months = chunk_months
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.limiter = HostRateLimiter(min_interval)
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="akshare_fanout")
+
+    def _trade_days(self, start: str, end: str) -> List[str]:
+        """ Trading days of [start, end] as YYYYMMDD """
+        cache = get_akshare_cache()
+        day = datetime.strptime(start, "%Y%m%d").date()
+        last = datetime.strptime(end, "%Y%m%d").date()
+        days = []
+        while day <= last:
+            if cache.is_trade_date(day):
+                days.append(day.strftime("%Y%m%d"))
+            day += timedelta(days=1)
+        return days
+
+    def split(self, func_name: str, args: Dict[str, Any]) -> List[Tuple[str, Dict[str, Any]]]:
+        """ (host, arguments) of every chunk, in the order of the concatenated result """
+        spec = FANOUT_SPECS[func_name]
+        args = {spec.get("aliases", {}).get(k, k): v for k, v in args.items() if v is not None}
+        today = market_now().strftime("%Y%m%d")
+
+        if "market" in spec:
+            market = str(args.pop(spec["market"], "") or "").upper()
+            markets = MARKETS if market in ("", "ALL") else [m.strip() for m in market.split(",") if m.strip()]
+        else:
+            markets = [None]
+
+        if "range" in spec:
+            start_arg, end_arg = spec["range"]
+            start = normalize_date(args.pop(start_arg, None) or today)
+            end = normalize_date(args.pop(end_arg, None) or today)
+            # the trading days of each window, only the first and last windows are clipped to the request
+            windows: Dict[Tuple[str, int], List[str]] = {}
+            for day in self._trade_days(start, end):
+                windows.setdefault((day[:4], (int(day[4:6]) - 1) // self.chunk_months), []).append(day)
+            chunks = [{start_arg: days[0], end_arg: days[-1]} for days in windows.values()]
+        else:
+            day_arg = spec["day"]
+            if day_arg in args:
+                chunks = [{day_arg: normalize_date(args.pop(day_arg))}]
+            else:
+                start = normalize_date(args.pop("start_date", None) or today)
+                end = normalize_date(args.pop("end_date", None) or today)
+                chunks = [{day_arg: day} for day in self._trade_days(start, end)]
+
+        result = []
+        for market in markets:
+            host = MARKET_HOSTS.get(market) if market else spec.get("host", func_name)
+            for chunk in chunks:
+                chunk_args = {**args, **chunk}
+                if market:
+                    chunk_args[spec["market"]] = market
+                result.append((host, chunk_args))
+        return result
+
+    def _fetch(self, func_name: str, func: Callable, host: str, args: Dict[str, Any], use_cache: bool) -> Any:
+        cache = get_akshare_cache()
+        if use_cache:
+            result = cache.get(func_name, args)
+            if result is not None:
+                return result
+
+        for attempt in range(self.max_retries + 1):
+            self.limiter.wait(host)
+            try:
+                return cache.call(func_name, func, args, use_cache=False)
+            except Exception as e:
+                if attempt == self.max_retries:
+                    raise
+                delay = self.backoff * 2 ** attempt * (1 + random.random() / 2)
+                print_red(f"{func_name}{args} failed ({e}), retry in {delay:.1f}s")
+                time.sleep(delay)
+
+    def run(self, func_name: str, func: Callable, args: Dict[str, Any], use_cache: bool = True) -> pd.DataFrame:
+        """
+        @param func_name: a function of `FANOUT_SPECS`
+        @param args: arguments of the whole request, eg: {"start_date": "20220101", "end_date": "20221231"}
+            without `market` all six exchanges are queried, a `day` function also accepts start_date / end_date
+        """
+        chunks = self.split(func_name, args)
+        futures = [self._pool.submit(self._fetch, func_name, func, host, chunk_args, use_cache)
+                   for host, chunk_args in chunks]
+
+        frames, errors = [], []
+        for (host, chunk_args), future in zip(chunks, futures):
+            try:
+                frame = _to_frame(future.result())
+            except Exception as e:
+                errors.append((chunk_args, e))
+                continue
+            if frame is not None and not frame.empty:
+                frames.append(frame)
+
+        if errors:
+            failed = ", ".join(str(chunk_args) for chunk_args, _ in errors)
+            raise RuntimeError(f"{len(errors)} of {len(chunks)} chunks of {func_name} failed: {failed}") from errors[0][1]
+        return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+
+_fanout_executor: Optional[FanOutExecutor] = None
+
+
+def get_fanout_executor() -> FanOutExecutor:
+    """ Executor shared by the AkShare tools """
+    global _fanout_executor
+    if _fanout_executor is None:
+        _fanout_executor = FanOutExecutor()
+    return _fanout_executor
@@ -17,8 +17,8 @@ AKSHARE_FUTURES = [
                 },
                 "market": {
                     "type": "string",
-                    "enum": ["CFFEX", "CZCE", "SHFE", "DCE", "INE", "GFEX"],
-                    "description": "选择交易所, 'CFFEX': 中金所,'CZCE': 郑商所, 'SHFE': 上期所, 'DCE': 大商所, 'INE': 上海国际能源交易中心, 'GFEX': 广州期货交易所. ",
+                    "enum": ["CFFEX", "CZCE", "SHFE", "DCE", "INE", "GFEX", "ALL"],
+                    "description": "选择交易所, 'CFFEX': 中金所,'CZCE': 郑商所, 'SHFE': 上期所, 'DCE': 大商所, 'INE': 上海国际能源交易中心, 'GFEX': 广州期货交易所, 'ALL': 所有交易所. ",
                 },
             },
             "required": ["market"],
@@ -102,8 +102,16 @@ AKSHARE_FUTURES = [
                     "type": "string",
                     "description": "交易日, e.g `20200306`."
                 },
+                "start_date": {
+                    "type": "string",
+                    "description": "查询多个交易日时的开始日期, 代替 trade_date, e.g `20200306`."
+                },
+                "end_date": {
+                    "type": "string",
+                    "description": "查询多个交易日时的结束日期, 代替 trade_date, e.g `20200306`.",
+                },
             },
-            "required": ["trade_date"],
+            "required": [],
         }
     },
     {
@@ -116,8 +124,16 @@ AKSHARE_FUTURES = [
                     "type": "string",
                     "description": "交易日, e.g `20200306`."
                 },
+                "start_date": {
+                    "type": "string",
+                    "description": "查询多个交易日时的开始日期, 代替 trade_date, e.g `20200306`."
+                },
+                "end_date": {
+                    "type": "string",
+                    "description": "查询多个交易日时的结束日期, 代替 trade_date, e.g `20200306`.",
+                },
             },
-            "required": ["trade_date"],
+            "required": [],
         }
     },
     {
@@ -130,8 +146,16 @@ AKSHARE_FUTURES = [
                     "type": "string",
                     "description": "交易日, e.g `20200306`."
                 },
+                "start_date": {
+                    "type": "string",
+                    "description": "查询多个交易日时的开始日期, 代替 trade_date, e.g `20200306`."
+                },
+                "end_date": {
+                    "type": "string",
+                    "description": "查询多个交易日时的结束日期, 代替 trade_date, e.g `20200306`.",
+                },
             },
-            "required": ["trade_date"],
+            "required": [],
         }
     },
     {
@@ -247,3 +271,37 @@ AKSHARE_FUTURES = [
         }
     },
 ]
+
+
+MULTI_FUNCTION_CALL = "multi_function_call"
+
+# 一次回复中给出多个函数调用, 并发执行, 见 akshare_commands.function_calls
+AKSHARE_MULTI_CALL = {
+    "name": MULTI_FUNCTION_CALL,
+    "description": "同时调用多个函数. 当请求需要多份数据时使用, 例如多个品种、多个交易所或多种数据.",
+    "parameters": {
+        "type": "object",
+        "properties": {
+            "calls": {
+                "type": "array",
+                "description": "需要调用的函数列表.",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "name": {
+                            "type": "string",
+                            "enum": [function["name"] for function in AKSHARE_FUTURES],
+                            "description": "函数名称."
+                        },
+                        "arguments": {
+                            "type": "object",
+                            "description": "函数参数, 与该函数单独调用时的参数相同."
+                        },
+                    },
+                    "required": ["name", "arguments"],
+                },
+            },
+        },
+        "required": ["calls"],
+    }
+}
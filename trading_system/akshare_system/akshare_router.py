@@ -0,0 +1,345 @@
+"""
+Local intent router of the AkShare requests, no LLM involved.
+
+The request is matched against the function schemas of `akshare_functions.py` with character n-gram
+TF-IDF vectors and keyword rules, dates, varieties, contracts and exchanges are extracted with regular
+expressions. A route is confident only when the best function clearly wins and all of its required
+arguments are found, otherwise the caller falls back to the LLM.
+
+    route = get_router().route("获取大商所上周五的持仓排名")
+    if route.confident:
+        result = function_call(route.function_call())
+"""
+import re
+import json
+import math
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from trading_system.akshare_system.akshare_functions import AKSHARE_FUTURES
+from trading_system.akshare_system.akshare_cache import get_akshare_cache, market_now
+
+
+# strong hints of a function, each hit adds `keyword_weight` to its score
+FUNCTION_KEYWORDS = {
+    "get_futures_daily": ["日交易数据", "日行情", "日线", "每日行情", "收盘价", "结算价", "daily"],
+    "futures_dce_position_rank": ["持仓排名", "会员持仓", "position rank"],
+    "futures_spot_price": ["现货价格", "基差", "spot price", "basis"],
+    "futures_spot_price_previous": ["历史基差", "往期基差", "previous"],
+    "futures_spot_price_daily": ["现货价格走势", "基差走势", "一段时间", "期间"],
+    "futures_czce_warehouse_receipt": ["郑商所仓单", "郑州仓单", "仓单"],
+    "futures_shfe_warehouse_receipt": ["上期所仓单", "上海仓单", "仓单"],
+    "futures_dce_warehouse_receipt": ["大商所仓单", "大连仓单", "仓单"],
+    "futures_rule": ["交易日历", "交易规则", "保证金", "涨跌停"],
+    "futures_zh_spot": ["实时行情", "最新价", "实时报价"],
+    "futures_zh_realtime": ["所有合约", "全部合约", "品种实时"],
+    "futures_zh_minute_sina": ["分钟", "分时", "minute"],
+    "futures_main_sina": ["主力连续", "主连", "主力合约"],
+    "futures_contract_detail": ["合约详情", "合约信息", "合约规格"],
+    "futures_comm_info": ["手续费", "commission"],
+}
+
+MARKETS = {
+    "CFFEX": ["中金所", "中国金融期货交易所", "cffex"],
+    "CZCE": ["郑商所", "郑州商品交易所", "郑州", "czce"],
+    "SHFE": ["上期所", "上海期货交易所", "shfe"],
+    "DCE": ["大商所", "大连商品交易所", "大连", "dce"],
+    "INE": ["上海国际能源交易中心", "能源中心", "ine"],
+    "GFEX": ["广期所", "广州期货交易所", "gfex"],
+    "ALL": ["所有交易所", "全部交易所", "各交易所", "六个交易所"],
+}
+# exchange names of `futures_comm_info`
+COMM_INFO_MARKETS = {
+    "SHFE": "上海期货交易所", "DCE": "大连商品交易所", "CZCE": "郑州商品交易所",
+    "INE": "上海国际能源交易中心", "CFFEX": "中国金融期货交易所", "GFEX": "广州期货交易所", "ALL": "所有",
+}
+
+# variety code: (chinese name, exchange)
+VARIETIES = {
+    "RB": ("螺纹钢", "SHFE"), "HC": ("热卷", "SHFE"), "CU": ("沪铜", "SHFE"), "AL": ("沪铝", "SHFE"),
+    "ZN": ("沪锌", "SHFE"), "NI": ("沪镍", "SHFE"), "AU": ("黄金", "SHFE"), "AG": ("白银", "SHFE"),
+    "RU": ("橡胶", "SHFE"), "FU": ("燃料油", "SHFE"), "BU": ("沥青", "SHFE"), "SP": ("纸浆", "SHFE"),
+    "SC": ("原油", "INE"),
+    "I": ("铁矿石", "DCE"), "J": ("焦炭", "DCE"), "JM": ("焦煤", "DCE"), "M": ("豆粕", "DCE"), "Y": ("豆油", "DCE"),
+    "P": ("棕榈油", "DCE"), "C": ("玉米", "DCE"), "A": ("豆一", "DCE"), "V": ("PVC", "DCE"), "PP": ("聚丙烯", "DCE"),
+    "L": ("塑料", "DCE"), "EG": ("乙二醇", "DCE"),
+    "CF": ("棉花", "CZCE"), "SR": ("白糖", "CZCE"), "TA": ("PTA", "CZCE"), "MA": ("甲醇", "CZCE"),
+    "FG": ("玻璃", "CZCE"), "SA": ("纯碱", "CZCE"), "AP": ("苹果", "CZCE"), "OI": ("菜油", "CZCE"), "RM": ("菜粕", "CZCE"),
+    "IF": ("沪深300", "CFFEX"), "IH": ("上证50", "CFFEX"), "IC": ("中证500", "CFFEX"), "IM": ("中证1000", "CFFEX"),
+    "T": ("十年期国债", "CFFEX"), "TF": ("五年期国债", "CFFEX"),
+    "SI": ("工业硅", "GFEX"),
+}
+# "金" / "银" are left out, they are part of 中金所 / 银行
+VARIETY_ALIASES = {"螺纹": "RB", "铜": "CU", "铝": "AL", "锌": "ZN", "镍": "NI", "铁矿": "I", "棕榈": "P", "糖": "SR",
+                   "棉": "CF"}
+
+WEEKDAYS = {"一": 0, "二": 1, "三": 2, "四": 3, "五": 4, "六": 5, "日": 6, "天": 6}
+EN_WEEKDAYS = {"monday": 0, "tuesday": 1, "wednesday": 2, "thursday": 3, "friday": 4, "saturday": 5, "sunday": 6}
+
+CONTRACT_PATTERN = re.compile(r"(?<![A-Za-z])([A-Za-z]{1,2})(\d{3,4})(?!\d)")
+# 20230703, or 2023-07-03 / 2023年7月3日 with both separators, "2023年12月" is not a date
+DATE_PATTERN = re.compile(
+    r"(?<!\d)(\d{4})(?:(\d{2})(\d{2})(?!\d)|\s*[-/年.]\s*(\d{1,2})\s*[-/月.]\s*(\d{1,2})(?!\d)\s*[日号]?)"
+)
+# time expressions left after the parsed dates are removed, the period of the request is then unknown
+TIME_PATTERN = re.compile(
+    r"\d{4}\s*年|\d{4}\s*[-/.]\s*\d{1,2}|\d{1,2}\s*月|\d{1,2}\s*[日号]"
+    r"|(?:上|本|这|下)个?(?:周|星期|月|季度)|(?:去|前|明)年|上半年|下半年|年初|年底|月初|月底|季度|最近|近期|过去"
+    r"|(?:last|this|next|past) (?:week|month|quarter|year)|\bago\b|\bsince\b"
+)
+PERIOD_PATTERN = re.compile(r"(\d+)\s*(?:分钟|min)")
+
+
+def _tokens(text: str) -> List[str]:
+    """ Latin words, and CJK characters with their bigrams """
+    text = text.lower().replace("_", " ")
+    tokens = re.findall(r"[a-z]+", text)
+    for run in re.findall(r"[\u4e00-\u9fff]+", text):
+        tokens.extend(run)
+        tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+    return tokens
+
+
+@dataclass
+class Route:
+    name: str
+    arguments: Dict = field(default_factory=dict)
+    score: float = 0.0
+    margin: float = 0.0
+    confident: bool = False
+    # arguments required by the schema but not found in the request
+    missing: List[str] = field(default_factory=list)
+    candidates: List[Tuple[str, float]] = field(default_factory=list)
+    seconds: float = 0.0
+
+    def function_call(self) -> Dict[str, str]:
+        """ In the format of the LLM function call, see `akshare_commands.function_call` """
+        return {"name": self.name, "arguments": json.dumps(self.arguments, ensure_ascii=False)}
+
+
+class AkShareRouter:
+    """ TF-IDF and keyword matching of a request against the function schemas """
+
+    def __init__(
+            self,
+            functions: List[Dict] = None,
+            min_score: float = 0.35,
+            min_margin: float = 0.1,
+            keyword_weight: float = 0.25,
+    ):
+        """
+        @param functions: function schemas, default: AKSHARE_FUTURES
+        @param min_score: minimum score of a confident route
+        @param min_margin: minimum lead of the best function over the second one
+        @param keyword_weight: score added by every keyword of `FUNCTION_KEYWORDS` found in the request
+        """
+        self.functions = {f["name"]: f for f in (functions or AKSHARE_FUTURES)}
+        self.min_score = min_score
+        self.min_margin = min_margin
+        self.keyword_weight = keyword_weight
+
+        documents = {}
+        for name, function in self.functions.items():
+            parts = [name, function["description"], *FUNCTION_KEYWORDS.get(name, [])]
+            parts += [p.get("description", "") for p in function["parameters"]["properties"].values()]
+            documents[name] = Counter(_tokens(" ".join(parts)))
+
+        df = Counter(token for counts in documents.values() for token in counts)
+        n = len(documents)
+        self.idf = {token: math.log((n + 1) / (count + 1)) + 1 for token, count in df.items()}
+        self.vectors = {name: self._normalize({t: c * self.idf[t] for t, c in counts.items()})
+                        for name, counts in documents.items()}
+
+    @staticmethod
+    def _normalize(vector: Dict[str, float]) -> Dict[str, float]:
+        norm = math.sqrt(sum(v * v for v in vector.values())) or 1.0
+        return {t: v / norm for t, v in vector.items()}
+
+    def scores(self, text: str) -> List[Tuple[str, float]]:
+        """ Functions ordered by score: cosine similarity plus keyword hits """
+        query = self._normalize({t: c * self.idf.get(t, 0.0) for t, c in Counter(_tokens(text)).items()})
+        lowered = text.lower()
+        result = []
+        for name, vector in self.vectors.items():
+            score = sum(weight * vector.get(token, 0.0) for token, weight in query.items())
+            score += self.keyword_weight * sum(k.lower() in lowered for k in FUNCTION_KEYWORDS.get(name, []))
+            result.append((name, round(score, 4)))
+        return sorted(result, key=lambda x: x[1], reverse=True)
+
+    # -----------------------------------------------------------------------------------------------------------------
+    # argument extraction
+
+    @staticmethod
+    def extract_dates(text: str, now: datetime) -> Tuple[List[str], bool, List[str]]:
+        """
+        Dates of the request as YYYYMMDD in order of appearance
+        @return: dates, whether they are relative to today, time expressions that could not be parsed
+            eg: "7月10日" without a year, "上周", "去年"
+        """
+        today = now.date()
+        found: List[Tuple[int, date]] = []
+        spans: List[Tuple[int, int]] = []
+        for m in DATE_PATTERN.finditer(text):
+            year, month, day = m.group(1), m.group(2) or m.group(4), m.group(3) or m.group(5)
+            try:
+                found.append((m.start(), date(int(year), int(month), int(day))))
+            except ValueError:
+                continue
+            spans.append(m.span())
+        explicit = bool(found)
+
+        lowered = text.lower()
+        for word, days in (("前天", 2), ("昨天", 1), ("昨日", 1), ("yesterday", 1), ("今天", 0), ("今日", 0),
+                           ("today", 0)):
+            for m in re.finditer(word, lowered):
+                found.append((m.start(), today - timedelta(days=days)))
+                spans.append(m.span())
+        for m in re.finditer(r"(上|本|这)(?:周|星期)([一二三四五六日天])", text):
+            monday = today - timedelta(days=today.weekday()) - timedelta(days=7 if m.group(1) == "上" else 0)
+            found.append((m.start(), monday + timedelta(days=WEEKDAYS[m.group(2)])))
+            spans.append(m.span())
+        for m in re.finditer(r"last (monday|tuesday|wednesday|thursday|friday|saturday|sunday)", lowered):
+            days = (today.weekday() - EN_WEEKDAYS[m.group(1)]) % 7 or 7
+            found.append((m.start(), today - timedelta(days=days)))
+            spans.append(m.span())
+        m = re.search(r"(?:最近|近|过去)\s*(\d+)\s*(天|日|周|个月|月|年)", text)
+        if m:
+            n = int(m.group(1))
+            days = {"天": n, "日": n, "周": 7 * n, "个月": 30 * n, "月": 30 * n, "年": 365 * n}[m.group(2)]
+            found += [(m.start(), today - timedelta(days=days)), (m.end(), today)]
+            spans.append(m.span())
+        m = re.search("今年", text)
+        if m:
+            found += [(m.start(), date(today.year, 1, 1)), (m.start() + 1, today)]
+            spans.append(m.span())
+
+        masked = text
+        for start, end in spans:
+            masked = masked[:start] + " " * (end - start) + masked[end:]
+        unparsed = [m.group(0) for m in TIME_PATTERN.finditer(masked.lower())]
+
+        dates = [d.strftime("%Y%m%d") for _, d in sorted(found, key=lambda x: x[0])]
+        return dates, bool(found) and not explicit, unparsed
+
+    @staticmethod
+    def extract_varieties(text: str) -> Tuple[List[str], List[str]]:
+        """ Contracts (eg: RB2310) and variety codes (eg: RB) of the request """
+        contracts = [f"{m.group(1).upper()}{m.group(2)}" for m in CONTRACT_PATTERN.finditer(text)
+                     if m.group(1).upper() in VARIETIES]
+        varieties = [c.rstrip("0123456789") for c in contracts]
+        for m in re.finditer(r"(?<![A-Za-z])([A-Za-z]{1,2})(?![A-Za-z\d])", text):
+            if m.group(1).isupper() and m.group(1) in VARIETIES:
+                varieties.append(m.group(1))
+        for code, (name, _) in VARIETIES.items():
+            if name in text:
+                varieties.append(code)
+        for alias, code in VARIETY_ALIASES.items():
+            if alias in text:
+                varieties.append(code)
+        return list(dict.fromkeys(contracts)), list(dict.fromkeys(varieties))
+
+    @staticmethod
+    def extract_market(text: str) -> Optional[str]:
+        lowered = text.lower()
+        for market, names in MARKETS.items():
+            for name in names:
+                # latin names as whole words, "ine" is part of many words
+                if re.search(rf"(?<![a-z]){name}(?![a-z])" if name.isascii() else re.escape(name), lowered):
+                    return market
+        return None
+
+    @staticmethod
+    def _trade_date(day: str, forward: bool = False) -> str:
+        """ `day` when it is a trading day, otherwise the trading day before it, or after it when `forward` """
+        cache = get_akshare_cache()
+        d = datetime.strptime(day, "%Y%m%d").date()
+        while not cache.is_trade_date(d):
+            d += timedelta(days=1 if forward else -1)
+        return d.strftime("%Y%m%d")
+
+    @staticmethod
+    def date_params(properties: Dict) -> List[str]:
+        return [p for p in ("date", "trade_date", "start_date", "end_date") if p in properties]
+
+    def extract_arguments(self, name: str, text: str, now: Optional[datetime] = None) -> Dict:
+        """ Arguments of `name` found in `text`, the date arguments are left out when the period is unclear """
+        now = now or market_now()
+        dates, relative, unparsed = self.extract_dates(text, now)
+        contracts, varieties = self.extract_varieties(text)
+        market = self.extract_market(text)
+        properties = self.functions[name]["parameters"]["properties"]
+
+        args = {}
+        single = next((p for p in ("date", "trade_date") if p in properties), None)
+        # a partial date such as "7月10日" must not become today, the date arguments are left to the caller
+        if unparsed:
+            dates, single = [], None
+        if "start_date" in properties and dates and (single is None or len(set(dates)) > 1):
+            start, end = dates[0], dates[-1]
+            if relative:
+                # "最近5天" from a Sunday: the range of the trading days in it
+                end = self._trade_date(end)
+                start = min(self._trade_date(start, forward=True), end)
+            args["start_date"], args["end_date"] = start, end
+        elif single:
+            # only a request without any time expression means today
+            day = dates[0] if dates else now.strftime("%Y%m%d")
+            # "today" on a weekend means the last trading day
+            args[single] = self._trade_date(day) if relative or not dates else day
+
+        if "market" in properties:
+            markets = {VARIETIES[v][1] for v in varieties}
+            args["market"] = market or (markets.pop() if len(markets) == 1 else None)
+        if "vars_list" in properties and varieties:
+            args["vars_list"] = varieties
+        if "period" in properties:
+            m = PERIOD_PATTERN.search(text)
+            if m and m.group(1) in properties["period"].get("enum", []):
+                args["period"] = m.group(1)
+        if "symbol" in properties:
+            enum = properties["symbol"].get("enum")
+            if enum:
+                # futures_comm_info takes the exchange name
+                args["symbol"] = COMM_INFO_MARKETS.get(market or "ALL")
+            elif name == "futures_zh_realtime":
+                args["symbol"] = VARIETIES[varieties[0]][0] if varieties else None
+            elif name == "futures_main_sina":
+                args["symbol"] = f"{varieties[0]}0" if varieties else None
+            else:
+                args["symbol"] = contracts[0] if contracts else None
+        return {k: v for k, v in args.items() if v is not None}
+
+    def route(self, text: str, now: Optional[datetime] = None) -> Route:
+        t0 = time.perf_counter()
+        candidates = self.scores(text)
+        (name, score), second = candidates[0], candidates[1][1] if len(candidates) > 1 else 0.0
+        arguments = self.extract_arguments(name, text, now)
+        parameters = self.functions[name]["parameters"]
+        missing = [p for p in parameters.get("required", []) if p not in arguments]
+        if self.extract_dates(text, now or market_now())[2]:
+            # the request names a period the rules could not read
+            missing += [p for p in self.date_params(parameters["properties"]) if p not in missing]
+        return Route(
+            name=name,
+            arguments=arguments,
+            score=score,
+            margin=round(score - second, 4),
+            confident=score >= self.min_score and score - second >= self.min_margin and not missing,
+            missing=missing,
+            candidates=candidates[:3],
+            seconds=time.perf_counter() - t0,
+        )
+
+
+_router: Optional[AkShareRouter] = None
+
+
+def get_router() -> AkShareRouter:
+    """ Router shared by the AkShare tools, its index is built by the first call """
+    global _router
+    if _router is None:
+        _router = AkShareRouter()
+    return _router
@@ -0,0 +1,230 @@
+"""
+Named, versioned store of the fetched data with a memory budget.
+
+Every `put` adds a new version of a name, versions are never modified. When the resident frames
+exceed the budget, the least recently used ones are written once to Arrow IPC files and dropped,
+`get` memory-maps them back.
+
+    store = ResultStore(memory_budget_mb=256)
+    key = store.put("futures_zh_minute_sina", df)     # "futures_zh_minute_sina@1"
+    df = store.get("futures_zh_minute_sina")          # latest version
+"""
+import sys
+import atexit
+import pickle
+import shutil
+import tempfile
+import threading
+from pathlib import Path
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.ipc
+
+
+@dataclass
+class _Entry:
+    key: str
+    name: str
+    version: int
+    sequence: int
+    nbytes: int
+    value: Any = None
+    file: Optional[Path] = None
+    run_id: str = ""
+
+
+def _nbytes(value: Any) -> int:
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(deep=True))
+    return sys.getsizeof(value)
+
+
+class ResultStore:
+    """ LRU store of DataFrames, spilled to Arrow IPC files beyond `memory_budget_mb` """
+
+    def __init__(self, memory_budget_mb: float = 512, spill_dir: str = ""):
+        """
+        @param memory_budget_mb: resident size of the stored results
+        @param spill_dir: directory of the spilled files, a temporary one removed at exit by default
+        """
+        self.memory_budget = int(memory_budget_mb * 1024 ** 2)
+        self._owns_dir = not spill_dir
+        self.spill_dir = Path(spill_dir or tempfile.mkdtemp(prefix="akshare_store_"))
+        self.spill_dir.mkdir(parents=True, exist_ok=True)
+
+        self._entries: Dict[str, _Entry] = {}
+        self._versions: Dict[str, List[int]] = {}
+        # resident keys, least recently used first
+        self._resident: "OrderedDict[str, None]" = OrderedDict()
+        self._resident_bytes = 0
+        self.sequence = 0
+        self._lock = threading.RLock()
+        self._stats = {"puts": 0, "hits": 0, "loads": 0, "spills": 0}
+        if self._owns_dir:
+            atexit.register(self.close)
+
+    @staticmethod
+    def _key(name: str, version: int) -> str:
+        return f"{name}@{version}"
+
+    def _parse(self, name_or_key: str, version: Optional[int] = None) -> str:
+        if version is not None:
+            return self._key(name_or_key, version)
+        if name_or_key in self._entries:
+            return name_or_key
+        versions = self._versions.get(name_or_key)
+        if not versions:
+            raise KeyError(name_or_key)
+        return self._key(name_or_key, versions[-1])
+
+    def put(self, name: str, value: Any, run_id: str = "") -> str:
+        """
+        Store a new version of `name` and return its key, eg: "get_futures_daily@2"
+        @param run_id: the run storing it, see `keys`
+        """
+        if value is None:
+            raise ValueError(f"No result to store for {name}.")
+        with self._lock:
+            version = (self._versions.get(name) or [0])[-1] + 1
+            self.sequence += 1
+            key = self._key(name, version)
+            entry = _Entry(key, name, version, self.sequence, _nbytes(value), value, run_id=run_id)
+            self._entries[key] = entry
+            self._versions.setdefault(name, []).append(version)
+            self._make_resident(entry)
+            self._stats["puts"] += 1
+            return key
+
+    def get(self, name_or_key: str, version: Optional[int] = None) -> Any:
+        """
+        @param name_or_key: a name for its latest version, or a key returned by `put`
+        @param version: a version of `name_or_key`
+        """
+        with self._lock:
+            entry = self._entries[self._parse(name_or_key, version)]
+            if entry.value is not None:
+                self._resident.move_to_end(entry.key)
+                self._stats["hits"] += 1
+                return entry.value
+            entry.value = self._load(entry.file)
+            self._stats["loads"] += 1
+            self._make_resident(entry)
+            return entry.value
+
+    def __getitem__(self, name_or_key: str) -> Any:
+        return self.get(name_or_key)
+
+    def __contains__(self, name_or_key: str) -> bool:
+        return name_or_key in self._entries or name_or_key in self._versions
+
+    def last(self) -> Any:
+        """ Most recently stored result """
+        keys = self.keys()
+        return self.get(keys[-1]) if keys else None
+
+    def keys(self, since: int = 0, run_id: str = "") -> List[str]:
+        """
+        Keys in the order they were stored
+        @param since: only the keys stored after this `sequence`
+        @param run_id: only the keys stored by this run, eg: one agent run among concurrent ones
+        """
+        with self._lock:
+            entries = sorted(self._entries.values(), key=lambda e: e.sequence)
+            return [e.key for e in entries if e.sequence > since and (not run_id or e.run_id == run_id)]
+
+    def versions(self, name: str) -> List[int]:
+        return list(self._versions.get(name, []))
+
+    def delete(self, name_or_key: str) -> None:
+        """ Remove one key, or every version of a name """
+        with self._lock:
+            if name_or_key in self._entries:
+                keys = [name_or_key]
+            else:
+                keys = [self._key(name_or_key, v) for v in self._versions.get(name_or_key, [])]
+            for key in keys:
+                entry = self._entries.pop(key)
+                self._versions[entry.name].remove(entry.version)
+                if not self._versions[entry.name]:
+                    del self._versions[entry.name]
+                self._drop(entry)
+                if entry.file is not None:
+                    entry.file.unlink(missing_ok=True)
+
+    # -----------------------------------------------------------------------------------------------------------------
+    # memory budget
+
+    def _make_resident(self, entry: _Entry) -> None:
+        self._resident[entry.key] = None
+        self._resident_bytes += entry.nbytes
+        # the frame just used stays resident even when it alone exceeds the budget
+        while self._resident_bytes > self.memory_budget and len(self._resident) > 1:
+            lru = self._entries[next(iter(self._resident))]
+            self._spill(lru)
+
+    def _drop(self, entry: _Entry) -> None:
+        if entry.key in self._resident:
+            del self._resident[entry.key]
+            self._resident_bytes -= entry.nbytes
+        entry.value = None
+
+    def _spill(self, entry: _Entry) -> None:
+        """ Versions are immutable, so a frame is written at most once """
+        if entry.file is None:
+            entry.file = self._dump(entry)
+            self._stats["spills"] += 1
+        self._drop(entry)
+
+    def _dump(self, entry: _Entry) -> Path:
+        value = entry.value
+        stem = self.spill_dir / f"{entry.name}_{entry.version}"
+        if isinstance(value, pd.DataFrame):
+            try:
+                table = pa.Table.from_pandas(value, preserve_index=True)
+                path = stem.with_suffix(".arrow")
+                with pa.OSFile(str(path), "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+                    writer.write_table(table)
+                return path
+            except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+                # mixed object columns, kept exactly as they are
+                pass
+        path = stem.with_suffix(".pkl")
+        path.write_bytes(pickle.dumps(entry.value))
+        return path
+
+    @staticmethod
+    def _load(path: Path) -> Any:
+        if path.suffix == ".arrow":
+            # the buffers of the table keep the mapping open, numeric columns without nulls point into the file
+            table = pa.ipc.open_file(pa.memory_map(str(path), "r")).read_all()
+            return table.to_pandas(split_blocks=True)
+        return pickle.loads(path.read_bytes())
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            spilled = [e for e in self._entries.values() if e.file is not None]
+            return {
+                **self._stats,
+                "entries": len(self._entries),
+                "resident": len(self._resident),
+                "resident_mb": round(self._resident_bytes / 1024 ** 2, 2),
+                "budget_mb": round(self.memory_budget / 1024 ** 2, 2),
+                "spilled_files": len(spilled),
+                "spilled_mb": round(sum(e.file.stat().st_size for e in spilled if e.file.exists()) / 1024 ** 2, 2),
+            }
+
+    def close(self) -> None:
+        """ Drop every result, the spill directory is removed when the store created it """
+        with self._lock:
+            self._entries.clear()
+            self._versions.clear()
+            self._resident.clear()
+            self._resident_bytes = 0
+        if self._owns_dir:
+            shutil.rmtree(self.spill_dir, ignore_errors=True)
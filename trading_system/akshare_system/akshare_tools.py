@@ -1,6 +1,5 @@
 from typing import Optional, Any, Dict
 
-import pandas as pd
 from pydantic import Field
 
 from langchain.callbacks.manager import (
@@ -10,16 +9,19 @@ from langchain.callbacks.manager import (
 from langchain.tools.base import BaseTool
 
 from trading_system.base import llm_chatgpt
-from trading_system.utilities import print_red
+from trading_system.utilities import print_red, run_blocking
+from trading_system.llm_cache import llm_cache_enabled
 from trading_system.functions_chain import FunctionsChain, functions_chain_to_functions_call
 
-from trading_system.akshare_system.akshare_functions import AKSHARE_FUTURES
-from trading_system.akshare_system.akshare_commands import function_call
+from trading_system.akshare_system.akshare_functions import AKSHARE_FUTURES, AKSHARE_MULTI_CALL, MULTI_FUNCTION_CALL
+from trading_system.akshare_system.akshare_commands import function_call, function_calls, afunction_calls
+from trading_system.akshare_system.akshare_store import ResultStore
+from trading_system.akshare_system.akshare_router import get_router
 
 
 class AkShareBaseTool(BaseTool):
-    # Global controller and configuration file
-    data_storage: Dict[str, pd.DataFrame] = Field(default={})
+    # Global result store, results are kept by function name and version, see `result_store`
+    data_storage: ResultStore = Field(default=None)
 
     # The project does not require AI automatic Q&A
     return_direct: bool = Field(default=True)
@@ -27,12 +29,36 @@ class AkShareBaseTool(BaseTool):
     name = Field(default="", exclude=True)
     description = Field(default="", exclude=True)
 
+    # False: always query the LLM, eg: to regenerate a strategy for the same description
+    use_llm_cache: bool = Field(default=True)
+    # False: always fetch the data from AkShare, the cached result is refreshed
+    use_data_cache: bool = Field(default=True)
+    # tags the stored results, so that concurrent runs each find their own, see `start_auto`
+    run_id: str = Field(default="")
+
+    def run(self, *args: Any, **kwargs: Any) -> Any:
+        with llm_cache_enabled(self.use_llm_cache):
+            return super().run(*args, **kwargs)
+
+    async def arun(self, *args: Any, **kwargs: Any) -> Any:
+        with llm_cache_enabled(self.use_llm_cache):
+            return await super().arun(*args, **kwargs)
+
     def _run(self, *args: Any, **kwargs: Any,) -> Any:
         return ""
 
-    async def _arun(self, input_str: str, run_manager: Optional[AsyncCallbackManagerForToolRun] = None) -> str:
-        """Use the tool asynchronously."""
-        raise NotImplementedError("custom_search does not support async")
+    @staticmethod
+    def result_store() -> ResultStore:
+        if not isinstance(getattr(AkShareBaseTool, "data_storage", None), ResultStore):
+            AkShareBaseTool.data_storage = ResultStore()
+        return AkShareBaseTool.data_storage
+
+    def _put(self, name: str, result: Any) -> str:
+        return self.result_store().put(name, result, run_id=self.run_id)
+
+    async def _arun(self, *args: Any, **kwargs: Any) -> Any:
+        """ Run the blocking akshare work of `_run` in a worker thread """
+        return await run_blocking(self._run, *args, **kwargs)
 
 
 class AkShareFuturesTool(AkShareBaseTool):
@@ -40,14 +66,63 @@ class AkShareFuturesTool(AkShareBaseTool):
     name = "akshare_futures"
     description = "Access to financial data related to futures through the AkShare project."
 
-    def _run(self, input_str: str, run_manager: Optional[CallbackManagerForToolRun] = None) -> str:
-        functions_chain = FunctionsChain(
+    # True: one LLM response may request several functions, they are executed concurrently
+    multi_call: bool = Field(default=True)
+    # True: common requests are routed locally, the LLM is only asked when the route is not confident
+    use_router: bool = Field(default=True)
+
+    def _route(self, input_str: str) -> Optional[Dict[str, str]]:
+        """ Function call of a confident local route, None to ask the LLM """
+        if not self.use_router:
+            return None
+        route = get_router().route(input_str)
+        if not route.confident:
+            return None
+        print_red(f"Routed to {route.name}{route.arguments} in {route.seconds * 1000:.1f}ms (score {route.score})")
+        return route.function_call()
+
+    def _functions_chain(self) -> FunctionsChain:
+        functions = AKSHARE_FUTURES + [AKSHARE_MULTI_CALL] if self.multi_call else AKSHARE_FUTURES
+        return FunctionsChain(
             llm=llm_chatgpt,
-            llm_kwargs={"functions": AKSHARE_FUTURES},
+            llm_kwargs={"functions": functions},
         )
-        functions_chain.predict(input=input_str)
-        response = functions_chain_to_functions_call(functions_chain)
+
+    def _store_results(self, results: Dict[str, Dict]) -> str:
+        """ Keep the results by function name and report the time of every call """
+        report = []
+        for key, item in results.items():
+            if item["result"] is not None:
+                self._put(item["name"], item["result"])
+            status = f"failed, {item['error']}" if item["error"] else f"{item['seconds']:.2f}s"
+            report.append(f"{key}: {status}")
+        print_red("; ".join(report))
+        return f"Data acquisition complete ({'; '.join(report)}). "
+
+    def _run(self, input_str: str, run_manager: Optional[CallbackManagerForToolRun] = None) -> str:
+        response = self._route(input_str)
+        if response is None:
+            functions_chain = self._functions_chain()
+            functions_chain.predict(input=input_str)
+            response = functions_chain_to_functions_call(functions_chain)
+        if response:
+            if response["name"] == MULTI_FUNCTION_CALL:
+                return self._store_results(function_calls(response, self.use_data_cache))
+            result = function_call(response, self.use_data_cache)
+            if result is not None:
+                self._put(response["name"], result)
+        return "Data acquisition complete. "
+
+    async def _arun(self, input_str: str, run_manager: Optional[AsyncCallbackManagerForToolRun] = None) -> str:
+        response = self._route(input_str)
+        if response is None:
+            functions_chain = self._functions_chain()
+            await functions_chain.apredict(input=input_str)
+            response = functions_chain_to_functions_call(functions_chain)
         if response:
-            result = function_call(response)
-            AkShareBaseTool.data_storage["data"] = result
+            if response["name"] == MULTI_FUNCTION_CALL:
+                return self._store_results(await afunction_calls(response, self.use_data_cache))
+            result = await run_blocking(function_call, response, self.use_data_cache)
+            if result is not None:
+                self._put(response["name"], result)
         return "Data acquisition complete. "
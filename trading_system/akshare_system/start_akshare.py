@@ -1,12 +1,38 @@
+import uuid
+
 from trading_system.trading_agents import create_extract_agent
 from trading_system.akshare_system.akshare_tools import AkShareBaseTool, AkShareFuturesTool
+from trading_system.akshare_system.akshare_router import get_router
+
+
+def start_auto(input_str: str, fast_path: bool = True):
+    """
+    Fetch the data described by `input_str` and return the last result.
+    Every result of the session stays in `AkShareBaseTool.result_store()`, eg: store.get("get_futures_daily"),
+    the ones of this run are tagged with its run id, so concurrent runs do not see each other's results
+    @param fast_path: common requests are routed locally, the agent and the LLM are skipped
+    """
+    run_id = uuid.uuid4().hex
+    tool = AkShareFuturesTool(use_router=fast_path, run_id=run_id)
+    store = AkShareBaseTool.result_store()
+    if fast_path and get_router().route(input_str).confident:
+        tool.run(input_str)
+    else:
+        fc_agent = create_extract_agent([tool])
+        fc_agent.run(input_str)
+    keys = store.keys(run_id=run_id)
+    return store.get(keys[-1]) if keys else None
 
 
-def start_auto(input_str: str):
-    tools = [
-        AkShareFuturesTool()
-    ]
-    AkShareBaseTool.data_storage = {}
-    fc_agent = create_extract_agent(tools)
-    fc_agent.run(input_str)
-    return AkShareBaseTool.data_storage["data"]
+async def astart_auto(input_str: str, fast_path: bool = True):
+    """ Async `start_auto` """
+    run_id = uuid.uuid4().hex
+    tool = AkShareFuturesTool(use_router=fast_path, run_id=run_id)
+    store = AkShareBaseTool.result_store()
+    if fast_path and get_router().route(input_str).confident:
+        await tool.arun(input_str)
+    else:
+        fc_agent = create_extract_agent([tool])
+        await fc_agent.arun(input_str)
+    keys = store.keys(run_id=run_id)
+    return store.get(keys[-1]) if keys else None
@@ -5,8 +5,11 @@ os.environ["OPENAI_API_KEY"] = ""
 import langchain
 # langchain.debug = True
 
-from langchain.cache import SQLiteCache
-# langchain.llm_cache = SQLiteCache(database_path=".langchain_cache.db")
+from trading_system.llm_cache import LLMResponseCache
+# Identical prompts are answered from the local cache, see `use_llm_cache` of the tools to bypass it.
+# Pass `embeddings=OpenAIEmbeddings()` to also reuse answers of near identical prompts.
+llm_cache = LLMResponseCache(database_path=".langchain_cache.db")
+langchain.llm_cache = llm_cache
 
 from langchain.chat_models import ChatOpenAI
 
@@ -0,0 +1,97 @@
+import os
+import time
+import shutil
+import argparse
+import tempfile
+from pathlib import Path
+from typing import Sequence
+
+import pandas as pd
+
+
+DATA_FORMATS = ("json", "jsongz", "hdf5", "feather", "parquet")
+
+
+def benchmark_dataformats(
+        datadir: str,
+        trading_mode: str = "futures",
+        source_format: str = "feather",
+        formats: Sequence[str] = DATA_FORMATS,
+        repeat: int = 3,
+) -> pd.DataFrame:
+    """
+    Compare load time and disk usage of every OHLCV data format for each pair / timeframe in `datadir`
+    @param datadir: eg: "user_data/data/binance"
+    @param trading_mode: "spot" or "futures"
+    @param source_format: format of the existing data in `datadir`
+    @param formats: formats to compare
+    @param repeat: the fastest of `repeat` loads is reported
+    """
+    from freqtrade.data.history.idatahandler import get_datahandler
+
+    datadir = Path(datadir)
+    src = get_datahandler(datadir, source_format)
+    paircombs = src.ohlcv_get_available_data(datadir, trading_mode)
+
+    items = []
+    tmp_root = Path(tempfile.mkdtemp(prefix="dataformat_benchmark_"))
+    try:
+        for pair, timeframe, candle_type in paircombs:
+            df = src.ohlcv_load(pair, timeframe, candle_type=candle_type, warn_no_data=False)
+            if df.empty:
+                continue
+            for data_format in formats:
+                fmt_dir = tmp_root / data_format
+                fmt_dir.mkdir(exist_ok=True)
+                handler = get_datahandler(fmt_dir, data_format)
+
+                t0 = time.perf_counter()
+                handler.ohlcv_store(pair, timeframe, df, candle_type=candle_type)
+                store_time = time.perf_counter() - t0
+
+                load_time = float("inf")
+                for _ in range(repeat):
+                    t0 = time.perf_counter()
+                    handler.ohlcv_load(pair, timeframe, candle_type=candle_type, warn_no_data=False)
+                    load_time = min(load_time, time.perf_counter() - t0)
+
+                filename = handler._pair_data_filename(fmt_dir, pair, timeframe, candle_type)
+                items.append({
+                    "pair": pair,
+                    "timeframe": timeframe,
+                    "candle_type": getattr(candle_type, "value", candle_type),
+                    "format": data_format,
+                    "rows": len(df),
+                    "size_kb": round(os.path.getsize(filename) / 1024, 1),
+                    "store_ms": round(store_time * 1000, 2),
+                    "load_ms": round(load_time * 1000, 2),
+                })
+    finally:
+        shutil.rmtree(tmp_root, ignore_errors=True)
+
+    return pd.DataFrame(items)
+
+
+def summarize(df: pd.DataFrame) -> pd.DataFrame:
+    """ Total disk usage and load time per format """
+    if df.empty:
+        return df
+    return df.groupby("format")[["size_kb", "store_ms", "load_ms"]].sum().sort_values("load_ms")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Compare Freqtrade OHLCV data formats")
+    parser.add_argument("--datadir", required=True, help="eg: user_data/data/binance")
+    parser.add_argument("--trading-mode", default="futures", choices=["spot", "futures"])
+    parser.add_argument("--source-format", default="feather")
+    parser.add_argument("--formats", default=",".join(DATA_FORMATS))
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    result = benchmark_dataformats(
+        args.datadir, args.trading_mode, args.source_format,
+        [i.strip() for i in args.formats.split(",")], args.repeat
+    )
+    print(result.to_string(index=False))
+    print()
+    print(summarize(result))
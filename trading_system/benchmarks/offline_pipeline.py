@@ -0,0 +1,109 @@
+import json
+import time
+import shutil
+import argparse
+import tempfile
+from pathlib import Path
+from contextlib import contextmanager
+from typing import Dict
+
+from trading_system.freqtrade_system.freqtrade_commands import FreqtradeCommands
+
+
+STRATEGY_NAME = "mock_strategy"
+
+
+@contextmanager
+def _timed(timings: Dict[str, float], stage: str):
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[stage] = round(time.perf_counter() - t0, 3)
+        print(f"[offline pipeline] {stage}: {timings[stage]:.3f}s")
+
+
+def run_offline_pipeline(
+        user_data_dir: str = "",
+        pairs: str = "BTC/USDT:USDT, ETH/USDT:USDT",
+        trading_mode: str = "futures",
+        timeframe: str = "5m",
+        timerange: str = "20240101-20240401",
+        epochs: int = 20,
+) -> Dict[str, float]:
+    """
+    Run download -> validate -> backtest -> hyperopt on the offline "mock" exchange and time each stage
+    @param user_data_dir: working directory, kept and reused incrementally,
+        by default a temporary directory removed afterwards
+    @param epochs: hyperopt epochs, 0 skips hyperopt
+    """
+    if user_data_dir:
+        return _run_offline_pipeline(user_data_dir, pairs, trading_mode, timeframe, timerange, epochs)
+    user_data_dir = tempfile.mkdtemp(prefix="mock_user_data_")
+    try:
+        return _run_offline_pipeline(user_data_dir, pairs, trading_mode, timeframe, timerange, epochs)
+    finally:
+        shutil.rmtree(user_data_dir, ignore_errors=True)
+
+
+def _run_offline_pipeline(
+        user_data_dir: str,
+        pairs: str,
+        trading_mode: str,
+        timeframe: str,
+        timerange: str,
+        epochs: int,
+) -> Dict[str, float]:
+    timings: Dict[str, float] = {}
+    with _timed(timings, "init_config"):
+        fc = FreqtradeCommands(
+            user_data_dir=user_data_dir,
+            exchange="mock",
+            pairs=pairs,
+            trading_mode=trading_mode,
+            timeframe=timeframe,
+            timerange=timerange,
+            dry_run=True,
+            show_logs=False,
+        )
+        fc.init_config()
+        if not Path(user_data_dir, "strategies", f"{STRATEGY_NAME}.py").exists():
+            fc.start_new_strategy(STRATEGY_NAME)
+
+    with _timed(timings, "download"):
+        fc.start_download_data()
+
+    with _timed(timings, "validate"):
+        if not fc.validity_test():
+            raise RuntimeError("Synthetic data is incomplete, see the log above.")
+
+    strategy = "".join(x.title() for x in STRATEGY_NAME.split("_"))
+    with _timed(timings, "backtest"):
+        fc.start_backtesting(strategy)
+
+    if epochs:
+        with _timed(timings, "hyperopt"):
+            fc.start_hyperopt(strategy, epochs)
+
+    timings["total"] = round(sum(timings.values()), 3)
+    return timings
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Run the Freqtrade pipeline offline on synthetic data")
+    parser.add_argument("--user-data-dir", default="", help="kept and reused, a temporary directory by default")
+    parser.add_argument("--pairs", default="BTC/USDT:USDT, ETH/USDT:USDT")
+    parser.add_argument("--trading-mode", default="futures", choices=["spot", "futures"])
+    parser.add_argument("--timeframe", default="5m")
+    parser.add_argument("--timerange", default="20240101-20240401")
+    parser.add_argument("--epochs", type=int, default=20)
+    parser.add_argument("--output", default="", help="write the timings to this json file")
+    args = parser.parse_args()
+
+    result = run_offline_pipeline(
+        args.user_data_dir, args.pairs, args.trading_mode, args.timeframe,
+        args.timerange, args.epochs
+    )
+    print(json.dumps(result, indent=4))
+    if args.output:
+        Path(args.output).write_text(json.dumps(result, indent=4))
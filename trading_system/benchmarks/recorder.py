@@ -0,0 +1,142 @@
+import os
+import sys
+import json
+import time
+import platform
+import threading
+import subprocess
+from pathlib import Path
+from datetime import datetime
+from contextlib import contextmanager
+from dataclasses import dataclass, asdict
+from typing import Dict, List, Optional
+
+import psutil
+import pandas as pd
+
+
+@dataclass
+class StageResult:
+    stage: str
+    seconds: float
+    peak_rss_mb: float
+    rows: int = 0
+    rows_per_sec: float = 0.0
+
+    def set_rows(self, rows: int) -> None:
+        """ Rows processed by the stage, may be counted after the stage finished """
+        self.rows = rows
+        self.rows_per_sec = round(rows / self.seconds, 1) if self.seconds and rows else 0.0
+
+
+class _RssSampler(threading.Thread):
+    """ Peak resident memory of this process and its children (hyperopt / backtest workers) """
+
+    def __init__(self, interval: float = 0.01):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.process = psutil.Process()
+        self.peak = 0
+        self._stop_event = threading.Event()
+
+    def _rss(self) -> int:
+        rss = self.process.memory_info().rss
+        for child in self.process.children(recursive=True):
+            try:
+                rss += child.memory_info().rss
+            except psutil.Error:
+                pass
+        return rss
+
+    def run(self) -> None:
+        while not self._stop_event.is_set():
+            self.peak = max(self.peak, self._rss())
+            self._stop_event.wait(self.interval)
+
+    def stop(self) -> int:
+        self._stop_event.set()
+        self.join()
+        self.peak = max(self.peak, self._rss())
+        return self.peak
+
+
+class BenchmarkRecorder:
+    """
+    Record wall time, peak RSS and throughput of each stage, and save them as JSON
+    so the results of two commits can be compared.
+    """
+
+    def __init__(self, dataset: Optional[Dict] = None):
+        self.dataset = dataset or {}
+        self.results: List[StageResult] = []
+
+    @contextmanager
+    def stage(self, name: str):
+        """
+        with recorder.stage("download") as stage:
+            ...
+            stage.rows = 1000
+        """
+        result = StageResult(stage=name, seconds=0.0, peak_rss_mb=0.0)
+        sampler = _RssSampler()
+        sampler.start()
+        t0 = time.perf_counter()
+        try:
+            yield result
+        finally:
+            result.seconds = round(time.perf_counter() - t0, 4)
+            result.peak_rss_mb = round(sampler.stop() / 1024 ** 2, 1)
+            result.set_rows(result.rows)
+            self.results.append(result)
+            print(f"[benchmark] {name}: {result.seconds:.3f}s, peak {result.peak_rss_mb} MB, "
+                  f"{result.rows} rows ({result.rows_per_sec:.0f} rows/sec)")
+
+    def to_dataframe(self) -> pd.DataFrame:
+        return pd.DataFrame([asdict(r) for r in self.results])
+
+    def to_dict(self) -> Dict:
+        return {
+            "commit": git_commit(),
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "dataset": self.dataset,
+            "stages": [asdict(r) for r in self.results],
+        }
+
+    def save(self, output_dir: str = "benchmark_results") -> Path:
+        """ Write `<output_dir>/<commit>.json` and return its path """
+        data = self.to_dict()
+        path = Path(output_dir, f"{data['commit']}.json")
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(data, indent=4, default=str))
+        return path
+
+
+def git_commit() -> str:
+    """ Short hash of HEAD, suffixed with "-dirty" when the work tree has changes """
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+        dirty = subprocess.run(
+            ["git", "status", "--porcelain", "--untracked-files=no"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+    return f"{commit}-dirty" if dirty else commit
+
+
+def compare_results(baseline: str, current: str) -> pd.DataFrame:
+    """ Per stage change of wall time, peak RSS and throughput between two saved result files """
+    frames = []
+    for path in (baseline, current):
+        data = json.loads(Path(path).read_text())
+        df = pd.DataFrame(data["stages"]).set_index("stage")[["seconds", "peak_rss_mb", "rows_per_sec"]]
+        frames.append(df)
+
+    df = frames[0].join(frames[1], lsuffix="_base", rsuffix="_new", how="outer")
+    for column in ("seconds", "peak_rss_mb", "rows_per_sec"):
+        df[f"{column}_change_%"] = ((df[f"{column}_new"] / df[f"{column}_base"] - 1) * 100).round(1)
+    return df
@@ -0,0 +1,225 @@
+"""
+End-to-end benchmarks of the AsyncTrader toolchain on local synthetic data.
+
+    python -m trading_system.benchmarks.run_benchmarks --pairs 4 --timeframes 5m,1h --years 1
+    python -m trading_system.benchmarks.run_benchmarks --compare benchmark_results/<commit>.json
+
+Freqtrade runs against the offline "mock" exchange, Vnpy bars are generated in memory,
+the LLM is replaced by a canned response. Results are saved per commit under `--output-dir`.
+"""
+import os
+import shutil
+import argparse
+import tempfile
+import multiprocessing
+from pathlib import Path
+from datetime import date, timedelta
+from concurrent.futures import ProcessPoolExecutor
+from typing import List
+
+import numpy as np
+import pandas as pd
+
+from trading_system.benchmarks.recorder import BenchmarkRecorder, StageResult, compare_results
+
+
+STRATEGY_NAME = "bench_strategy"
+VNPY_SYMBOL_PREFIX = "bench"
+
+
+def benchmark_freqtrade(
+        recorder: BenchmarkRecorder,
+        workdir: Path,
+        pairs: int,
+        timeframes: List[str],
+        years: float,
+        epochs: int,
+        llm: bool,
+) -> None:
+    """ download -> inventory -> backtest -> hyperopt (-> strategy creation) on the mock exchange """
+    from trading_system.freqtrade_system.freqtrade_mock import MOCK_BASES, MOCK_QUOTES
+    from trading_system.freqtrade_system.freqtrade_commands import FreqtradeCommands
+    from trading_system.freqtrade_system.freqtrade_inventory import DataInventory
+
+    pair_list = [f"{base}/{quote}:{quote}" for quote in MOCK_QUOTES for base in MOCK_BASES][:pairs]
+    end = date.today()
+    start = end - timedelta(days=int(365 * years))
+
+    fc = FreqtradeCommands(
+        user_data_dir=str(workdir / "freqtrade"),
+        exchange="mock",
+        pairs=", ".join(pair_list),
+        trading_mode="futures",
+        timeframe=timeframes[0],
+        timerange=f"{start:%Y%m%d}-{end:%Y%m%d}",
+        dry_run=True,
+        add_timeframes=", ".join(timeframes[1:]),
+        show_logs=False,
+    )
+    with recorder.stage("ft_init_config"):
+        fc.init_config()
+        fc.start_new_strategy(STRATEGY_NAME)
+    strategy = "".join(x.title() for x in STRATEGY_NAME.split("_"))
+
+    with recorder.stage("ft_download") as download_stage:
+        fc.start_download_data()
+
+    sidecar = Path(fc.get_config()["datadir"], DataInventory.SIDECAR)
+    sidecar.unlink(missing_ok=True)
+    with recorder.stage("ft_list_data_cold") as stage:
+        records = fc.get_data_inventory().records
+        stage.rows = sum(r.rows for r in records)
+    download_stage.set_rows(stage.rows)
+
+    with recorder.stage("ft_list_data_warm") as stage:
+        stage.rows = sum(r.rows for r in fc.get_data_inventory().records)
+
+    base_rows = sum(r.rows for r in records if r.timeframe == timeframes[0] and r.candle_type == "futures")
+    with recorder.stage("ft_backtest") as stage:
+        fc.start_backtesting(strategy)
+        stage.rows = base_rows
+
+    if epochs:
+        with recorder.stage("ft_hyperopt") as stage:
+            fc.start_hyperopt(strategy, epochs)
+            stage.rows = base_rows * epochs
+
+    if llm:
+        benchmark_strategy_creation(recorder, fc, strategy)
+
+
+def benchmark_strategy_creation(recorder: BenchmarkRecorder, fc, strategy: str, repeat: int = 20) -> None:
+    """ Prompt building, code extraction and saving of StrategyCreationTool, with a canned LLM response """
+    try:
+        from langchain.chat_models.fake import FakeListChatModel
+        from trading_system.freqtrade_system import freqtrade_tools
+    except Exception as e:
+        # trading_system.base needs an OpenAI key even though no request is sent
+        print(f"[benchmark] strategy creation skipped: {e}")
+        return
+
+    code = Path(fc.user_data_dir, "strategies", f"{STRATEGY_NAME}.py").read_text()
+    code = code.replace(f"class {strategy}(", "class AutoStrategy(")
+    fake_llm = FakeListChatModel(responses=[f"```python\n{code}\n```"] * repeat)
+
+    llm_chatgpt, global_fc = freqtrade_tools.llm_chatgpt, freqtrade_tools.FreqtradeBaseTool.fc
+    freqtrade_tools.llm_chatgpt = fake_llm
+    freqtrade_tools.FreqtradeBaseTool.fc = fc
+    try:
+        tool = freqtrade_tools.StrategyCreationTool()
+        with recorder.stage("llm_strategy_creation") as stage:
+            for _ in range(repeat):
+                tool._run("RSI crosses above 30 to go long, below 70 to exit.")
+            stage.rows = repeat
+    finally:
+        freqtrade_tools.llm_chatgpt = llm_chatgpt
+        freqtrade_tools.FreqtradeBaseTool.fc = global_fc
+
+
+def synthetic_bars(symbol_index: int, interval_minutes: int, years: float) -> pd.DataFrame:
+    """ Random walk bars in the csv layout of `VnpyCommands.import_data_from_csv` """
+    rng = np.random.default_rng(symbol_index)
+    end = pd.Timestamp(date.today())
+    n = int(365 * years * 24 * 60 / interval_minutes)
+    index = pd.date_range(end=end, periods=n, freq=f"{interval_minutes}min")
+
+    close = 3000 * np.exp(np.cumsum(rng.normal(0, 0.001, n)))
+    open_ = np.concatenate(([close[0]], close[:-1]))
+    spread = np.abs(rng.normal(0, 0.0005, n)) * close
+    volume = rng.integers(1, 1000, n).astype(float)
+    return pd.DataFrame({
+        "datetime": index.strftime("%Y-%m-%d %H:%M:%S"),
+        "open": open_,
+        "high": np.maximum(open_, close) + spread,
+        "low": np.minimum(open_, close) - spread,
+        "close": close,
+        "volume": volume,
+        "turnover": volume * close,
+        "open_interest": rng.integers(1000, 100000, n).astype(float),
+    })
+
+
+def _vnpy_import(vnpy_dir: str, symbols: int, intervals: List[str], years: float) -> List[StageResult]:
+    """ Runs in a fresh process: vnpy picks `./.vntrader` as its trader directory when it is imported there """
+    os.chdir(vnpy_dir)
+    from vnpy.trader.constant import Exchange, Interval
+    from trading_system.vnpy_system.vnpy_commands import VnpyCommands
+
+    recorder = BenchmarkRecorder()
+    interval_minutes = {Interval.MINUTE: 1, Interval.HOUR: 60, Interval.DAILY: 1440}
+    vc = VnpyCommands(vt_symbol="", interval="", timerange="", offline=True)
+    for interval_name in intervals:
+        interval = Interval(interval_name)
+        frames = [synthetic_bars(i, interval_minutes[interval], years) for i in range(symbols)]
+        with recorder.stage(f"vnpy_import_{interval.value}") as stage:
+            for i, df in enumerate(frames):
+                _, _, count = vc.import_data_from_csv(
+                    df, f"{VNPY_SYMBOL_PREFIX}{i}", Exchange.LOCAL, interval, "Asia/Shanghai",
+                    "datetime", "open", "high", "low", "close", "volume", "turnover", "open_interest",
+                    "%Y-%m-%d %H:%M:%S"
+                )
+                stage.rows += count
+    return recorder.results
+
+
+def benchmark_vnpy(
+        recorder: BenchmarkRecorder,
+        workdir: Path,
+        symbols: int,
+        intervals: List[str],
+        years: float,
+) -> None:
+    """ Bar import into the sqlite database of a vntrader directory under `workdir`, the user's one is not touched """
+    vnpy_dir = workdir / "vnpy"
+    vnpy_dir.joinpath(".vntrader").mkdir(parents=True, exist_ok=True)
+    # a spawned process, vnpy fixes its trader directory and database at import time
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as pool:
+        results = pool.submit(_vnpy_import, str(vnpy_dir), symbols, intervals, years).result()
+    recorder.results.extend(results)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark the AsyncTrader toolchain on synthetic data")
+    parser.add_argument("--pairs", type=int, default=2, help="number of Freqtrade pairs")
+    parser.add_argument("--timeframes", default="5m,1h", help="Freqtrade timeframes, the first one is backtested")
+    parser.add_argument("--years", type=float, default=1.0, help="history length of every dataset")
+    parser.add_argument("--epochs", type=int, default=10, help="hyperopt epochs, 0 skips hyperopt")
+    parser.add_argument("--vnpy-symbols", type=int, default=2)
+    parser.add_argument("--vnpy-intervals", default="1m,1h", help="Vnpy intervals: 1m, 1h, d")
+    parser.add_argument("--skip-freqtrade", action="store_true")
+    parser.add_argument("--skip-vnpy", action="store_true")
+    parser.add_argument("--llm", action="store_true", help="also benchmark strategy creation with a mocked LLM")
+    parser.add_argument("--workdir", default="", help="working directory, a temporary one by default")
+    parser.add_argument("--output-dir", default="benchmark_results")
+    parser.add_argument("--compare", default="", help="baseline result json to compare with")
+    args = parser.parse_args()
+
+    timeframes = [i.strip() for i in args.timeframes.split(",") if i.strip()]
+    vnpy_intervals = [i.strip() for i in args.vnpy_intervals.split(",") if i.strip()]
+    recorder = BenchmarkRecorder(dataset={
+        "pairs": args.pairs,
+        "timeframes": timeframes,
+        "years": args.years,
+        "epochs": args.epochs,
+        "vnpy_symbols": args.vnpy_symbols,
+        "vnpy_intervals": vnpy_intervals,
+    })
+
+    workdir = Path(args.workdir) if args.workdir else Path(tempfile.mkdtemp(prefix="asynctrader_benchmark_"))
+    try:
+        if not args.skip_freqtrade:
+            benchmark_freqtrade(recorder, workdir, args.pairs, timeframes, args.years, args.epochs, args.llm)
+        if not args.skip_vnpy:
+            benchmark_vnpy(recorder, workdir, args.vnpy_symbols, vnpy_intervals, args.years)
+    finally:
+        if not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    path = recorder.save(args.output_dir)
+    print()
+    print(recorder.to_dataframe().to_string(index=False))
+    print(f"\nResults saved to {path}")
+
+    if args.compare:
+        print()
+        print(compare_results(args.compare, str(path)).to_string())
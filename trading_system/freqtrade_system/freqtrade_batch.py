@@ -0,0 +1,177 @@
+import re
+import time
+import shutil
+import asyncio
+from pathlib import Path
+from typing import List, Dict, Optional
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from trading_system.base import llm_chatgpt
+from trading_system.utilities import print_red, run_blocking, camel_to_underscore
+from trading_system.freqtrade_system.freqtrade_commands import FreqtradeCommands
+from trading_system.freqtrade_system.freqtrade_tools import FreqtradeBaseTool, StrategyCreationTool
+
+
+DESCRIPTION_SEPARATOR = "==="
+# failed strategies are moved here, freqtrade does not search subdirectories of the strategy path
+REJECTED_DIR = "rejected"
+LEADERBOARD_COLUMNS = [
+    "total_trades", "profit_total", "profit_total_abs", "max_drawdown_account",
+    "sharpe", "sortino", "calmar", "profit_factor", "winrate",
+]
+
+
+def load_descriptions(path: str) -> List[str]:
+    """
+    Strategy descriptions of a directory (one *.txt file each) or a file (separated by lines of `===`).
+    Like trader_freqtrade.txt, anything after a `---` line is ignored.
+    """
+    path = Path(path)
+    if path.is_dir():
+        texts = [p.read_text(encoding="utf-8") for p in sorted(path.glob("*.txt"))]
+    else:
+        texts = re.split(rf"^\s*{DESCRIPTION_SEPARATOR}\s*$", path.read_text(encoding="utf-8"), flags=re.MULTILINE)
+    descriptions = [text.split("---")[0].strip() for text in texts]
+    return [d for d in descriptions if d]
+
+
+def next_strategy_names(strategy_dir: str, count: int, prefix: str = "AutoStrategy") -> List[str]:
+    """ `count` class names AutoStrategyNNN whose files do not exist in `strategy_dir` or its rejected ones yet """
+    file_prefix = camel_to_underscore(prefix)
+    files = [*Path(strategy_dir).glob(f"{file_prefix}*.py"),
+             *Path(strategy_dir, REJECTED_DIR).glob(f"{file_prefix}*.py")]
+    used = [int(m.group(1)) for p in files if (m := re.fullmatch(rf"{file_prefix}(\d+)", p.stem))]
+    start = max(used, default=0) + 1
+    return [f"{prefix}{i:03d}" for i in range(start, start + count)]
+
+
+def backtest_strategy(config: dict, strategy_name: str) -> Dict:
+    """ Backtest one strategy in a worker process and return its summary metrics """
+    from freqtrade.enums.runmode import RunMode
+    from freqtrade.optimize.backtesting import Backtesting
+
+    if config["exchange"]["name"] == "mock":
+        from trading_system.freqtrade_system.freqtrade_mock import register_mock_exchange
+        register_mock_exchange()
+
+    config = dict(config, runmode=RunMode.BACKTEST, strategy=strategy_name, export="none")
+    t0 = time.perf_counter()
+    backtesting = Backtesting(config)
+    backtesting.start()
+
+    stats = backtesting.results["strategy"][strategy_name]
+    metrics = {key: stats.get(key) for key in LEADERBOARD_COLUMNS}
+    metrics["winrate"] = stats.get("wins", 0) / stats["total_trades"] if stats.get("total_trades") else 0.0
+    metrics["backtest_seconds"] = round(time.perf_counter() - t0, 2)
+    return metrics
+
+
+class StrategyBatch:
+    """
+    Generate many strategies and backtest them, ranked in a leaderboard.
+
+    LLM generations run concurrently on the event loop, each finished strategy is backtested right away
+    in a process pool while the other generations are still in flight.
+    """
+
+    def __init__(
+            self,
+            fc: FreqtradeCommands,
+            max_concurrent_llm: int = 4,
+            max_workers: Optional[int] = None,
+            rank_by: str = "sharpe",
+            max_repairs: int = 2,
+    ):
+        """
+        @param fc: configured FreqtradeCommands, its data must be downloaded
+        @param max_concurrent_llm: LLM requests in flight
+        @param max_workers: backtest processes, default: cpu count
+        @param rank_by: leaderboard metric, higher is better
+        @param max_repairs: LLM attempts to fix a strategy failing the preflight check
+        """
+        self.fc = fc
+        self.max_concurrent_llm = max_concurrent_llm
+        self.max_workers = max_workers
+        self.rank_by = rank_by
+        self.max_repairs = max_repairs
+
+    def _strategy_file(self, class_name: str) -> Path:
+        return Path(self.fc.user_data_dir, "strategies", f"{camel_to_underscore(class_name)}.py")
+
+    def _reject(self, class_name: str) -> None:
+        """ Move a failed strategy out of the strategy path, later scans would import it again """
+        strategy_file = self._strategy_file(class_name)
+        if strategy_file.exists():
+            rejected_dir = strategy_file.parent / REJECTED_DIR
+            rejected_dir.mkdir(exist_ok=True)
+            shutil.move(str(strategy_file), str(rejected_dir / strategy_file.name))
+
+    async def _generate(self, semaphore: asyncio.Semaphore, description: str, class_name: str) -> bool:
+        async with semaphore:
+            prompt = StrategyCreationTool._strategy_prompt(description, class_name)
+            strategy_content = await llm_chatgpt.apredict(prompt)
+        await run_blocking(StrategyCreationTool._save_strategy, description, strategy_content, class_name)
+        strategy_file = self._strategy_file(class_name)
+        if strategy_file.exists():
+            # Convert the legacy buy / sell interface to the current one, as StrategyBacktestTool does
+            await run_blocking(self.fc.update_strategy_file, strategy_file)
+        return strategy_file.exists()
+
+    async def _run_one(self, semaphore, pool, config: dict, description: str, class_name: str) -> Dict:
+        loop = asyncio.get_running_loop()
+        row = {"strategy": class_name, "description": description[:80], "error": ""}
+        t0 = time.perf_counter()
+        try:
+            if not await self._generate(semaphore, description, class_name):
+                row["error"] = "No Python code found."
+                return row
+            # a broken strategy is rejected in a fraction of a second instead of occupying a backtest worker
+            report = await StrategyCreationTool.arepair_strategy(description, class_name, self.max_repairs, semaphore)
+            row["generate_seconds"] = round(time.perf_counter() - t0, 2)
+            if report.stage == "sandbox":
+                # the worker did not start, the backtest still checks the strategy
+                print_red(f"{class_name}: {report.error}")
+            elif not report.ok:
+                row["error"] = f"preflight {report.stage}: {report.error}"
+                return row
+            print_red(f"{class_name} created, backtesting...")
+            row.update(await loop.run_in_executor(pool, backtest_strategy, config, class_name))
+        except Exception as e:
+            row["error"] = f"{type(e).__name__}: {e}"
+        finally:
+            if row["error"]:
+                self._reject(class_name)
+        return row
+
+    async def arun(self, descriptions: List[str]) -> pd.DataFrame:
+        config = self.fc.get_config()
+        class_names = next_strategy_names(config["strategy_path"], len(descriptions))
+        semaphore = asyncio.Semaphore(self.max_concurrent_llm)
+
+        # the StrategyCreationTool helpers read the global fc
+        global_fc, FreqtradeBaseTool.fc = FreqtradeBaseTool.fc, self.fc
+        try:
+            with ProcessPoolExecutor(max_workers=self.max_workers) as pool:
+                rows = await asyncio.gather(*[
+                    self._run_one(semaphore, pool, config, description, class_name)
+                    for description, class_name in zip(descriptions, class_names)
+                ])
+        finally:
+            FreqtradeBaseTool.fc = global_fc
+
+        df = pd.DataFrame(rows)
+        if self.rank_by in df:
+            df = df.sort_values(self.rank_by, ascending=False, na_position="last")
+        df = df.reset_index(drop=True)
+        df.index += 1
+
+        leaderboard_file = Path(config["exportfilename"], "leaderboard.csv")
+        leaderboard_file.parent.mkdir(parents=True, exist_ok=True)
+        df.to_csv(leaderboard_file, index_label="rank")
+        print(f"Leaderboard of {len(df)} strategies saved to {leaderboard_file}")
+        return df
+
+    def run(self, descriptions: List[str]) -> pd.DataFrame:
+        return asyncio.run(self.arun(descriptions))
@@ -1,4 +1,7 @@
+import time
 import logging
+import threading
+from copy import deepcopy
 from pathlib import Path
 from typing import List, Dict, Union
 from datetime import datetime, timedelta
@@ -7,6 +10,15 @@ import json
 
 import pandas as pd
 
+from trading_system.freqtrade_system.freqtrade_inventory import DataInventory
+
+
+# the strategy updater shares one backup folder, it runs on one file at a time
+_strategy_update_lock = threading.Lock()
+# private attributes of freqtrade's Exchange written by `FreqtradeCommands._set_markets`,
+# checked first so that a freqtrade upgrade renaming them fails loudly
+EXCHANGE_MARKET_ATTRS = ("_api", "_api_async", "_markets", "_last_markets_refresh")
+
 
 class FreqtradeCommands:
     def __init__(
@@ -21,10 +33,13 @@ class FreqtradeCommands:
             dry_run: bool = True,
             add_timeframes: str = "",
             show_logs: bool = True,
+            data_format: str = "feather",
+            markets_ttl: int = 24 * 3600,
+            convert_data: bool = True,
     ):
         """
         @param user_data_dir: "user_data"
-        @param exchange: eg: "binance"
+        @param exchange: eg: "binance", or "mock" for an offline exchange with synthetic data
         @param pairs: eg: "BTC/USDT:USDT, ETH/USDT:USDT"
         @param trading_mode: eg: "futures"
         @param timeframe: eg: "5m"
@@ -32,6 +47,10 @@ class FreqtradeCommands:
         @param dry_run: eg: True
         @param add_timeframes: "15m, 30m"
         @param show_logs: output logs
+        @param data_format: storage format of OHLCV and trades data, eg: "feather", "parquet", "json"
+        @param markets_ttl: seconds before the markets cached on disk are refreshed
+        @param convert_data: convert existing json data to `data_format` in place in `init_config`,
+            the json files are kept, so older tools can still read them
         """
         self.user_data_dir = user_data_dir if user_data_dir else "user_data"
         self.exchange = exchange
@@ -41,14 +60,38 @@ class FreqtradeCommands:
         self.timerange = timerange
         self.dry_run = dry_run
         self.add_timeframes = [i.strip() for i in add_timeframes.split(",")] if add_timeframes else []
+        self.data_format = data_format
+        self.convert_data = convert_data
+
+        # memoized configuration, see `get_config`
+        self._config_cache = None
+        self._config_mtime = None
+        self.config_timings = {"resolve_count": 0, "resolve_seconds": 0.0, "copy_seconds": 0.0, "hits": 0}
+
+        # exchange session shared by all commands, see `get_exchange`
+        self.markets_ttl = markets_ttl
+        self._exchange = None
+        self._markets_lock = threading.Lock()
+        self._markets_thread = None
+
+        # data load and per strategy compute time of the last `start_backtesting_multi`
+        self.backtest_timings = {}
+
+        if self.exchange == "mock":
+            # offline exchange with synthetic data, see freqtrade_mock.py
+            from trading_system.freqtrade_system.freqtrade_mock import register_mock_exchange
+            register_mock_exchange()
 
         if show_logs:
             from freqtrade.main import setup_logging_pre
             setup_logging_pre()
 
     def init_config(self):
+        self.invalidate_config()
         self.start_create_userdir()
         self.start_new_config()
+        if self.convert_data:
+            self.start_convert_data()
 
     def start_create_userdir(self, reset=False) -> None:
         """
@@ -103,8 +146,8 @@ class FreqtradeCommands:
                 config["timeframes"].append(config["timeframe"])
 
             # default params
-            config["dataformat_ohlcv"] = "json"
-            config["dataformat_trades"] = "json"
+            config["dataformat_ohlcv"] = self.data_format
+            config["dataformat_trades"] = self.data_format
             config["pairlists"] = [{"method": "StaticPairList"}]
             config["db_url"] = f"sqlite:///{self.user_data_dir}/tradesv3.dryrun.sqlite" if self.dry_run else f"sqlite:///{self.user_data_dir}/tradesv3.sqlite"
 
@@ -116,23 +159,127 @@ class FreqtradeCommands:
 
         with open(f"{self.user_data_dir}/config.json", "w") as f:
             json.dump(config, f, indent=4)
+        self.invalidate_config()
 
-    def get_config(self):
-        """  """
+    def get_config(self, **overrides) -> dict:
+        """
+        Resolved configuration, memoized until config.json changes or `init_config` is called.
+        Every call returns a private copy, so per command changes never leak into the cache.
+        @param overrides: per command values, eg: runmode=RunMode.BACKTEST, strategy="MyStrategy"
+        """
         from freqtrade.configuration.configuration import Configuration
         from freqtrade.enums.runmode import RunMode
 
-        config_files = {"config": [f"{self.user_data_dir}/config.json",]}
-        configuration = Configuration(config_files, RunMode.UTIL_EXCHANGE)
-        config = configuration.get_config()
+        config_file = Path(self.user_data_dir, "config.json")
+        mtime = config_file.stat().st_mtime_ns
+        if self._config_cache is None or self._config_mtime != mtime:
+            t0 = time.perf_counter()
+            config_files = {"config": [str(config_file), ]}
+            configuration = Configuration(config_files, RunMode.UTIL_EXCHANGE)
+            config = configuration.get_config()
+
+            # path params
+            config["user_data_dir"] = Path(config["user_data_dir"])
+            config["strategy_path"] = Path(config["strategy_path"])
+            config["datadir"] = Path(config["datadir"])
+            config["exportfilename"] = Path(config["exportfilename"])
+
+            self._config_cache = config
+            self._config_mtime = mtime
+            self.config_timings["resolve_count"] += 1
+            self.config_timings["resolve_seconds"] = time.perf_counter() - t0
+        else:
+            self.config_timings["hits"] += 1
+
+        # freqtrade modifies nested sections (eg: config["exchange"]), so hand out a deep copy
+        t0 = time.perf_counter()
+        config = deepcopy(self._config_cache)
+        config.update(overrides)
+        self.config_timings["copy_seconds"] = time.perf_counter() - t0
+        return config
+
+    def invalidate_config(self) -> None:
+        """ Drop the memoized configuration """
+        self._config_cache = None
+        self._config_mtime = None
+        # the exchange session was built from the old configuration
+        self._exchange = None
+
+    def get_exchange(self):
+        """
+        Exchange session shared by all commands, created on first use.
+        Markets are served from a disk cache, a stale cache is refreshed in the background and swapped in at once.
+        """
+        if self._exchange is not None:
+            return self._exchange
+
+        from freqtrade.resolvers.exchange_resolver import ExchangeResolver
+
+        config = self.get_config()
+        # Remove stake-currency to skip checks which are not relevant for listing and downloading
+        config['stake_currency'] = ''
+        exchange = ExchangeResolver.load_exchange(config, validate=False)
+
+        cache_file = self._markets_cache_file()
+        cached = None
+        if cache_file.exists():
+            try:
+                cached = json.loads(cache_file.read_text())
+            except ValueError:
+                cached = None
+
+        if cached and cached.get("markets"):
+            self._set_markets(exchange, cached["markets"])
+            if time.time() - cached.get("timestamp", 0) > self.markets_ttl:
+                self._markets_thread = threading.Thread(
+                    target=self._refresh_markets, args=(exchange,), daemon=True)
+                self._markets_thread.start()
+        else:
+            # first use: load synchronously
+            self._save_markets(exchange.markets)
 
-        # path params
-        config["user_data_dir"] = Path(config["user_data_dir"])
-        config["strategy_path"] = Path(config["strategy_path"])
-        config["datadir"] = Path(config["datadir"])
-        config["exportfilename"] = Path(config["exportfilename"])
+        self._exchange = exchange
+        return exchange
 
-        return config.copy()
+    def _markets_cache_file(self) -> Path:
+        return Path(self.user_data_dir, "markets", f"{self.exchange}_{self.trading_mode}.json")
+
+    def _set_markets(self, exchange, markets: Union[dict, list]) -> None:
+        """
+        The only writer of the markets of a freqtrade Exchange.
+        `markets` is fully built beforehand, every attribute is then replaced by one reference assignment,
+        so readers see either the old or the new markets.
+        """
+        from freqtrade.util.datetime_helpers import dt_ts
+
+        missing = [attr for attr in EXCHANGE_MARKET_ATTRS if not hasattr(exchange, attr)]
+        if missing:
+            raise AttributeError(f"freqtrade Exchange has no {missing}, FreqtradeCommands._set_markets needs an update")
+        with self._markets_lock:
+            exchange._api.set_markets(markets)
+            exchange._api_async.set_markets(markets)
+            exchange._markets = exchange._api.markets
+            exchange._last_markets_refresh = dt_ts()
+
+    def _save_markets(self, markets: dict) -> None:
+        cache_file = self._markets_cache_file()
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = cache_file.with_suffix(".tmp")
+        tmp_file.write_text(json.dumps({"timestamp": time.time(), "markets": markets}, default=str))
+        tmp_file.replace(cache_file)
+
+    def _refresh_markets(self, exchange) -> None:
+        """
+        Background refresh: the markets are fetched without touching the session, then swapped in.
+        The stale markets are kept on failure.
+        """
+        try:
+            markets = exchange._api.fetch_markets()
+            self._set_markets(exchange, markets)
+            self._save_markets(exchange.markets)
+            logging.info(f"Markets of {exchange.name} refreshed in the background.")
+        except Exception as e:
+            logging.warning(f"Could not refresh markets of {exchange.name}: {e}")
 
     def start_new_strategy(self, strategy_name: str, subtemplate: str = "full") -> None:
         """
@@ -183,8 +330,10 @@ class FreqtradeCommands:
         logger.info(f"Writing strategy to `{strategy_path}`.")
         strategy_path.write_text(strategy_text)
 
-    def start_download_data(self) -> None:
-        """ """
+    def start_download_data(self, max_workers: int = 8) -> None:
+        """
+        @param max_workers: concurrent OHLCV downloads on the exchange
+        """
         from freqtrade.data.history.history_utils import (
             TimeRange,
             logger,
@@ -192,8 +341,8 @@ class FreqtradeCommands:
             refresh_backtest_trades_data,
             convert_trades_to_ohlcv,
             migrate_binance_futures_data,
-            refresh_backtest_ohlcv_data
         )
+        from trading_system.freqtrade_system.freqtrade_download import ConcurrentDownloader
 
         config = self.get_config()
 
@@ -213,8 +362,7 @@ class FreqtradeCommands:
         pairs_not_available: List[str] = []
 
         # Init exchange
-        from freqtrade.resolvers.exchange_resolver import ExchangeResolver
-        exchange = ExchangeResolver.load_exchange(config, validate=False)
+        exchange = self.get_exchange()
         available_pairs = [
             p for p in exchange.get_markets(
                 tradable_only=True, active_only=not config.get('include_inactive')
@@ -260,96 +408,128 @@ class FreqtradeCommands:
                     return
                 migrate_binance_futures_data(config)
 
-                pairs_not_available = refresh_backtest_ohlcv_data(
-                    exchange, pairs=expanded_pairs, timeframes=config['timeframes'],
-                    datadir=config['datadir'], timerange=timerange,
-                    new_pairs_days=config['new_pairs_days'],
-                    erase=bool(config.get('erase')), data_format=config['dataformat_ohlcv'],
-                    trading_mode=config.get('trading_mode', 'spot'),
-                    prepend=config.get('prepend_data', False)
+                downloader = ConcurrentDownloader(
+                    exchange, datadir=config['datadir'], data_format=config['dataformat_ohlcv'],
+                    trading_mode=config.get('trading_mode', 'spot'), timerange=timerange,
+                    new_pairs_days=config['new_pairs_days'] or 30,
+                    erase=bool(config.get('erase')), prepend=config.get('prepend_data', False),
+                    max_workers=max_workers,
                 )
+                pairs_not_available = downloader.run(expanded_pairs, config['timeframes'])
         finally:
             if pairs_not_available:
                 logger.info(f"Pairs [{','.join(pairs_not_available)}] not available "
                             f"on exchange {exchange.name}.")
 
-    def start_list_data(self, show_timerange: bool = True, return_df: bool = False):
+    def start_convert_data(self, convert_from: str = "json", convert_to: str = "", erase: bool = False) -> None:
         """
-        List available backtest data
+        Convert the existing OHLCV and trades data in `datadir` to another format in place
+        @param convert_from: format of the existing files
+        @param convert_to: target format, default: config["dataformat_ohlcv"]
+        @param erase: remove the source files after conversion
         """
+        from freqtrade.data.converter import convert_ohlcv_format, convert_trades_format
+        from freqtrade.data.history.idatahandler import get_datahandler, get_datahandlerclass
         from freqtrade.enums import TradingMode
-        from freqtrade.commands.data_commands import timeframe_to_minutes, DATETIME_PRINT_FORMAT
 
-        from tabulate import tabulate
+        config = self.get_config()
+        convert_to = convert_to or config["dataformat_ohlcv"]
+        if convert_from == convert_to or not config["datadir"].exists():
+            return
+        # 没有源格式的文件时不做任何处理
+        extension = get_datahandlerclass(convert_from)._get_file_extension()
+        if next(config["datadir"].rglob(f"*.{extension}"), None) is None:
+            return
 
-        from freqtrade.data.history.idatahandler import get_datahandler
+        src = get_datahandler(config["datadir"], convert_from)
+        paircombs = src.ohlcv_get_available_data(config["datadir"], TradingMode.SPOT)
+        paircombs.extend(src.ohlcv_get_available_data(config["datadir"], TradingMode.FUTURES))
+        trade_pairs = src.trades_get_pairs(config["datadir"])
+        if not paircombs and not trade_pairs:
+            return
 
-        config = self.get_config()
-        config["show_timerange"] = show_timerange
+        logging.info(f"Converting {len(paircombs)} {convert_from} datasets to {convert_to}...")
+        if paircombs:
+            config["pairs"] = sorted({pair for pair, _, _ in paircombs})
+            config["timeframes"] = sorted({timeframe for _, timeframe, _ in paircombs})
+            convert_ohlcv_format(config, convert_from=convert_from, convert_to=convert_to, erase=erase)
+        if trade_pairs:
+            config["pairs"] = trade_pairs
+            convert_trades_format(config, convert_from=convert_from, convert_to=convert_to, erase=erase)
 
-        dhc = get_datahandler(config['datadir'], config['dataformat_ohlcv'])
+    def start_benchmark_dataformats(self, formats: str = "json, jsongz, hdf5, feather, parquet") -> pd.DataFrame:
+        """
+        Compare load time and disk usage per pair / timeframe of the downloaded data across formats
+        @param formats: formats to compare, separated by `,`
+        """
+        from trading_system.benchmarks.dataformat_benchmark import benchmark_dataformats, summarize
 
-        paircombs = dhc.ohlcv_get_available_data(
-            config['datadir'],
-            config.get('trading_mode', TradingMode.SPOT)
+        config = self.get_config()
+        df = benchmark_dataformats(
+            config["datadir"],
+            trading_mode=config.get("trading_mode", "spot"),
+            source_format=config["dataformat_ohlcv"],
+            formats=[i.strip() for i in formats.split(",")],
         )
+        if df.empty:
+            print("No downloaded data to benchmark, please download data first. ")
+            return df
+        print(df.to_string(index=False))
+        print(summarize(df))
+        return df
+
+    def get_data_inventory(self) -> DataInventory:
+        """ Typed inventory of the downloaded data of the configured pairs """
+        from freqtrade.enums import TradingMode
+
+        config = self.get_config()
+        inventory = DataInventory(
+            config['datadir'], config['dataformat_ohlcv'], config.get('trading_mode', TradingMode.SPOT))
+        inventory.refresh(config["pairs"] if config["pairs"] else None)
+        return inventory
+
+    def start_list_data(self, show_timerange: bool = True, return_df: bool = False):
+        """
+        List available backtest data
+        """
+        from freqtrade.commands.data_commands import DATETIME_PRINT_FORMAT
+
+        from tabulate import tabulate
 
-        if config["pairs"]:
-            paircombs = [comb for comb in paircombs if comb[0] in config["pairs"]]
+        inventory = self.get_data_inventory()
+        records = inventory.records
 
-        print(f"Found {len(paircombs)} pair / timeframe combinations.")
-        result = ""
-        if not config.get('show_timerange'):
+        print(f"Found {len(records)} pair / timeframe combinations.")
+        if not show_timerange:
             groupedpair = defaultdict(list)
-            for pair, timeframe, candle_type in sorted(
-                    paircombs,
-                    key=lambda x: (x[0], timeframe_to_minutes(x[1]), x[2])
-            ):
-                groupedpair[(pair, candle_type)].append(timeframe)
+            for record in records:
+                groupedpair[(record.pair, record.candle_type)].append(record.timeframe)
 
             if groupedpair:
-                result = tabulate([
+                print(tabulate([
                     (pair, ', '.join(timeframes), candle_type)
                     for (pair, candle_type), timeframes in groupedpair.items()
                 ],
                     headers=("Pair", "Timeframe", "Type"),
-                    tablefmt='psql', stralign='right')
-                print(result)
+                    tablefmt='psql', stralign='right'))
         else:
-            paircombs1 = [(
-                pair, timeframe, candle_type,
-                *dhc.ohlcv_data_min_max(pair, timeframe, candle_type)
-            ) for pair, timeframe, candle_type in paircombs]
-
-            result = tabulate([
-                (pair, timeframe, candle_type,
-                 start.strftime(DATETIME_PRINT_FORMAT),
-                 end.strftime(DATETIME_PRINT_FORMAT))
-                for pair, timeframe, candle_type, start, end in sorted(
-                    paircombs1,
-                    key=lambda x: (x[0], timeframe_to_minutes(x[1]), x[2]))
+            print(tabulate([
+                (r.pair, r.timeframe, r.candle_type,
+                 r.start.strftime(DATETIME_PRINT_FORMAT),
+                 r.end.strftime(DATETIME_PRINT_FORMAT),
+                 r.rows)
+                for r in records
             ],
-                headers=("Pair", "Timeframe", "Type", 'From', 'To'),
-                tablefmt='psql', stralign='right')
-
-            print(result)
-
-        items = []
-        result_list = result.split("\n")
-        if len(result_list) > 4:
-            for row in result.split("\n")[3:-1]:
-                item = {}
-                item["Pair"], item["Timeframe"], item["Type"], item["From"], item["To"] = \
-                    [i.strip() for i in row.split("|")[1:-1]]
-                items.append(item)
+                headers=("Pair", "Timeframe", "Type", 'From', 'To', 'Rows'),
+                tablefmt='psql', stralign='right'))
 
         if return_df:
-            df = pd.DataFrame(items)
-            return df
+            return inventory.to_dataframe()
 
-    def start_backtesting(self, strategy_name: str) -> None:
+    def start_backtesting(self, strategy_name: str) -> dict:
         """
         @param strategy_name:
+        @return: backtest statistics, see `freqtrade.optimize.optimize_reports.generate_backtest_stats`
         """
         # Import here to avoid loading backtesting module when it's not used
         from freqtrade.optimize.backtesting import Backtesting
@@ -357,15 +537,83 @@ class FreqtradeCommands:
         from freqtrade.commands.optimize_commands import logger
 
         # Initialize configuration
-        config = self.get_config()
-        config["runmode"] = RunMode.BACKTEST
-        config["strategy"] = strategy_name
+        config = self.get_config(runmode=RunMode.BACKTEST, strategy=strategy_name)
 
         logger.info('Starting freqtrade in Backtesting mode')
 
         # Initialize backtesting object
         backtesting = Backtesting(config)
         backtesting.start()
+        return backtesting.results
+
+    def start_backtesting_multi(self, strategy_names: List[str]) -> dict:
+        """
+        Backtest several strategies on data loaded once, and compare them in one report.
+        Data load time and the indicator / simulation time of every strategy are kept in `backtest_timings`.
+        @param strategy_names: eg: ["AutoStrategy001", "AutoStrategy002"]
+        @return: backtest statistics of all strategies, see `start_backtesting`
+        """
+        from freqtrade.optimize.backtesting import Backtesting
+        from freqtrade.enums.runmode import RunMode
+        from freqtrade.commands.optimize_commands import logger
+        from tabulate import tabulate
+
+        if not strategy_names:
+            print("No strategy to backtest. ")
+            return {}
+
+        config = self.get_config(runmode=RunMode.BACKTEST, strategy=strategy_names[0], strategy_list=strategy_names)
+        logger.info('Starting freqtrade in Backtesting mode')
+
+        t0 = time.perf_counter()
+        backtesting = Backtesting(config)
+        timings = {"load_strategies": time.perf_counter() - t0, "load_data": 0.0, "rows": 0,
+                   "strategies": {name: {"indicators": 0.0, "backtest": 0.0, "cached": True}
+                                  for name in strategy_names}}
+
+        # Backtesting.start loads the data once for the whole strategy_list, only its steps are timed
+        load_bt_data = backtesting.load_bt_data
+
+        def timed_load_bt_data():
+            t = time.perf_counter()
+            data, timerange = load_bt_data()
+            timings["load_data"] = time.perf_counter() - t
+            timings["rows"] = sum(len(df) for df in data.values())
+            return data, timerange
+
+        backtest_one_strategy = backtesting.backtest_one_strategy
+
+        def timed_backtest_one_strategy(strat, data, timerange):
+            strategy_timings = timings["strategies"].setdefault(strat.get_strategy_name(), {"indicators": 0.0})
+            strategy_timings["cached"] = False
+            advise_all_indicators = strat.advise_all_indicators
+
+            def timed_advise_all_indicators(pair_data):
+                t = time.perf_counter()
+                result = advise_all_indicators(pair_data)
+                strategy_timings["indicators"] = time.perf_counter() - t
+                return result
+
+            strat.advise_all_indicators = timed_advise_all_indicators
+            t = time.perf_counter()
+            try:
+                return backtest_one_strategy(strat, data, timerange)
+            finally:
+                strat.advise_all_indicators = advise_all_indicators
+                strategy_timings["backtest"] = time.perf_counter() - t - strategy_timings["indicators"]
+
+        backtesting.load_bt_data = timed_load_bt_data
+        backtesting.backtest_one_strategy = timed_backtest_one_strategy
+        backtesting.start()
+
+        self.backtest_timings = timings
+        print(f"Data load: {timings['load_data']:.3f}s ({timings['rows']} rows), "
+              f"strategy load: {timings['load_strategies']:.3f}s")
+        print(tabulate([
+            (name, f"{t['indicators']:.3f}", f"{t['backtest']:.3f}", "yes" if t["cached"] else "")
+            for name, t in timings["strategies"].items()
+        ], headers=("Strategy", "Indicators (s)", "Backtest (s)", "Cached"), tablefmt='psql', stralign='right'))
+        return backtesting.results or {}
 
     def start_backtesting_show(self) -> None:
         """
@@ -396,14 +644,14 @@ class FreqtradeCommands:
         from freqtrade.enums.runmode import RunMode
 
         # Initialize configuration
-        config = self.get_config()
-        config["runmode"] = RunMode.HYPEROPT
-        config["strategy"] = strategy_name
-
-        config["epochs"] = epochs
-        config["hyperopt_loss"] = "SharpeHyperOptLoss"
-        config["spaces"] = "default"
-        config["hyperopt_min_trades"] = 1
+        config = self.get_config(
+            runmode=RunMode.HYPEROPT,
+            strategy=strategy_name,
+            epochs=epochs,
+            hyperopt_loss="SharpeHyperOptLoss",
+            spaces="default",
+            hyperopt_min_trades=1,
+        )
 
         logger.info('Starting freqtrade in Hyperopt mode')
 
@@ -575,7 +823,6 @@ class FreqtradeCommands:
         """
         from freqtrade.commands.list_commands import (
             RunMode,
-            ExchangeResolver,
             plural,
             market_is_active,
             logger,
@@ -600,7 +847,7 @@ class FreqtradeCommands:
         spot_only = config["trading_mode"] == "spot"
 
         # Init exchange
-        exchange = ExchangeResolver.load_exchange(config, validate=False)
+        exchange = self.get_exchange()
 
         # By default only active pairs/markets are to be shown
         active_only = not config["list_pairs_all"]
@@ -711,13 +958,12 @@ class FreqtradeCommands:
         """
         Print timeframes available on Exchange
         """
-        from freqtrade.commands.list_commands import ExchangeResolver
         config = self.get_config()
         # Do not use timeframe set in the config
         config['timeframe'] = None
         config["print_one_column"] = False
         # Init exchange
-        exchange = ExchangeResolver.load_exchange(config, validate=False)
+        exchange = self.get_exchange()
 
         if config['print_one_column']:
             print('\n'.join(exchange.timeframes))
@@ -828,6 +1074,19 @@ class FreqtradeCommands:
                 processed_locations.add(strategy_obj['location'])
                 start_conversion(strategy_obj, config)
 
+    def update_strategy_file(self, strategy_file: Union[str, Path]) -> None:
+        """
+        Run the strategy updater on one file, unlike `start_strategy_update` the strategy directory is not imported,
+        so files still being written by other threads are left alone
+        """
+        from freqtrade.strategy.strategyupdater import StrategyUpdater
+
+        config = self.get_config()
+        strategy_file = Path(strategy_file)
+        strategy_obj = {"location": strategy_file, "location_rel": strategy_file.name}
+        with _strategy_update_lock:
+            StrategyUpdater().start(config, strategy_obj)
+
     def start_list_freqAI_models(self) -> None:
         """
         Print files with FreqAI models custom classes available in the directory
@@ -898,13 +1157,11 @@ class FreqtradeCommands:
         """ Download data and verify parameters """
         self.start_download_data()
         config = self.get_config()
-        df_data = self.start_list_data(return_df=True)
+        inventory = self.get_data_inventory()
         print("Downloading data and verifying parameters...")
-        for pair in config["pairs"]:
-            df_temp = df_data.query(f"Pair == '{pair}' and Timeframe == '{config['timeframe']}' and Type == '{config['trading_mode']}'")
-            if df_temp.empty:
-                print(f"{pair} download failed, please check the parameters.")
-                return False
+        for pair in inventory.missing(config["pairs"], config['timeframe'], config['trading_mode']):
+            print(f"{pair} download failed, please check the parameters.")
+            return False
 
         return True
 
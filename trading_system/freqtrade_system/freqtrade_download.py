@@ -0,0 +1,171 @@
+import os
+import time
+import asyncio
+import logging
+from pathlib import Path
+from datetime import datetime, timedelta
+from typing import List, Tuple, Optional
+
+from pandas import DataFrame, concat
+
+
+logger = logging.getLogger(__name__)
+
+
+class ConcurrentDownloader:
+    """
+    Download OHLCV data of many (pair, timeframe, candle_type) combinations concurrently.
+
+    All requests run as coroutines on the exchange's own event loop, bounded by `max_workers`,
+    so the ccxt rate limiter of the exchange throttles every request.
+    Each dataset is extended from the last stored candle and replaced atomically,
+    an interrupted download resumes where it stopped.
+    """
+
+    def __init__(
+            self,
+            exchange,
+            datadir: Path,
+            data_format: str,
+            trading_mode: str,
+            timerange=None,
+            new_pairs_days: int = 30,
+            erase: bool = False,
+            prepend: bool = False,
+            max_workers: int = 8,
+            retries: int = 3,
+            backoff: float = 2.0,
+    ):
+        """
+        @param exchange: freqtrade Exchange
+        @param max_workers: concurrent downloads on the exchange
+        @param retries: retries of a failed download
+        @param backoff: the n-th retry waits backoff ** n seconds
+        """
+        from freqtrade.data.history.idatahandler import get_datahandler
+
+        self.exchange = exchange
+        self.datadir = Path(datadir)
+        self.data_format = data_format
+        self.trading_mode = trading_mode
+        self.timerange = timerange
+        self.new_pairs_days = new_pairs_days
+        self.erase = erase
+        self.prepend = prepend
+        self.max_workers = max_workers
+        self.retries = retries
+        self.backoff = backoff
+
+        self.data_handler = get_datahandler(self.datadir, data_format)
+        self.tmp_dir = self.datadir / ".download_tmp"
+        self.tmp_handler = get_datahandler(self.tmp_dir, data_format)
+
+        self.total = 0
+        self.done = 0
+        self.failed: List[Tuple] = []
+        self.start_time = 0.0
+
+    def build_tasks(self, pairs: List[str], timeframes: List[str]) -> Tuple[List[Tuple], List[str]]:
+        """ (pair, timeframe, candle_type) to download and the pairs missing on the exchange """
+        from freqtrade.enums import CandleType
+
+        tasks = []
+        pairs_not_available = []
+        candle_type = CandleType.get_default(self.trading_mode)
+        for pair in pairs:
+            if pair not in self.exchange.markets:
+                pairs_not_available.append(pair)
+                logger.info(f"Skipping pair {pair}...")
+                continue
+            for timeframe in timeframes:
+                tasks.append((pair, str(timeframe), candle_type))
+            if self.trading_mode == "futures":
+                # Funding rate and mark candles are necessary to backtest futures
+                tf_mark = self.exchange.get_option("mark_ohlcv_timeframe")
+                fr_candle_type = CandleType.from_string(self.exchange.get_option("mark_ohlcv_price"))
+                for funding_candle_type in (CandleType.FUNDING_RATE, fr_candle_type):
+                    tasks.append((pair, str(tf_mark), funding_candle_type))
+        return tasks, pairs_not_available
+
+    def run(self, pairs: List[str], timeframes: List[str]) -> List[str]:
+        """
+        Download all pairs / timeframes
+        @return: pairs not available on the exchange
+        """
+        tasks, pairs_not_available = self.build_tasks(pairs, timeframes)
+        self.total = len(tasks)
+        self.done = 0
+        self.failed = []
+        self.start_time = time.perf_counter()
+
+        self.exchange.loop.run_until_complete(self._run_all(tasks))
+
+        logger.info(f"Downloaded {self.total - len(self.failed)}/{self.total} datasets "
+                    f"in {time.perf_counter() - self.start_time:.1f}s.")
+        if self.failed:
+            logger.warning(f"Failed downloads: {self.failed}")
+        return pairs_not_available
+
+    async def _run_all(self, tasks: List[Tuple]) -> None:
+        semaphore = asyncio.Semaphore(self.max_workers)
+
+        async def bounded(task):
+            async with semaphore:
+                await self._download(*task)
+
+        await asyncio.gather(*[bounded(task) for task in tasks])
+
+    async def _download(self, pair: str, timeframe: str, candle_type) -> None:
+        from freqtrade.data.history.history_utils import _load_cached_data_for_updating
+        from freqtrade.data.converter import ohlcv_to_dataframe, clean_ohlcv_dataframe
+
+        loop = asyncio.get_running_loop()
+        if self.erase:
+            self.data_handler.ohlcv_purge(pair, timeframe, candle_type=candle_type)
+        data, since_ms, until_ms = await loop.run_in_executor(
+            None, lambda: _load_cached_data_for_updating(
+                pair, timeframe, self.timerange, data_handler=self.data_handler,
+                candle_type=candle_type, prepend=self.prepend)
+        )
+        if not since_ms:
+            since_ms = int((datetime.now() - timedelta(days=self.new_pairs_days)).timestamp()) * 1000
+
+        new_data = None
+        for attempt in range(self.retries + 1):
+            try:
+                _, _, _, new_data, _ = await self.exchange._async_get_historic_ohlcv(
+                    pair, timeframe, since_ms=since_ms, candle_type=candle_type,
+                    is_new_pair=data.empty, raise_=True, until_ms=until_ms
+                )
+                break
+            except Exception as e:
+                if attempt == self.retries:
+                    logger.warning(f"Failed to download {pair}, {timeframe}, {candle_type}: {e}")
+                    self.failed.append((pair, timeframe, str(candle_type)))
+                    self._report(pair, timeframe, candle_type, 0)
+                    return
+                await asyncio.sleep(self.backoff ** attempt)
+
+        new_dataframe = ohlcv_to_dataframe(new_data, timeframe, pair, fill_missing=False, drop_incomplete=True)
+        if data.empty:
+            data = new_dataframe
+        else:
+            data = clean_ohlcv_dataframe(concat([data, new_dataframe], axis=0), timeframe, pair,
+                                         fill_missing=False, drop_incomplete=False)
+        await loop.run_in_executor(None, self._store, pair, timeframe, candle_type, data)
+        self._report(pair, timeframe, candle_type, len(new_dataframe))
+
+    def _store(self, pair: str, timeframe: str, candle_type, data: DataFrame) -> None:
+        """ Write into a temporary file first, then replace the dataset in one step """
+        self.tmp_handler.ohlcv_store(pair, timeframe, data=data, candle_type=candle_type)
+        tmp_file = self.tmp_handler._pair_data_filename(self.tmp_dir, pair, timeframe, candle_type)
+        target_file = self.data_handler._pair_data_filename(self.datadir, pair, timeframe, candle_type)
+        target_file.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(tmp_file, target_file)
+
+    def _report(self, pair: str, timeframe: str, candle_type, new_candles: int) -> None:
+        self.done += 1
+        elapsed = time.perf_counter() - self.start_time
+        eta = elapsed / self.done * (self.total - self.done)
+        logger.info(f"[{self.done}/{self.total}] {pair}, {timeframe}, {candle_type}: "
+                    f"{new_candles} new candles, elapsed {elapsed:.1f}s, ETA {eta:.1f}s")
@@ -0,0 +1,166 @@
+import json
+from pathlib import Path
+from datetime import datetime
+from dataclasses import dataclass
+from typing import List, Dict, Iterable, Optional, Tuple
+
+import pandas as pd
+
+
+@dataclass(frozen=True)
+class DataRecord:
+    """ One downloaded OHLCV dataset """
+    pair: str
+    timeframe: str
+    candle_type: str
+    start: datetime
+    end: datetime
+    rows: int
+    file_size: int
+
+    @property
+    def key(self) -> Tuple[str, str, str]:
+        return self.pair, self.timeframe, self.candle_type
+
+
+class DataInventory:
+    """
+    Typed inventory of the OHLCV data in `datadir`.
+    Start, end and row count of each file are cached in a sidecar index keyed by mtime and size,
+    only new or changed files are read again.
+    """
+    SIDECAR = ".inventory.json"
+
+    def __init__(self, datadir: Path, data_format: str, trading_mode: str = "spot"):
+        from freqtrade.data.history.idatahandler import get_datahandler
+
+        self.datadir = Path(datadir)
+        self.data_format = data_format
+        self.trading_mode = trading_mode
+        self.data_handler = get_datahandler(self.datadir, data_format)
+        self._records: Dict[Tuple[str, str, str], DataRecord] = {}
+
+    def _read_sidecar(self) -> Dict:
+        path = self.datadir / self.SIDECAR
+        if not path.exists():
+            return {}
+        try:
+            return json.loads(path.read_text())
+        except ValueError:
+            return {}
+
+    def _write_sidecar(self, sidecar: Dict) -> None:
+        path = self.datadir / self.SIDECAR
+        tmp_path = path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(sidecar))
+        tmp_path.replace(path)
+
+    def _scan_file(self, filename: Path, pair: str, timeframe: str, candle_type) -> Tuple[str, str, int]:
+        """ (start, end, rows) read from the file metadata or only the date column when possible """
+        if self.data_format == "parquet":
+            import pyarrow.parquet as pq
+            metadata = pq.ParquetFile(filename).metadata
+            date_idx = metadata.schema.names.index("date")
+            stats = [metadata.row_group(i).column(date_idx).statistics for i in range(metadata.num_row_groups)]
+            if stats and all(s is not None and s.has_min_max for s in stats):
+                dates = pd.to_datetime(pd.Series([min(s.min for s in stats), max(s.max for s in stats)]), utc=True)
+                return dates[0].isoformat(), dates[1].isoformat(), metadata.num_rows
+            dates = pd.read_parquet(filename, columns=["date"])["date"]
+        elif self.data_format == "feather":
+            dates = pd.read_feather(filename, columns=["date"])["date"]
+        else:
+            dates = self.data_handler.ohlcv_load(
+                pair, timeframe, candle_type=candle_type, warn_no_data=False,
+                fill_missing=False, drop_incomplete=False)["date"]
+        if dates.empty:
+            return "", "", 0
+        dates = pd.to_datetime(dates, utc=True)
+        return dates.min().isoformat(), dates.max().isoformat(), len(dates)
+
+    def refresh(self, pairs: Optional[Iterable[str]] = None) -> List[DataRecord]:
+        """
+        Rescan `datadir`
+        @param pairs: only keep these pairs
+        """
+        paircombs = self.data_handler.ohlcv_get_available_data(self.datadir, self.trading_mode)
+        if pairs:
+            pairs = set(pairs)
+            paircombs = [comb for comb in paircombs if comb[0] in pairs]
+
+        sidecar = self._read_sidecar()
+        new_sidecar = {}
+        records = {}
+        for pair, timeframe, candle_type in paircombs:
+            filename = self.data_handler._pair_data_filename(self.datadir, pair, timeframe, candle_type)
+            if not filename.exists():
+                continue
+            stat = filename.stat()
+            name = str(filename.relative_to(self.datadir))
+            entry = sidecar.get(name)
+            if not entry or entry["mtime"] != stat.st_mtime_ns or entry["size"] != stat.st_size:
+                start, end, rows = self._scan_file(filename, pair, timeframe, candle_type)
+                entry = {"mtime": stat.st_mtime_ns, "size": stat.st_size, "start": start, "end": end, "rows": rows}
+            new_sidecar[name] = entry
+            if not entry["rows"]:
+                continue
+
+            record = DataRecord(
+                pair=pair,
+                timeframe=timeframe,
+                candle_type=getattr(candle_type, "value", str(candle_type)),
+                start=datetime.fromisoformat(entry["start"]),
+                end=datetime.fromisoformat(entry["end"]),
+                rows=entry["rows"],
+                file_size=entry["size"],
+            )
+            records[record.key] = record
+
+        if new_sidecar != sidecar and self.datadir.exists():
+            # 其他 trading_mode 的条目保留
+            self._write_sidecar({**sidecar, **new_sidecar})
+        self._records = records
+        return self.records
+
+    @property
+    def records(self) -> List[DataRecord]:
+        from freqtrade.exchange import timeframe_to_minutes
+        return sorted(self._records.values(), key=lambda r: (r.pair, timeframe_to_minutes(r.timeframe), r.candle_type))
+
+    def get(self, pair: str, timeframe: str, candle_type: str) -> Optional[DataRecord]:
+        return self._records.get((pair, timeframe, candle_type))
+
+    def missing(self, pairs: Iterable[str], timeframe: str, candle_type: str, timerange=None) -> List[str]:
+        """
+        Pairs without data of `timeframe` / `candle_type`, or whose data does not cover `timerange`
+        @param timerange: freqtrade TimeRange, the coverage of the dates is checked when given
+        """
+        missing = []
+        for pair in pairs:
+            record = self._records.get((pair, timeframe, candle_type))
+            if record is None:
+                missing.append(pair)
+            elif timerange is not None:
+                if timerange.starttype == "date" and record.start > timerange.startdt:
+                    missing.append(pair)
+                elif timerange.stoptype == "date" and record.end < timerange.stopdt:
+                    missing.append(pair)
+        return missing
+
+    def is_covered(self, pairs: Iterable[str], timeframe: str, candle_type: str, timerange=None) -> bool:
+        """ Whether every pair has data of `timeframe` / `candle_type` for `timerange` """
+        return not self.missing(pairs, timeframe, candle_type, timerange)
+
+    def to_dataframe(self) -> pd.DataFrame:
+        from freqtrade.constants import DATETIME_PRINT_FORMAT
+        return pd.DataFrame(
+            [{
+                "Pair": r.pair,
+                "Timeframe": r.timeframe,
+                "Type": r.candle_type,
+                "From": r.start.strftime(DATETIME_PRINT_FORMAT),
+                "To": r.end.strftime(DATETIME_PRINT_FORMAT),
+                "Rows": r.rows,
+                "Size": r.file_size,
+            } for r in self.records],
+            columns=["Pair", "Timeframe", "Type", "From", "To", "Rows", "Size"],
+        )
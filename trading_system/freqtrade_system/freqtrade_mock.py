@@ -0,0 +1,352 @@
+"""
+Offline stand-in for a ccxt exchange, selected with exchange="mock".
+
+Markets, timeframes, OHLCV, mark prices, funding rates and leverage tiers are synthetic
+but deterministic: a candle only depends on (pair, candle open time), so every download of the
+same range yields identical data and the download -> backtest -> hyperopt chain is reproducible
+without network access.
+"""
+import math
+import time
+import zlib
+from typing import Dict, List, Optional, Tuple
+
+import ccxt
+import ccxt.async_support as ccxt_async
+from freqtrade.enums import MarginMode, TradingMode
+from freqtrade.exchange import Exchange
+
+
+MOCK_EXCHANGE = "mock"
+MOCK_BASES = ["BTC", "ETH", "BNB", "SOL", "XRP", "ADA", "DOGE", "LTC", "DOT", "LINK"]
+MOCK_QUOTES = ["USDT", "BUSD"]
+MOCK_TIMEFRAMES = {
+    "1m": "1m", "3m": "3m", "5m": "5m", "15m": "15m", "30m": "30m",
+    "1h": "1h", "2h": "2h", "4h": "4h", "6h": "6h", "8h": "8h", "12h": "12h",
+    "1d": "1d", "3d": "3d", "1w": "1w",
+}
+FUNDING_INTERVAL_MS = 8 * 3600 * 1000
+CANDLE_LIMIT = 1000
+
+
+def _seed(symbol: str) -> int:
+    # crc32 is stable across processes, unlike hash()
+    return zlib.crc32(symbol.split(":")[0].encode())
+
+
+def _noise(seed: int, ts: int, salt: str = "") -> float:
+    """ Uniform pseudo-random value in [0, 1) for a symbol and timestamp """
+    return zlib.crc32(f"{seed}:{ts}:{salt}".encode()) / 2 ** 32
+
+
+def synthetic_price(symbol: str, ts: int) -> float:
+    """ Price of `symbol` at `ts` (ms), a sum of a few seeded cycles """
+    seed = _seed(symbol)
+    days = ts / 86_400_000
+    phase = (seed % 360) / 360 * 2 * math.pi
+    log_price = (
+        0.30 * math.sin(2 * math.pi * days / 120 + phase)
+        + 0.10 * math.sin(2 * math.pi * days / 14 + 2 * phase)
+        + 0.03 * math.sin(2 * math.pi * days / 1.5 + 3 * phase)
+        + 0.01 * math.sin(2 * math.pi * days * 6 + phase)
+        + 0.003 * (_noise(seed, ts) - 0.5)
+    )
+    base_price = 1 + seed % 20_000
+    return round(base_price * math.exp(log_price), 6)
+
+
+def synthetic_ohlcv(symbol: str, timeframe_ms: int, since: int, limit: int, price: str = "") -> List[List]:
+    """
+    Closed candles of `symbol` starting at `since`, never beyond the current time
+    @param price: "" for trade candles, "mark" / "index" for mark / index price candles
+    """
+    seed = _seed(symbol)
+    start = since - since % timeframe_ms
+    if start < since:
+        start += timeframe_ms
+    now = int(time.time() * 1000)
+    result = []
+    for ts in range(start, now - timeframe_ms + 1, timeframe_ms)[:limit]:
+        o = synthetic_price(symbol, ts)
+        c = synthetic_price(symbol, ts + timeframe_ms)
+        h = max(o, c) * (1 + 0.004 * _noise(seed, ts, "h"))
+        low = min(o, c) * (1 - 0.004 * _noise(seed, ts, "l"))
+        v = 0.0 if price else round(1000 * (0.2 + _noise(seed, ts, "v")) * timeframe_ms / 60_000, 3)
+        if price:
+            # mark / index price stays close to the last price
+            drift = 1 + 0.0005 * math.sin(ts / FUNDING_INTERVAL_MS)
+            o, h, low, c = (x * drift for x in (o, h, low, c))
+        result.append([ts, round(o, 6), round(h, 6), round(low, 6), round(c, 6), v])
+    return result
+
+
+def synthetic_funding_rates(symbol: str, since: int, limit: int) -> List[Dict]:
+    """ Funding rates every 8 hours, never beyond the current time """
+    seed = _seed(symbol)
+    start = since - since % FUNDING_INTERVAL_MS
+    if start < since:
+        start += FUNDING_INTERVAL_MS
+    now = int(time.time() * 1000)
+    result = []
+    for ts in range(start, now + 1, FUNDING_INTERVAL_MS)[:limit]:
+        rate = 0.0001 + 0.0002 * math.sin(ts / FUNDING_INTERVAL_MS / 30 + seed % 7)
+        result.append({
+            "info": {},
+            "symbol": symbol,
+            "fundingRate": round(rate, 8),
+            "timestamp": ts,
+            "datetime": ccxt.Exchange.iso8601(ts),
+        })
+    return result
+
+
+def synthetic_markets() -> List[Dict]:
+    """ Spot and linear perpetual markets of every base / quote combination """
+    markets = []
+    for base in MOCK_BASES:
+        for quote in MOCK_QUOTES:
+            for swap in (False, True):
+                symbol = f"{base}/{quote}:{quote}" if swap else f"{base}/{quote}"
+                markets.append({
+                    "id": f"{base}{quote}_PERP" if swap else f"{base}{quote}",
+                    "symbol": symbol,
+                    "base": base,
+                    "quote": quote,
+                    "settle": quote if swap else None,
+                    "baseId": base,
+                    "quoteId": quote,
+                    "settleId": quote if swap else None,
+                    "type": "swap" if swap else "spot",
+                    "spot": not swap,
+                    "margin": False,
+                    "swap": swap,
+                    "future": False,
+                    "option": False,
+                    "active": True,
+                    "contract": swap,
+                    "linear": True if swap else None,
+                    "inverse": False if swap else None,
+                    "contractSize": 1.0 if swap else None,
+                    "expiry": None,
+                    "expiryDatetime": None,
+                    "strike": None,
+                    "optionType": None,
+                    "taker": 0.0005 if swap else 0.001,
+                    "maker": 0.0002 if swap else 0.001,
+                    "precision": {"amount": 0.001, "price": 0.0001},
+                    "limits": {
+                        "leverage": {"min": 1, "max": 20 if swap else None},
+                        "amount": {"min": 0.001, "max": None},
+                        "price": {"min": 0.0001, "max": None},
+                        "cost": {"min": 5.0, "max": None},
+                    },
+                    "info": {},
+                })
+    return markets
+
+
+def synthetic_leverage_tiers(symbol: str) -> List[Dict]:
+    quote = symbol.split(":")[-1]
+    tiers = [
+        # (minNotional, maxNotional, maintenanceMarginRate, maxLeverage, maintenance amount)
+        (0, 50_000, 0.004, 20, 0),
+        (50_000, 250_000, 0.005, 10, 50),
+        (250_000, 1_000_000, 0.01, 5, 1_300),
+    ]
+    return [
+        {
+            "tier": i + 1,
+            "currency": quote,
+            "minNotional": lo,
+            "maxNotional": hi,
+            "maintenanceMarginRate": mmr,
+            "maxLeverage": lev,
+            "info": {"cum": str(cum)},
+        }
+        for i, (lo, hi, mmr, lev, cum) in enumerate(tiers)
+    ]
+
+
+class _MockApiMixin:
+    """ Shared description and data of the sync and async ccxt classes """
+
+    def describe(self):
+        return self.deep_extend(super().describe(), {
+            "id": MOCK_EXCHANGE,
+            "name": "Mock",
+            "countries": [],
+            "rateLimit": 0,
+            "enableRateLimit": False,
+            "precisionMode": ccxt.TICK_SIZE,
+            "timeframes": MOCK_TIMEFRAMES,
+            "has": {
+                "spot": True,
+                "swap": True,
+                "future": False,
+                "margin": False,
+                "fetchMarkets": True,
+                "fetchCurrencies": False,
+                "fetchOHLCV": True,
+                "fetchTicker": True,
+                "fetchTickers": True,
+                "fetchFundingRateHistory": True,
+                "fetchLeverageTiers": True,
+                "fetchTime": True,
+                "fetchBalance": True,
+                # required by freqtrade, only dry-run is supported
+                "fetchOrder": True,
+                "cancelOrder": True,
+                "createOrder": True,
+            },
+        })
+
+    def _ohlcv(self, symbol: str, timeframe: str, since: Optional[int], limit: Optional[int], params: dict):
+        timeframe_ms = self.parse_timeframe(timeframe) * 1000
+        limit = min(limit or CANDLE_LIMIT, CANDLE_LIMIT)
+        if since is None:
+            now = self.milliseconds()
+            since = now - now % timeframe_ms - limit * timeframe_ms
+        return synthetic_ohlcv(symbol, timeframe_ms, since, limit, params.get("price", ""))
+
+    def _funding_rate_history(self, symbol: str, since: Optional[int], limit: Optional[int]):
+        limit = min(limit or CANDLE_LIMIT, CANDLE_LIMIT)
+        if since is None:
+            since = self.milliseconds() - limit * FUNDING_INTERVAL_MS
+        return synthetic_funding_rates(symbol, since, limit)
+
+    def _ticker(self, symbol: str) -> Dict:
+        now = self.milliseconds()
+        last = synthetic_price(symbol, now - now % 60_000)
+        return {
+            "symbol": symbol,
+            "timestamp": now,
+            "datetime": self.iso8601(now),
+            "bid": last * 0.9999,
+            "ask": last * 1.0001,
+            "last": last,
+            "close": last,
+            "baseVolume": 1000.0,
+            "quoteVolume": 1000.0 * last,
+            "info": {},
+        }
+
+    def _leverage_tiers(self, symbols: Optional[List[str]]) -> Dict[str, List[Dict]]:
+        return {
+            m["symbol"]: synthetic_leverage_tiers(m["symbol"])
+            for m in synthetic_markets()
+            if m["swap"] and (symbols is None or m["symbol"] in symbols)
+        }
+
+    def _offline(self, *args, **kwargs):
+        raise ccxt.NotSupported(f"{self.id} is an offline exchange, only dry-run is supported")
+
+
+class MockCcxt(_MockApiMixin, ccxt.Exchange):
+    """ Synchronous ccxt api of the mock exchange """
+
+    def fetch_markets(self, params={}):
+        return synthetic_markets()
+
+    def fetch_time(self, params={}):
+        return self.milliseconds()
+
+    def fetch_ohlcv(self, symbol, timeframe="1m", since=None, limit=None, params={}):
+        return self._ohlcv(symbol, timeframe, since, limit, params)
+
+    def fetch_funding_rate_history(self, symbol=None, since=None, limit=None, params={}):
+        return self._funding_rate_history(symbol, since, limit)
+
+    def fetch_ticker(self, symbol, params={}):
+        return self._ticker(symbol)
+
+    def fetch_tickers(self, symbols=None, params={}):
+        self.load_markets()
+        return {s: self._ticker(s) for s in (symbols or self.symbols)}
+
+    def fetch_leverage_tiers(self, symbols=None, params={}):
+        return self._leverage_tiers(symbols)
+
+    def fetch_balance(self, params={}):
+        return {"info": {}, "free": {}, "used": {}, "total": {}}
+
+    def create_order(self, symbol, type, side, amount, price=None, params={}):
+        self._offline()
+
+    def fetch_order(self, id, symbol=None, params={}):
+        self._offline()
+
+    def cancel_order(self, id, symbol=None, params={}):
+        self._offline()
+
+
+class MockCcxtAsync(_MockApiMixin, ccxt_async.Exchange):
+    """ Asynchronous ccxt api of the mock exchange """
+
+    async def fetch_markets(self, params={}):
+        return synthetic_markets()
+
+    async def fetch_time(self, params={}):
+        return self.milliseconds()
+
+    async def fetch_ohlcv(self, symbol, timeframe="1m", since=None, limit=None, params={}):
+        return self._ohlcv(symbol, timeframe, since, limit, params)
+
+    async def fetch_funding_rate_history(self, symbol=None, since=None, limit=None, params={}):
+        return self._funding_rate_history(symbol, since, limit)
+
+    async def fetch_ticker(self, symbol, params={}):
+        return self._ticker(symbol)
+
+    async def fetch_tickers(self, symbols=None, params={}):
+        await self.load_markets()
+        return {s: self._ticker(s) for s in (symbols or self.symbols)}
+
+    async def fetch_leverage_tiers(self, symbols=None, params={}):
+        return self._leverage_tiers(symbols)
+
+    async def fetch_market_leverage_tiers(self, symbol, params={}):
+        return synthetic_leverage_tiers(symbol)
+
+    async def fetch_balance(self, params={}):
+        return {"info": {}, "free": {}, "used": {}, "total": {}}
+
+    async def create_order(self, symbol, type, side, amount, price=None, params={}):
+        self._offline()
+
+    async def fetch_order(self, id, symbol=None, params={}):
+        self._offline()
+
+    async def cancel_order(self, id, symbol=None, params={}):
+        self._offline()
+
+
+class Mock(Exchange):
+    """ Freqtrade exchange class of the mock exchange, resolved by name through `freqtrade.exchange` """
+
+    _ft_has: Dict = {
+        "ohlcv_candle_limit": CANDLE_LIMIT,
+        # only closed candles are served
+        "ohlcv_partial_candle": False,
+        "tickers_have_price": True,
+    }
+    _ft_has_futures: Dict = {
+        "mark_ohlcv_timeframe": "8h",
+        "funding_fee_timeframe": "8h",
+    }
+    _supported_trading_mode_margin_pairs: List[Tuple[TradingMode, MarginMode]] = [
+        (TradingMode.FUTURES, MarginMode.ISOLATED),
+    ]
+
+
+def register_mock_exchange() -> None:
+    """
+    Make the mock exchange known to ccxt and freqtrade, idempotent.
+    Must run before the configuration is validated, freqtrade checks the exchange name against ccxt.
+    """
+    import freqtrade.exchange
+
+    for module, api_class in ((ccxt, MockCcxt), (ccxt_async, MockCcxtAsync)):
+        setattr(module, MOCK_EXCHANGE, api_class)
+        if MOCK_EXCHANGE not in module.exchanges:
+            module.exchanges.append(MOCK_EXCHANGE)
+    freqtrade.exchange.Mock = Mock
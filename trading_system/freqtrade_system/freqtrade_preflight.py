@@ -0,0 +1,363 @@
+"""
+Fast checks of a generated strategy before it is backtested.
+
+The strategy is compiled in this process, then imported and run on a small sample of candles by a
+long-lived worker process, so freqtrade, talib and the sample are loaded once and every further check
+takes a fraction of a second. A strategy that hangs or crashes only takes the worker down.
+
+    report = preflight_strategy(fc, "AutoStrategy")
+    if not report.ok:
+        print(report)
+"""
+import re
+import sys
+import json
+import time
+import queue
+import atexit
+import shutil
+import tempfile
+import threading
+import traceback
+import subprocess
+from pathlib import Path
+from dataclasses import dataclass, field, asdict
+from typing import List, Optional
+
+from trading_system.utilities import camel_to_underscore
+
+
+SIGNAL_COLUMNS = ["enter_long", "exit_long", "enter_short", "exit_short", "enter_tag", "exit_tag"]
+# the signals of the full sample are compared with the ones of samples cut at these fractions
+LOOKAHEAD_CUTS = (0.6, 0.8)
+
+
+@dataclass
+class PreflightReport:
+    ok: bool
+    # failed stage: "syntax", "import", "indicators", "entry", "exit", "lookahead", "timeout",
+    # "sandbox" when the worker did not start, the strategy is not at fault
+    stage: str = ""
+    error: str = ""
+    traceback: str = ""
+    lookahead_columns: List[str] = field(default_factory=list)
+    warnings: List[str] = field(default_factory=list)
+    rows: int = 0
+    seconds: float = 0.0
+
+    def __str__(self):
+        if self.ok:
+            text = f"Preflight passed on {self.rows} candles in {self.seconds:.3f}s."
+        else:
+            text = f"Preflight failed at the {self.stage} stage: {self.error}"
+            if self.traceback:
+                text += f"\n{self.traceback}"
+        for warning in self.warnings:
+            text += f"\nWarning: {warning}"
+        return text
+
+
+def find_strategy_file(strategy_dir: str, class_name: str) -> Optional[Path]:
+    """ File defining `class_name`, the file named after the class is tried first """
+    strategy_file = Path(strategy_dir, f"{camel_to_underscore(class_name)}.py")
+    if strategy_file.exists():
+        return strategy_file
+    pattern = re.compile(rf"^class\s+{class_name}\s*\(", re.MULTILINE)
+    for path in sorted(Path(strategy_dir).glob("*.py")):
+        if pattern.search(path.read_text(encoding="utf-8", errors="ignore")):
+            return path
+    return None
+
+
+def check_syntax(strategy_file: Path) -> Optional[PreflightReport]:
+    """ Compile in this process, a report is returned only on failure """
+    try:
+        source = Path(strategy_file).read_text(encoding="utf-8")
+        compile(source, str(strategy_file), "exec")
+    except FileNotFoundError:
+        return PreflightReport(ok=False, stage="syntax", error=f"{strategy_file} does not exist.")
+    except SyntaxError as e:
+        return PreflightReport(
+            ok=False, stage="syntax", error=f"{e.msg} (line {e.lineno})",
+            traceback="".join(traceback.format_exception_only(type(e), e)).strip()
+        )
+    return None
+
+
+class SandboxStartupError(Exception):
+    """ The worker did not start or did not answer the handshake """
+
+
+class PreflightSandbox:
+    """ A worker process running the checks one at a time, restarted after a timeout or a crash """
+
+    def __init__(self, timeout: float = 10.0, startup_timeout: float = 120.0):
+        """
+        @param timeout: seconds one check may take
+        @param startup_timeout: seconds the worker may take to import freqtrade
+        """
+        self.timeout = timeout
+        self.startup_timeout = startup_timeout
+        self._process: Optional[subprocess.Popen] = None
+        self._responses: queue.Queue = queue.Queue()
+        self._lock = threading.Lock()
+
+    def _start(self) -> None:
+        try:
+            self._process = subprocess.Popen(
+                [sys.executable, "-m", "trading_system.freqtrade_system.freqtrade_preflight"],
+                stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                text=True, encoding="utf-8",
+            )
+            self._responses = queue.Queue()
+            threading.Thread(target=self._read, args=(self._process, self._responses), daemon=True).start()
+            handshake = self._receive(self.startup_timeout)
+        except (TimeoutError, RuntimeError, OSError, ValueError) as e:
+            self.close()
+            raise SandboxStartupError(f"The preflight worker did not start: {e}") from e
+        if not handshake.get("ready"):
+            self.close()
+            raise SandboxStartupError(f"Unexpected handshake of the preflight worker: {handshake}")
+
+    @staticmethod
+    def _read(process: subprocess.Popen, responses: queue.Queue) -> None:
+        try:
+            for line in process.stdout:
+                responses.put(json.loads(line))
+        except ValueError:
+            pass
+        responses.put(None)
+
+    def _receive(self, timeout: float) -> dict:
+        try:
+            response = self._responses.get(timeout=timeout)
+        except queue.Empty:
+            self.close()
+            raise TimeoutError(f"No response within {timeout}s.")
+        if response is None:
+            self.close()
+            raise RuntimeError("The preflight worker exited unexpectedly.")
+        return response
+
+    def check(self, strategy_file: str, class_name: str, config: dict, pair: str = "", rows: int = 500) -> PreflightReport:
+        """
+        @param strategy_file: file of the strategy class
+        @param config: freqtrade configuration, eg: FreqtradeCommands.get_config()
+        @param pair: sample pair, default: the first pair of the whitelist
+        @param rows: sample candles, the startup candles of the strategy are added
+        """
+        request = {
+            "strategy_file": str(Path(strategy_file).absolute()),
+            "class_name": class_name,
+            "config": json.loads(json.dumps(config, default=str)),
+            "pair": pair,
+            "rows": rows,
+        }
+        t0 = time.perf_counter()
+        with self._lock:
+            try:
+                if self._process is None or self._process.poll() is not None:
+                    self._start()
+                self._process.stdin.write(json.dumps(request) + "\n")
+                self._process.stdin.flush()
+                report = PreflightReport(**self._receive(self.timeout))
+            except SandboxStartupError as e:
+                return PreflightReport(ok=False, stage="sandbox", error=str(e), seconds=time.perf_counter() - t0)
+            except TimeoutError as e:
+                return PreflightReport(ok=False, stage="timeout", error=f"{e} The strategy may loop forever.",
+                                       seconds=time.perf_counter() - t0)
+            except (RuntimeError, OSError) as e:
+                return PreflightReport(ok=False, stage="import", error=str(e), seconds=time.perf_counter() - t0)
+        report.seconds = time.perf_counter() - t0
+        return report
+
+    def close(self) -> None:
+        if self._process is not None:
+            self._process.kill()
+            self._process.wait()
+            self._process = None
+
+
+_sandbox: Optional[PreflightSandbox] = None
+
+
+def get_sandbox() -> PreflightSandbox:
+    """ Sandbox shared by the tools, the worker is started by the first check """
+    global _sandbox
+    if _sandbox is None:
+        _sandbox = PreflightSandbox()
+        atexit.register(_sandbox.close)
+    return _sandbox
+
+
+def preflight_strategy(fc, class_name: str, strategy_file: str = "", rows: int = 500) -> PreflightReport:
+    """
+    Check the strategy `class_name` of a FreqtradeCommands project
+    @param strategy_file: default: the file of `class_name` in the strategies directory
+    """
+    t0 = time.perf_counter()
+    strategy_dir = Path(fc.user_data_dir, "strategies")
+    strategy_file = Path(strategy_file) if strategy_file else find_strategy_file(str(strategy_dir), class_name)
+    if strategy_file is None:
+        return PreflightReport(ok=False, stage="import", error=f"No file in {strategy_dir} defines {class_name}.")
+
+    report = check_syntax(strategy_file)
+    if report is not None:
+        report.seconds = time.perf_counter() - t0
+        return report
+    return get_sandbox().check(str(strategy_file), class_name, fc.get_config(), rows=rows)
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+# worker process
+
+
+_samples = {}
+
+
+def _load_sample(config: dict, pair: str, rows: int):
+    """ Last `rows` candles of the downloaded data, synthetic candles when nothing is downloaded """
+    from freqtrade.data.history import load_pair_history
+    from freqtrade.data.converter import ohlcv_to_dataframe
+    from freqtrade.exchange import timeframe_to_msecs
+
+    key = (str(config["datadir"]), pair, config["timeframe"], config["candle_type_def"])
+    if key not in _samples:
+        df = load_pair_history(
+            pair=pair, timeframe=config["timeframe"], datadir=config["datadir"],
+            data_format=config.get("dataformat_ohlcv"), candle_type=config["candle_type_def"]
+        )
+        if df.empty:
+            from trading_system.freqtrade_system.freqtrade_mock import synthetic_ohlcv
+
+            timeframe_ms = timeframe_to_msecs(config["timeframe"])
+            since = int(time.time() * 1000) - (rows + 2) * timeframe_ms
+            candles = synthetic_ohlcv(pair, timeframe_ms, since, rows)
+            df = ohlcv_to_dataframe(candles, config["timeframe"], pair, fill_missing=False, drop_incomplete=False)
+        _samples[key] = df
+    return _samples[key].tail(rows).reset_index(drop=True)
+
+
+def _analyze(strategy, dataframe, pair: str):
+    """ Indicators and signals of `dataframe`, the failing stage is attached to the exception """
+    metadata = {"pair": pair}
+    stage = "indicators"
+    try:
+        df = strategy.advise_indicators(dataframe.copy(), metadata)
+        if len(df) != len(dataframe):
+            raise ValueError(f"populate_indicators changed the number of rows ({len(dataframe)} -> {len(df)}).")
+        stage = "entry"
+        df = strategy.advise_entry(df, metadata)
+        if "enter_long" not in df.columns:
+            raise ValueError("populate_entry_trend did not set the `enter_long` column.")
+        stage = "exit"
+        df = strategy.advise_exit(df, metadata)
+        if "exit_long" not in df.columns:
+            raise ValueError("populate_exit_trend did not set the `exit_long` column.")
+    except Exception as e:
+        e.preflight_stage = stage
+        raise
+    return df
+
+
+def _differing_columns(full, part) -> List[str]:
+    """ Columns whose values on the rows of `part` change once later candles are added """
+    import numpy as np
+    import pandas as pd
+
+    columns = []
+    head = full.iloc[:len(part)]
+    for column in part.columns:
+        if column not in head.columns or column == "date":
+            continue
+        a, b = head[column].reset_index(drop=True), part[column].reset_index(drop=True)
+        if pd.api.types.is_numeric_dtype(a) and pd.api.types.is_numeric_dtype(b):
+            same = np.allclose(a.to_numpy(dtype=float), b.to_numpy(dtype=float), rtol=1e-6, atol=1e-9, equal_nan=True)
+        else:
+            same = a.fillna("").astype(str).equals(b.fillna("").astype(str))
+        if not same:
+            columns.append(column)
+    # signals first, they are what the backtest trades on
+    return sorted(columns, key=lambda c: (c not in SIGNAL_COLUMNS, c))
+
+
+def _check(strategy_file: str, class_name: str, config: dict, pair: str, rows: int) -> PreflightReport:
+    from freqtrade.enums import CandleType, RunMode
+    from freqtrade.data.dataprovider import DataProvider
+    from freqtrade.resolvers import StrategyResolver
+
+    report = PreflightReport(ok=False, stage="import")
+    with tempfile.TemporaryDirectory(prefix="preflight_") as tmp:
+        # only the checked file is on the search path, other strategies are neither imported nor shadowing it
+        strategy_dir = Path(tmp, "strategies")
+        strategy_dir.mkdir()
+        shutil.copy(strategy_file, strategy_dir)
+        config.update(
+            user_data_dir=Path(tmp), strategy=class_name, strategy_path=str(strategy_dir), runmode=RunMode.BACKTEST,
+            datadir=Path(config["datadir"]), candle_type_def=CandleType.get_default(config.get("trading_mode", "spot")),
+        )
+        try:
+            strategy = StrategyResolver.load_strategy(config)
+            strategy.dp = DataProvider(config, None)
+            strategy.ft_bot_start()
+        except Exception as e:
+            report.error = f"{type(e).__name__}: {e}"
+            report.traceback = traceback.format_exc(limit=-3)
+            return report
+
+    pair = pair or config["exchange"]["pair_whitelist"][0]
+    startup = strategy.startup_candle_count or 0
+    sample = _load_sample(config, pair, rows + startup)
+    report.rows = len(sample)
+
+    try:
+        full = _analyze(strategy, sample, pair)
+        for cut in LOOKAHEAD_CUTS:
+            n = int(len(sample) * cut)
+            if n <= startup:
+                continue
+            report.lookahead_columns = _differing_columns(full, _analyze(strategy, sample.iloc[:n], pair))
+            if report.lookahead_columns:
+                report.stage = "lookahead"
+                report.error = (f"Values of {', '.join(report.lookahead_columns)} change when later candles are "
+                                f"added, the strategy uses future data (eg: shift(-1), center=True, whole column statistics).")
+                return report
+    except Exception as e:
+        report.stage = getattr(e, "preflight_stage", "indicators")
+        report.error = f"{type(e).__name__}: {e}"
+        report.traceback = traceback.format_exc(limit=-3)
+        return report
+
+    trading = full.iloc[startup:]
+    if not trading["enter_long"].fillna(0).astype(bool).any() and not (
+            "enter_short" in trading and trading["enter_short"].fillna(0).astype(bool).any()):
+        report.warnings.append(f"No entry signal on the {len(trading)} sample candles of {pair}.")
+    report.ok = True
+    report.stage = ""
+    return report
+
+
+def _worker() -> None:
+    """ Answer one json request per stdin line, strategy output is sent to stderr """
+    out = sys.stdout
+    sys.stdout = sys.stderr
+
+    # warm up the imports shared by every check
+    import talib.abstract  # noqa: F401
+    from freqtrade.resolvers import StrategyResolver  # noqa: F401
+
+    out.write(json.dumps({"ready": True}) + "\n")
+    out.flush()
+    for line in sys.stdin:
+        request = json.loads(line)
+        try:
+            report = _check(**request)
+        except Exception as e:
+            report = PreflightReport(ok=False, stage="import", error=f"{type(e).__name__}: {e}",
+                                     traceback=traceback.format_exc(limit=-3))
+        out.write(json.dumps(asdict(report), default=str) + "\n")
+        out.flush()
+
+
+if __name__ == '__main__':
+    _worker()
@@ -4,7 +4,7 @@ STRATEGY_CREATE = """
 {describe}
 ```
 Write a quantitative trading strategy class using Freqtrade according to the above description, with the following requirements:
-1. The class inherits `IStrategy` and is named `AutoStrategy`.
+1. The class inherits `IStrategy` and is named `{class_name}`.
 2. You need to add the following properties and add optimizable parameter spaces:
 - can_short={can_short}
 - minimal_roi
@@ -31,7 +31,25 @@ dataframe['buy_fast_ma'] = ta.SMA(dataframe['close'], timeperiod=self.buy_fast_p
 ```
 
 Output format is as follows:
-auto_strategy.py
+{file_name}.py
+```python
+[strategy code]
+```
+"""
+
+STRATEGY_REPAIR = """
+```python
+{code}
+```
+The Freqtrade strategy `{class_name}` above fails the following check:
+```
+{error}
+```
+Fix the error and keep the trading logic of the strategy. A lookahead error means that indicators or signals use
+future candles, eg: `shift(-1)`, `rolling(center=True)` or statistics of the whole dataframe such as `dataframe['close'].max()`.
+
+Output format is as follows:
+{file_name}.py
 ```python
 [strategy code]
 ```
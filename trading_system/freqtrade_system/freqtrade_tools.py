@@ -1,5 +1,9 @@
+import os
 import re
 import json
+import asyncio
+import threading
+from pathlib import Path
 
 from typing import Optional, Any
 from pydantic import Field
@@ -12,12 +16,14 @@ from langchain.prompts import PromptTemplate
 from langchain.tools.base import BaseTool
 
 from trading_system.base import llm_chatgpt
-from trading_system.utilities import print_red
+from trading_system.utilities import print_red, run_blocking, camel_to_underscore
+from trading_system.llm_cache import llm_cache_enabled
 from trading_system.functions_chain import FunctionsChain
 
 from trading_system.freqtrade_system.freqtrade_functions import FREQTRADE_COMMANDS
-from trading_system.freqtrade_system.freqtrade_prompts import STRATEGY_CREATE
+from trading_system.freqtrade_system.freqtrade_prompts import STRATEGY_CREATE, STRATEGY_REPAIR
 from trading_system.freqtrade_system.freqtrade_commands import FreqtradeCommands
+from trading_system.freqtrade_system.freqtrade_preflight import PreflightReport, preflight_strategy
 
 
 def set_parameters(config_file: str, rebuild_direct: bool = False) -> FreqtradeCommands:
@@ -142,12 +148,23 @@ class FreqtradeBaseTool(BaseTool):
     name = Field(default="", exclude=True)
     description = Field(default="", exclude=True)
 
+    # False: always query the LLM, eg: to regenerate a strategy for the same description
+    use_llm_cache: bool = Field(default=True)
+
+    def run(self, *args: Any, **kwargs: Any) -> Any:
+        with llm_cache_enabled(self.use_llm_cache):
+            return super().run(*args, **kwargs)
+
+    async def arun(self, *args: Any, **kwargs: Any) -> Any:
+        with llm_cache_enabled(self.use_llm_cache):
+            return await super().arun(*args, **kwargs)
+
     def _run(self, *args: Any, **kwargs: Any,) -> Any:
         return ""
 
-    async def _arun(self, input_str: str, run_manager: Optional[AsyncCallbackManagerForToolRun] = None) -> str:
-        """Use the tool asynchronously."""
-        raise NotImplementedError("custom_search does not support async")
+    async def _arun(self, *args: Any, **kwargs: Any) -> Any:
+        """ Run the blocking freqtrade work of `_run` in a worker thread """
+        return await run_blocking(self._run, *args, **kwargs)
 
 
 class FreqtradeCommandsTool(FreqtradeBaseTool):
@@ -198,6 +215,10 @@ class StrategyBacktestTool(FreqtradeBaseTool):
                 if input_stname not in df_stname["StrategyName"].tolist():
                     input_stname = ""
             FreqtradeBaseTool.fc.start_strategy_update(input_stname)
+            report = preflight_strategy(FreqtradeBaseTool.fc, input_stname)
+            if not report.ok:
+                print_red(str(report))
+                return f"The strategy backtest is skipped. {report}"
             FreqtradeBaseTool.fc.start_backtesting(input_stname)
             FreqtradeBaseTool.fc.start_backtesting_show()
         return "The strategy backtest is complete. "
@@ -280,23 +301,113 @@ class StrategyCreationTool(FreqtradeBaseTool):
     name = "strategy_creation"
     description = "Create quantitative trading strategies through strategy descriptions. "
 
+    # LLM attempts to fix a strategy failing the preflight check, 0 disables the check
+    max_repairs: int = Field(default=2)
+
     def _run(self, input_str: str, run_manager: Optional[CallbackManagerForToolRun] = None) -> str:
         print_red(input_str)
+        strategy_content = llm_chatgpt.predict(self._strategy_prompt(input_str))
+        result = self._save_strategy(input_str, strategy_content)
+        return result + self._check_and_repair(input_str)
 
+    async def _arun(self, input_str: str, run_manager: Optional[AsyncCallbackManagerForToolRun] = None) -> str:
+        print_red(input_str)
+        strategy_content = await llm_chatgpt.apredict(self._strategy_prompt(input_str))
+        result = await run_blocking(self._save_strategy, input_str, strategy_content)
+        if not self.max_repairs:
+            return result
+        report = await self.arepair_strategy(input_str, max_repairs=self.max_repairs)
+        return result + ("" if report.ok else f"But it does not pass the preflight check. {report}")
+
+    def _check_and_repair(self, input_str: str, class_name: str = "AutoStrategy") -> str:
+        """ Run the preflight check, and let the LLM fix the reported error up to `max_repairs` times """
+        if not self.max_repairs:
+            return ""
+        report = self.repair_strategy(input_str, class_name, self.max_repairs)
+        return "" if report.ok else f"But it does not pass the preflight check. {report}"
+
+    @staticmethod
+    def _repair_prompt(class_name: str, report: PreflightReport) -> Optional[str]:
+        """ None when there is nothing to repair """
+        strategy_file = Path(FreqtradeBaseTool.fc.user_data_dir, "strategies", f"{camel_to_underscore(class_name)}.py")
+        if report.ok or not strategy_file.exists():
+            return None
+        if report.stage == "sandbox":
+            print_red(f"{class_name}: the preflight worker did not start, the strategy is not repaired.")
+            return None
+        print_red(f"{class_name}: {report.stage} error, repairing...")
+        return PromptTemplate.from_template(STRATEGY_REPAIR).format(
+            code=strategy_file.read_text(encoding="utf-8"), class_name=class_name, error=str(report),
+            file_name=camel_to_underscore(class_name)
+        )
+
+    @staticmethod
+    def _save_repaired(input_str: str, strategy_content: str, class_name: str) -> PreflightReport:
+        """ Save the repaired code, update it like a first generation and check it again """
+        StrategyCreationTool._save_strategy(input_str, strategy_content, class_name)
+        strategy_file = Path(FreqtradeBaseTool.fc.user_data_dir, "strategies", f"{camel_to_underscore(class_name)}.py")
+        if strategy_file.exists():
+            FreqtradeBaseTool.fc.update_strategy_file(strategy_file)
+        return preflight_strategy(FreqtradeBaseTool.fc, class_name)
+
+    @staticmethod
+    def repair_strategy(input_str: str, class_name: str = "AutoStrategy", max_repairs: int = 2) -> PreflightReport:
+        report = preflight_strategy(FreqtradeBaseTool.fc, class_name)
+        for _ in range(max_repairs):
+            prompt = StrategyCreationTool._repair_prompt(class_name, report)
+            if prompt is None:
+                break
+            report = StrategyCreationTool._save_repaired(input_str, llm_chatgpt.predict(prompt), class_name)
+        print_red(str(report))
+        return report
+
+    @staticmethod
+    async def arepair_strategy(
+            input_str: str,
+            class_name: str = "AutoStrategy",
+            max_repairs: int = 2,
+            semaphore: Optional[asyncio.Semaphore] = None,
+    ) -> PreflightReport:
+        """
+        Async `repair_strategy`
+        @param semaphore: limit of the LLM requests in flight shared with the caller, eg: StrategyBatch
+        """
+        report = await run_blocking(preflight_strategy, FreqtradeBaseTool.fc, class_name)
+        for _ in range(max_repairs):
+            prompt = await run_blocking(StrategyCreationTool._repair_prompt, class_name, report)
+            if prompt is None:
+                break
+            if semaphore is None:
+                strategy_content = await llm_chatgpt.apredict(prompt)
+            else:
+                async with semaphore:
+                    strategy_content = await llm_chatgpt.apredict(prompt)
+            report = await run_blocking(StrategyCreationTool._save_repaired, input_str, strategy_content, class_name)
+        print_red(str(report))
+        return report
+
+    @staticmethod
+    def _strategy_prompt(input_str: str, class_name: str = "AutoStrategy") -> str:
         strategy_prompt = PromptTemplate.from_template(STRATEGY_CREATE)
         can_short = "True" if FreqtradeBaseTool.fc.trading_mode == "futures" else "False"
-        strategy_prompt = strategy_prompt.format(describe=input_str, can_short=can_short)
-        strategy_content = llm_chatgpt.predict(strategy_prompt)
+        return strategy_prompt.format(
+            describe=input_str, can_short=can_short, class_name=class_name, file_name=camel_to_underscore(class_name))
 
+    @staticmethod
+    def _save_strategy(input_str: str, strategy_content: str, class_name: str = "AutoStrategy") -> str:
         pattern = r"```python(.+?)```"
         matches = re.findall(pattern, strategy_content, re.DOTALL)
 
-        if matches:
-            extracted_code = matches[0].strip()
-            with open(f"{FreqtradeBaseTool.fc.user_data_dir}/strategies/auto_strategy.py", "w", encoding="utf-8") as f:
-                f.write(f'"""{input_str}"""\n')
-                f.write(extracted_code)
-        else:
-            print("No Python code found.")
-
+        if not matches:
+            print_red("No Python code found.")
+            return "No Python code found in the response, the strategy is not saved. "
+
+        extracted_code = matches[0].strip()
+        strategy_file = f"{FreqtradeBaseTool.fc.user_data_dir}/strategies/{camel_to_underscore(class_name)}.py"
+        # written next to the target and swapped in, freqtrade imports every .py of the directory
+        tmp_file = f"{strategy_file}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            f.write(f'"""{input_str}"""\n')
+            f.write(extracted_code)
+        os.replace(tmp_file, strategy_file)
         return "The strategy is created and saved. "
@@ -51,3 +51,34 @@ def start_stepwise(config_file: str = "trader_freqtrade.txt", workspace: str = "
     while True:
         command = input("command: ")
         fc_agent.run(command)
+
+
+def start_batch(
+        descriptions_path: str,
+        config_file: str = "trader_freqtrade.txt",
+        workspace: str = "ft_workspace",
+        max_concurrent_llm: int = 4,
+        max_workers: int = None,
+        rank_by: str = "sharpe",
+):
+    """
+    Create and backtest one strategy per description, and rank them in a leaderboard
+    @param descriptions_path: a directory of *.txt files, or one file with descriptions separated by `===` lines
+    """
+    from trading_system.freqtrade_system.freqtrade_batch import StrategyBatch, load_descriptions
+
+    config_file = os.path.abspath(config_file)
+    descriptions = load_descriptions(os.path.abspath(descriptions_path))
+
+    # 1. Set the default working path
+    if not os.path.exists(workspace):
+        os.mkdir(workspace)
+    os.chdir(workspace)
+    # 2. Initialize the environment according to the configuration file,
+    # its validity test downloads the data shared by all strategies
+    fc = set_parameters(config_file)
+
+    batch = StrategyBatch(fc, max_concurrent_llm=max_concurrent_llm, max_workers=max_workers, rank_by=rank_by)
+    leaderboard = batch.run(descriptions)
+    print(leaderboard.to_string())
+    return leaderboard
@@ -5,7 +5,7 @@ from langchain.chains.llm import LLMChain
 from langchain.memory.buffer import ConversationBufferMemory
 from langchain import PromptTemplate, BasePromptTemplate
 
-from langchain.callbacks.manager import CallbackManagerForChainRun
+from langchain.callbacks.manager import AsyncCallbackManagerForChainRun, CallbackManagerForChainRun
 from langchain.schema import (
     BaseMemory,
     Generation,
@@ -70,6 +70,14 @@ class FunctionsChain(LLMChain):
         self.chat_response = self.generate([inputs], run_manager=run_manager)
         return self.create_outputs(self.chat_response)[0]
 
+    async def _acall(
+        self,
+        inputs: Dict[str, Any],
+        run_manager: Optional[AsyncCallbackManagerForChainRun] = None,
+    ) -> Dict[str, str]:
+        self.chat_response = await self.agenerate([inputs], run_manager=run_manager)
+        return self.create_outputs(self.chat_response)[0]
+
 
 def functions_chain_to_functions_call(functions_chain: FunctionsChain) -> Union[None, Dict[str, str]]:
     """ input `FunctionsChain`, output `function_call`"""
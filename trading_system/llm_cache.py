@@ -0,0 +1,279 @@
+"""
+Persistent response cache of the LLM calls, installed as `langchain.llm_cache` in base.py.
+
+Entries are keyed on (llm_string, prompt): llm_string holds the model, its parameters and the call
+kwargs such as the function schema, prompt is the serialized message list.
+
+langchain calls the cache synchronously, also from the async generation, so the embedding request
+of the similarity lookup is skipped on a running event loop and the one of an update is sent by a thread.
+"""
+import os
+import json
+import time
+import asyncio
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+from langchain.cache import BaseCache
+from langchain.embeddings.base import Embeddings
+from langchain.schema import ChatGeneration, Generation
+from langchain.schema.messages import AIMessage
+
+from trading_system.utilities import print_red
+
+
+# False inside `llm_cache_enabled(False)`, see `use_llm_cache` of the tools
+_cache_enabled: ContextVar[bool] = ContextVar("llm_cache_enabled", default=True)
+
+
+@contextmanager
+def llm_cache_enabled(enabled: bool = True):
+    """ Enable or bypass the response cache for the calls made inside the block """
+    token = _cache_enabled.set(enabled)
+    try:
+        yield
+    finally:
+        _cache_enabled.reset(token)
+
+
+def _on_event_loop() -> bool:
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+
+def _sha256(*parts: str) -> str:
+    return hashlib.sha256("\x00".join(parts).encode()).hexdigest()
+
+
+def _dump_generations(generations: Sequence[Generation]) -> str:
+    items = []
+    for gen in generations:
+        if isinstance(gen, ChatGeneration):
+            items.append({
+                "type": "chat",
+                "content": gen.message.content,
+                "additional_kwargs": gen.message.additional_kwargs,
+                "generation_info": gen.generation_info,
+            })
+        else:
+            items.append({"type": "text", "text": gen.text, "generation_info": gen.generation_info})
+    return json.dumps(items, ensure_ascii=False)
+
+
+def _load_generations(data: str) -> List[Generation]:
+    generations = []
+    for item in json.loads(data):
+        if item["type"] == "chat":
+            message = AIMessage(content=item["content"], additional_kwargs=item["additional_kwargs"])
+            generations.append(ChatGeneration(message=message, generation_info=item["generation_info"]))
+        else:
+            generations.append(Generation(text=item["text"], generation_info=item["generation_info"]))
+    return generations
+
+
+def _prompt_text(prompt: str) -> str:
+    """ Message contents of a serialized chat prompt, the text used for similarity lookup """
+    try:
+        data = json.loads(prompt)
+    except ValueError:
+        return prompt
+
+    contents = []
+
+    def collect(obj):
+        if isinstance(obj, dict):
+            if isinstance(obj.get("content"), str):
+                contents.append(obj["content"])
+            for value in obj.values():
+                collect(value)
+        elif isinstance(obj, list):
+            for value in obj:
+                collect(value)
+
+    collect(data)
+    return "\n".join(contents) if contents else prompt
+
+
+class LLMResponseCache(BaseCache):
+    """
+    SQLite response cache with exact and optional embedding similarity lookup.
+
+    A similarity hit requires the same llm_string (model, parameters and function schema),
+    only the prompt text may differ.
+    """
+
+    def __init__(
+            self,
+            database_path: str = ".langchain_cache.db",
+            ttl: Optional[float] = 30 * 24 * 3600,
+            max_entries: int = 10_000,
+            embeddings: Optional[Embeddings] = None,
+            similarity_threshold: float = 0.97,
+    ):
+        """
+        @param database_path: sqlite file, relative paths are resolved against the current directory
+        @param ttl: seconds an entry stays valid, None keeps entries until they are evicted by size
+        @param max_entries: least recently used entries beyond this size are evicted
+        @param embeddings: enables similarity lookup when given, eg: OpenAIEmbeddings()
+        @param similarity_threshold: minimum cosine similarity of a similarity hit
+        """
+        self.database_path = os.path.abspath(database_path)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.embeddings = embeddings
+        self.similarity_threshold = similarity_threshold
+
+        self._lock = threading.Lock()
+        # embeddings computed by missed lookups, reused by the following updates,
+        # bounded since a failed or uncached call never sends its update
+        self._pending_embeddings: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self.max_pending_embeddings = 256
+        self._stats = {"hits": 0, "similar_hits": 0, "misses": 0, "bypassed": 0, "updates": 0, "evictions": 0}
+
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache ("
+                "key TEXT PRIMARY KEY, llm_key TEXT, prompt TEXT, response TEXT, embedding BLOB, "
+                "created REAL, last_access REAL, hits INTEGER DEFAULT 0)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS llm_cache_llm_key ON llm_cache (llm_key)")
+            conn.execute("CREATE INDEX IF NOT EXISTS llm_cache_last_access ON llm_cache (last_access)")
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.database_path, timeout=30)
+
+    def _embed(self, prompt: str) -> np.ndarray:
+        vector = np.asarray(self.embeddings.embed_query(_prompt_text(prompt)), dtype=np.float32)
+        return vector / (np.linalg.norm(vector) or 1.0)
+
+    def _count(self, name: str, n: int = 1) -> None:
+        with self._lock:
+            self._stats[name] += n
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[List[Generation]]:
+        if not _cache_enabled.get():
+            self._count("bypassed")
+            return None
+
+        key = _sha256(llm_string, prompt)
+        now = time.time()
+        min_created = now - self.ttl if self.ttl else 0
+
+        with self._lock, self._connect() as conn:
+            row = conn.execute(
+                "SELECT response FROM llm_cache WHERE key = ? AND created >= ?", (key, min_created)
+            ).fetchone()
+            if row:
+                conn.execute("UPDATE llm_cache SET last_access = ?, hits = hits + 1 WHERE key = ?", (now, key))
+                self._stats["hits"] += 1
+                return _load_generations(row[0])
+
+        # a similarity hit is not worth blocking the event loop on an embedding request
+        if self.embeddings is not None and not _on_event_loop():
+            try:
+                vector = self._embed(prompt)
+            except Exception as e:
+                print_red(f"LLM cache: embedding failed, similarity lookup skipped: {type(e).__name__}: {e}")
+                self._count("misses")
+                return None
+            with self._lock, self._connect() as conn:
+                rows = conn.execute(
+                    "SELECT key, response, embedding FROM llm_cache "
+                    "WHERE llm_key = ? AND created >= ? AND embedding IS NOT NULL",
+                    (_sha256(llm_string), min_created)
+                ).fetchall()
+                if rows:
+                    matrix = np.stack([np.frombuffer(r[2], dtype=np.float32) for r in rows])
+                    scores = matrix @ vector
+                    best = int(np.argmax(scores))
+                    if scores[best] >= self.similarity_threshold:
+                        conn.execute(
+                            "UPDATE llm_cache SET last_access = ?, hits = hits + 1 WHERE key = ?", (now, rows[best][0])
+                        )
+                        self._stats["similar_hits"] += 1
+                        return _load_generations(rows[best][1])
+                self._pending_embeddings[key] = vector
+                while len(self._pending_embeddings) > self.max_pending_embeddings:
+                    self._pending_embeddings.popitem(last=False)
+
+        self._count("misses")
+        return None
+
+    def update(self, prompt: str, llm_string: str, return_val: Sequence[Generation]) -> None:
+        if not _cache_enabled.get():
+            return
+
+        key = _sha256(llm_string, prompt)
+        embedding = None
+        embed_later = False
+        if self.embeddings is not None:
+            with self._lock:
+                vector = self._pending_embeddings.pop(key, None)
+            if vector is None and _on_event_loop():
+                embed_later = True
+            elif vector is None:
+                vector = self._try_embed(prompt)
+            embedding = vector.tobytes() if vector is not None else None
+
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, llm_key, prompt, response, embedding, created, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, _sha256(llm_string), prompt, _dump_generations(return_val), embedding, now, now)
+            )
+            self._stats["updates"] += 1
+            self._evict(conn, now)
+        if embed_later:
+            threading.Thread(target=self._store_embedding, args=(key, prompt), daemon=True).start()
+
+    def _try_embed(self, prompt: str) -> Optional[np.ndarray]:
+        """ None when the embedding request fails, the entry is then only found by an exact lookup """
+        try:
+            return self._embed(prompt)
+        except Exception as e:
+            print_red(f"LLM cache: embedding failed, entry stored without it: {type(e).__name__}: {e}")
+            return None
+
+    def _store_embedding(self, key: str, prompt: str) -> None:
+        vector = self._try_embed(prompt)
+        if vector is None:
+            return
+        with self._lock, self._connect() as conn:
+            conn.execute("UPDATE llm_cache SET embedding = ? WHERE key = ?", (vector.tobytes(), key))
+
+    def _evict(self, conn: sqlite3.Connection, now: float) -> None:
+        """ Drop expired entries, then the least recently used ones beyond `max_entries` """
+        evicted = 0
+        if self.ttl:
+            evicted += conn.execute("DELETE FROM llm_cache WHERE created < ?", (now - self.ttl,)).rowcount
+        count = conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+        if count > self.max_entries:
+            evicted += conn.execute(
+                "DELETE FROM llm_cache WHERE key IN (SELECT key FROM llm_cache ORDER BY last_access LIMIT ?)",
+                (count - self.max_entries,)
+            ).rowcount
+        self._stats["evictions"] += evicted
+
+    def clear(self, **kwargs: Any) -> None:
+        with self._lock, self._connect() as conn:
+            conn.execute("DELETE FROM llm_cache")
+            self._pending_embeddings.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """ Hit / miss counters of this process and the number of stored entries """
+        with self._lock, self._connect() as conn:
+            entries = conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+            stats = dict(self._stats)
+        lookups = stats["hits"] + stats["similar_hits"] + stats["misses"]
+        hit_rate = (stats["hits"] + stats["similar_hits"]) / lookups if lookups else 0.0
+        return {**stats, "entries": entries, "hit_rate": round(hit_rate, 4)}
@@ -1,32 +1,172 @@
-from typing import Tuple, Union, Sequence, Any, List
+import json
+import time
+from typing import Tuple, Union, Sequence, Any, List, Dict
+from pydantic import Field
 
 from langchain.prompts import PromptTemplate
 from langchain.agents import initialize_agent, AgentType, ZeroShotAgent, AgentExecutor
 from langchain.schema import AgentAction, AgentFinish
 from langchain.tools.base import BaseTool
+from langchain.callbacks import get_openai_callback
 from langchain.callbacks.manager import Callbacks
 
 from trading_system.base import llm_chatgpt
-from trading_system.trading_prompts import EXTRACT_STRATEGY, EXTRACT_AKSHARE
+from trading_system.functions_chain import FunctionsChain, functions_chain_to_functions_call
+from trading_system.trading_prompts import EXTRACT_STRATEGY, EXTRACT_AKSHARE, EXTRACT_PLAN
+
+FINAL_ANSWER = "final_answer"
+
+
+def tools_to_functions(tools: Sequence[BaseTool]) -> List[Dict]:
+    """ One function per tool, its argument carries the input already extracted for that tool """
+    functions = []
+    for tool in tools:
+        if tool.name == "strategy_creation":
+            input_description = "The trading strategy logic extracted from the request, nothing other than the strategy."
+        elif tool.name.startswith("akshare_"):
+            input_description = "The task of obtaining data from AkShare extracted from the request, nothing other than the mission objective."
+        else:
+            input_description = "The input to the tool."
+        functions.append({
+            "name": tool.name,
+            "description": tool.description,
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "thought": {"type": "string", "description": "Why this tool is the next step."},
+                    "action_input": {"type": "string", "description": input_description},
+                },
+                "required": ["thought", "action_input"],
+            },
+        })
+    functions.append({
+        "name": FINAL_ANSWER,
+        "description": "Call when the task is complete or no tool is needed.",
+        "parameters": {
+            "type": "object",
+            "properties": {"answer": {"type": "string", "description": "The final answer to the request."}},
+            "required": ["answer"],
+        },
+    })
+    return functions
 
 
 class ExtractAgent(ZeroShotAgent):
-    """ """
+    """ ZeroShotAgent whose tool inputs are extracted from the request for some tools """
+    # True: choose the tool and extract its input in one function call, see `tools_to_functions`
+    single_call: bool = True
+    functions: List[Dict] = Field(default_factory=list)
+    # latency and token usage of every planning step
+    step_stats: List[Dict] = Field(default_factory=list)
+
     @property
     def input_keys(self):
         return ["input"]
 
+    @property
+    def _mode(self) -> str:
+        return "single_call" if self.single_call and self.functions else "two_calls"
+
     def plan(
         self,
         intermediate_steps: List[Tuple[AgentAction, str]],
         callbacks: Callbacks = None,
         **kwargs: Any,
     ) -> Union[AgentAction, AgentFinish]:
-        """ Make subtle adjustments to the ZeroShotAgent and select different input methods for different tasks. """
-        full_inputs = self.get_full_inputs(intermediate_steps, **kwargs)
-        full_output = self.llm_chain.predict(callbacks=callbacks, **full_inputs)
-        out_put_list = full_output.split("\n")
-        for out in out_put_list:
+        t0 = time.perf_counter()
+        with get_openai_callback() as cb:
+            if self._mode == "single_call":
+                result = self._plan_single_call(intermediate_steps, callbacks, **kwargs)
+            else:
+                result = self._plan_two_calls(intermediate_steps, callbacks, **kwargs)
+        self._record_step(intermediate_steps, t0, cb)
+        return result
+
+    async def aplan(
+        self,
+        intermediate_steps: List[Tuple[AgentAction, str]],
+        callbacks: Callbacks = None,
+        **kwargs: Any,
+    ) -> Union[AgentAction, AgentFinish]:
+        """ Async `plan`, the LLM calls do not block the event loop """
+        t0 = time.perf_counter()
+        with get_openai_callback() as cb:
+            if self._mode == "single_call":
+                result = await self._aplan_single_call(intermediate_steps, callbacks, **kwargs)
+            else:
+                result = await self._aplan_two_calls(intermediate_steps, callbacks, **kwargs)
+        self._record_step(intermediate_steps, t0, cb)
+        return result
+
+    def _record_step(self, intermediate_steps: List[Tuple[AgentAction, str]], t0: float, cb) -> None:
+        stats = {
+            "step": len(intermediate_steps) + 1,
+            "mode": self._mode,
+            "seconds": round(time.perf_counter() - t0, 3),
+            "llm_calls": cb.successful_requests,
+            "prompt_tokens": cb.prompt_tokens,
+            "completion_tokens": cb.completion_tokens,
+        }
+        self.step_stats.append(stats)
+        print(f"Plan step {stats['step']} ({stats['mode']}): {stats['seconds']}s, {stats['llm_calls']} LLM calls, "
+              f"{stats['prompt_tokens']} prompt + {stats['completion_tokens']} completion tokens")
+
+    def _functions_chain(self, intermediate_steps: List[Tuple[AgentAction, str]], **kwargs: Any) -> Tuple[FunctionsChain, str]:
+        """ Chain offering every tool as a function, and its input """
+        plan_prompt = PromptTemplate(template=EXTRACT_PLAN, input_variables=["raw_input", "steps"])
+        functions_chain = FunctionsChain(
+            llm=self.llm_chain.llm,
+            llm_kwargs={"functions": self.functions},
+            verbose=False,
+        )
+        return functions_chain, plan_prompt.format(
+            raw_input=kwargs["input"], steps=self._construct_scratchpad(intermediate_steps))
+
+    @staticmethod
+    def _parse_function_call(functions_chain: FunctionsChain, response: str) -> Union[AgentAction, AgentFinish]:
+        function_call = functions_chain_to_functions_call(functions_chain)
+        if not function_call:
+            return AgentFinish({"output": response}, response)
+
+        name = function_call["name"]
+        try:
+            arguments = json.loads(function_call.get("arguments") or "{}")
+        except ValueError:
+            arguments = {"action_input": function_call.get("arguments", "")}
+
+        if name == FINAL_ANSWER:
+            answer = arguments.get("answer", response)
+            return AgentFinish({"output": answer}, f"Final Answer: {answer}")
+
+        action_input = arguments.get("action_input", "")
+        log = f"{arguments.get('thought', '')}\nAction: {name}\nAction Input: {action_input}"
+        return AgentAction(tool=name, tool_input=action_input, log=log)
+
+    def _plan_single_call(
+        self,
+        intermediate_steps: List[Tuple[AgentAction, str]],
+        callbacks: Callbacks = None,
+        **kwargs: Any,
+    ) -> Union[AgentAction, AgentFinish]:
+        """ Tool choice and extracted input in one function calling round trip """
+        functions_chain, chain_input = self._functions_chain(intermediate_steps, **kwargs)
+        response = functions_chain.predict(callbacks=callbacks, input=chain_input)
+        return self._parse_function_call(functions_chain, response)
+
+    async def _aplan_single_call(
+        self,
+        intermediate_steps: List[Tuple[AgentAction, str]],
+        callbacks: Callbacks = None,
+        **kwargs: Any,
+    ) -> Union[AgentAction, AgentFinish]:
+        functions_chain, chain_input = self._functions_chain(intermediate_steps, **kwargs)
+        response = await functions_chain.apredict(callbacks=callbacks, input=chain_input)
+        return self._parse_function_call(functions_chain, response)
+
+    @staticmethod
+    def _extract_prompt(full_output: str, raw_input: str) -> Union[str, None]:
+        """ Prompt rewriting the Action Input of the chosen tool, None when the tool takes the input as is """
+        for out in full_output.split("\n"):
             if out.startswith("Action:"):
                 tool_name = out.split(":")[-1].strip()
                 if tool_name == "strategy_creation":
@@ -35,32 +175,48 @@ class ExtractAgent(ZeroShotAgent):
                     prompt = PromptTemplate(template=EXTRACT_AKSHARE, input_variables=["raw_input"])
                 else:
                     continue
+                return prompt.format(raw_input=raw_input)
+        return None
 
-                prompt = prompt.format(raw_input=full_inputs["input"])
-                action_input = llm_chatgpt.predict(prompt)
-                out_put = full_output.split("Action Input:")[0]
-                full_output = f"{out_put}Action Input: {action_input}"
+    def _plan_two_calls(
+        self,
+        intermediate_steps: List[Tuple[AgentAction, str]],
+        callbacks: Callbacks = None,
+        **kwargs: Any,
+    ) -> Union[AgentAction, AgentFinish]:
+        """ Make subtle adjustments to the ZeroShotAgent and select different input methods for different tasks. """
+        full_inputs = self.get_full_inputs(intermediate_steps, **kwargs)
+        full_output = self.llm_chain.predict(callbacks=callbacks, **full_inputs)
+        prompt = self._extract_prompt(full_output, full_inputs["input"])
+        if prompt:
+            action_input = llm_chatgpt.predict(prompt)
+            out_put = full_output.split("Action Input:")[0]
+            full_output = f"{out_put}Action Input: {action_input}"
         return self.output_parser.parse(full_output)
 
-    async def aplan(
-            self, intermediate_steps: List[Tuple[AgentAction, str]], **kwargs: Any
+    async def _aplan_two_calls(
+        self,
+        intermediate_steps: List[Tuple[AgentAction, str]],
+        callbacks: Callbacks = None,
+        **kwargs: Any,
     ) -> Union[AgentAction, AgentFinish]:
-        """Given input, decided what to do.
-
-        Args:
-            intermediate_steps: Steps the LLM has taken to date,
-                along with observations
-            **kwargs: User inputs.
-
-        Returns:
-            Action specifying what tool to use.
-        """
-        raise NotImplementedError("TraderAgent does not support async")
+        full_inputs = self.get_full_inputs(intermediate_steps, **kwargs)
+        full_output = await self.llm_chain.apredict(callbacks=callbacks, **full_inputs)
+        prompt = self._extract_prompt(full_output, full_inputs["input"])
+        if prompt:
+            action_input = await llm_chatgpt.apredict(prompt)
+            out_put = full_output.split("Action Input:")[0]
+            full_output = f"{out_put}Action Input: {action_input}"
+        return self.output_parser.parse(full_output)
 
 
-def create_extract_agent(tools: Sequence[BaseTool]):
-    """ Create an Agent by using TraderAgent """
-    agent = ExtractAgent.from_llm_and_tools(llm=llm_chatgpt, tools=tools)
+def create_extract_agent(tools: Sequence[BaseTool], single_call: bool = True):
+    """ Create an Agent by using TraderAgent
+    :param single_call: choose the tool and extract its input with one LLM call instead of two
+    """
+    agent = ExtractAgent.from_llm_and_tools(
+        llm=llm_chatgpt, tools=tools, single_call=single_call, functions=tools_to_functions(tools)
+    )
     return AgentExecutor.from_agent_and_tools(
         agent=agent, tools=tools, verbose=True
     )
@@ -22,3 +22,14 @@ EXTRACT_AKSHARE = """Extract task information related to obtaining data from AkS
 Use the following output format:
 AkShare Description: `content`
 """
+
+
+EXTRACT_PLAN = """Complete the following request step by step with the provided functions, one function per step.
+```
+{raw_input}
+```
+
+Steps taken so far:
+{steps}
+
+Call the function of the next tool to use with the input extracted from the request, or `final_answer` when the request is complete."""
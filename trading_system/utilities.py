@@ -1,4 +1,12 @@
+import os
+import asyncio
 import subprocess
+import contextvars
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor
+
+# Worker threads of the blocking freqtrade / vnpy / akshare calls made from async code
+_executor: ThreadPoolExecutor = None
 
 
 def run_command(command):
@@ -45,6 +53,23 @@ def camel_to_underscore(s):
     return result.lstrip('_')
 
 
+def get_executor() -> ThreadPoolExecutor:
+    """ Shared executor of `run_blocking`, size set by the ASYNCTRADER_WORKERS environment variable """
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=int(os.environ.get("ASYNCTRADER_WORKERS", 8)), thread_name_prefix="asynctrader"
+        )
+    return _executor
+
+
+async def run_blocking(func, *args, **kwargs):
+    """ Await a blocking call in the shared executor, context variables (eg: llm cache switch) are kept """
+    loop = asyncio.get_running_loop()
+    ctx = contextvars.copy_context()
+    return await loop.run_in_executor(get_executor(), partial(ctx.run, func, *args, **kwargs))
+
+
 if __name__ == '__main__':
     result = camel_to_underscore("AutoStrategy")
     print(result)
@@ -0,0 +1,80 @@
+import traceback
+from datetime import datetime
+from typing import Dict, Tuple, Union, Type
+
+import numpy as np
+
+from vnpy.trader.constant import Interval
+from vnpy.trader.database import get_database
+from vnpy.trader.utility import extract_vt_symbol
+from vnpy_ctastrategy.backtesting import BacktestingEngine
+from vnpy_ctastrategy.template import CtaTemplate
+
+from trading_system.vnpy_system.vnpy_registry import StrategyRegistry
+
+
+def load_strategy_class(strategy_name: str, directory: str = "") -> Union[Type[CtaTemplate], None]:
+    """ Import a strategy class, default directory: the vnpy_ctastrategy strategy path """
+    return StrategyRegistry(directory).load(strategy_name)
+
+
+def parse_timerange(timerange: str) -> Tuple[datetime, datetime]:
+    """ "20230101-20230501" -> (start, end), an open end means today """
+    start_time, end_time = timerange.split("-")
+    start = datetime.strptime(start_time, "%Y%m%d")
+    end = datetime.strptime(end_time, "%Y%m%d") if end_time else datetime.today()
+    return start, end
+
+
+def normalize_statistics(result: Dict) -> Dict:
+    """ Convert numpy scalars and dates of `calculate_statistics` into json friendly values """
+    result = dict(result)
+    for key in ("start_date", "end_date"):
+        if hasattr(result.get(key), "strftime"):
+            result[key] = result[key].strftime("%Y-%m-%d")
+    for key in result:
+        if type(result[key]) == np.float64:
+            result[key] = round(float(result[key]), 6)
+        elif type(result[key]) in (np.int32, np.int64):
+            result[key] = int(result[key])
+    return result
+
+
+def run_backtest(job: Dict) -> Dict:
+    """
+    Run one backtest, used as the worker function of the batch runner.
+    The bars are read from the shared database with a single query.
+    @param job: strategy_name, strategy_path, vt_symbol, interval, start, end, rate, slippage, size, pricetick, capital, setting
+    """
+    try:
+        strategy = load_strategy_class(job["strategy_name"], job.get("strategy_path", ""))
+        if strategy is None:
+            raise ValueError(f"Strategy `{job['strategy_name']}` not found")
+
+        engine = BacktestingEngine()
+        engine.output = lambda msg: None
+        engine.set_parameters(
+            vt_symbol=job["vt_symbol"],
+            interval=job["interval"],
+            start=job["start"],
+            end=job["end"],
+            rate=job["rate"],
+            slippage=job["slippage"],
+            size=job["size"],
+            pricetick=job["pricetick"],
+            capital=job["capital"],
+        )
+        engine.add_strategy(strategy, job.get("setting", {}))
+
+        symbol, exchange = extract_vt_symbol(job["vt_symbol"])
+        engine.history_data = get_database().load_bar_data(
+            symbol, exchange, Interval(job["interval"]), job["start"], job["end"]
+        )
+        if not engine.history_data:
+            raise ValueError(f"No bars of {job['vt_symbol']} {job['interval']} in the database")
+
+        engine.run_backtesting()
+        engine.calculate_result()
+        return normalize_statistics(engine.calculate_statistics(output=False))
+    except Exception:
+        return {"error": traceback.format_exc(limit=3).strip()}
@@ -1,41 +1,33 @@
-import re
 import os
 import json
+import time
 import sqlite3
-import numpy as np
 
 from typing import Dict, Union
-import importlib.util
-import importlib.machinery
-import inspect
-
 
 import pandas as pd
 import akshare as ak
 
 from peewee import SqliteDatabase as PeeweeSqliteDatabase
-from datetime import datetime
+from datetime import datetime, date
+from itertools import repeat
+from concurrent.futures import ProcessPoolExecutor
 from typing import List
-from trading_system.utilities import camel_to_underscore
+from trading_system.vnpy_system.vnpy_backtest import load_strategy_class, parse_timerange, normalize_statistics, run_backtest
+from trading_system.vnpy_system.vnpy_optimize import discover_parameters, init_worker, Optimizer, ResultStore
+from trading_system.vnpy_system.vnpy_registry import StrategyRegistry
+from trading_system.vnpy_system.vnpy_reference import FUTURES_EXCHANGE, ReferenceDataCache, ContractIndex
 
 from vnpy.trader.optimize import OptimizationSetting
 from vnpy_ctastrategy.backtesting import BacktestingEngine
 from vnpy.trader.constant import Interval, Exchange
-from vnpy.trader.object import BarData
-from vnpy.trader.utility import ZoneInfo, get_file_path
-from vnpy.trader.database import get_database
+from vnpy.trader.utility import ZoneInfo, get_file_path, extract_vt_symbol
+from vnpy.trader.database import get_database, DB_TZ
 from vnpy_ctastrategy.template import CtaTemplate
 from vnpy_ctastrategy import template
 
 
-FUTURES_EXCHANGE = {
-    "中国金融期货交易所": Exchange.CFFEX,
-    "上海期货交易所": Exchange.SHFE,
-    "上海国际能源交易中心": Exchange.INE,
-    "郑州商品交易所": Exchange.CZCE,
-    "大连商品交易所": Exchange.DCE,
-    "广州期货交易所": Exchange.GFEX,
-}
+EXCHANGE_TZ = ZoneInfo("Asia/Shanghai")
 
 FUTURES_INTERVAL = {
     "m": Interval.MINUTE,
@@ -52,12 +44,14 @@ class VnpyCommands:
             interval: str,
             timerange: str,
             dry_run: bool = True,
+            offline: bool = False,
     ):
         """
         @param vt_symbol: eg: "IF2309.CFFEX, rb2310.SHFE"
         @param interval: eg: "5m"
         @param timerange: eg: "20230101-"
         @param dry_run: eg: True
+        @param offline: serve reference data from the last local snapshot
         """
         self.vt_symbol = vt_symbol
         self.interval = interval
@@ -68,14 +62,36 @@ class VnpyCommands:
         self.sqlite_db = get_database()
         self.backtest_engine = None
 
-        # 从akshare获取期货基础信息
-        self.df_futures_comm_info = ak.futures_comm_info(symbol="所有")
-        today_str = datetime.today().date()
-        df_trade_date = ak.tool_trade_date_hist_sina()
-        last_date = df_trade_date[df_trade_date["trade_date"] < today_str]["trade_date"].tolist()[-1].strftime("%Y%m%d")
-        self.df_futures_rule = ak.futures_rule(date=last_date)
-
-        self.df_futures_comm_info["合约"] = self.df_futures_comm_info["合约代码"].str.replace('[^a-zA-Z]', '', regex=True)
+        # 期货基础信息按需从本地快照加载
+        self.reference = ReferenceDataCache(offline=offline)
+        self._df_futures_comm_info = None
+        self._df_futures_rule = None
+        self._df_trade_date = None
+
+    @property
+    def df_futures_comm_info(self) -> pd.DataFrame:
+        if self._df_futures_comm_info is None:
+            df = self.reference.futures_comm_info()
+            df["合约"] = df["合约代码"].str.replace('[^a-zA-Z]', '', regex=True)
+            self._df_futures_comm_info = df
+        return self._df_futures_comm_info
+
+    @property
+    def df_futures_rule(self) -> pd.DataFrame:
+        if self._df_futures_rule is None:
+            self._df_futures_rule = self.reference.futures_rule()
+        return self._df_futures_rule
+
+    @property
+    def contract_index(self) -> ContractIndex:
+        """ Contract specs shared by every Vnpy tool """
+        return self.reference.contract_index()
+
+    @property
+    def df_trade_date(self) -> pd.DataFrame:
+        if self._df_trade_date is None:
+            self._df_trade_date = self.reference.trade_calendar()
+        return self._df_trade_date
 
     def init_config(self):
         self.start_new_config()
@@ -107,51 +123,125 @@ class VnpyCommands:
         return config.copy()
 
     def import_data_from_csv(self, df_data: pd.DataFrame, symbol: str, exchange: Exchange, interval: Interval, tz_name: str, datetime_head: str, open_head: str, high_head: str, low_head: str, close_head: str, volume_head: str, turnover_head: str, open_interest_head: str, datetime_format: str) -> tuple:
-        """ """
-        bars: List[BarData] = []
-        start: datetime = None
-        count: int = 0
-        tz = ZoneInfo(tz_name)
-
-        for _, item in df_data.iterrows():
-            if datetime_format:
-                dt: datetime = datetime.strptime(item[datetime_head], datetime_format)
-            else:
-                dt: datetime = datetime.fromisoformat(item[datetime_head])
-            dt = dt.replace(tzinfo=tz)
-
-            turnover = item.get(turnover_head, 0)
-            open_interest = item.get(open_interest_head, 0)
-            bar: BarData = BarData(
-                symbol=symbol,
-                exchange=exchange,
-                datetime=dt,
-                interval=interval,
-                volume=float(item[volume_head]),
-                open_price=float(item[open_head]),
-                high_price=float(item[high_head]),
-                low_price=float(item[low_head]),
-                close_price=float(item[close_head]),
-                turnover=float(turnover),
-                open_interest=float(open_interest),
-                gateway_name="DB",
-            )
-            bars.append(bar)
-            # do some statistics
-            count += 1
-            if not start:
-                start = bar.datetime
-
-        end: datetime = bar.datetime
-        # insert into database
-        self.sqlite_db.save_bar_data(bars)
+        """ Vectorized import: parse each column once and bulk write into the `dbbardata` table """
+        if df_data.empty:
+            return None, None, 0
+
+        t0 = time.perf_counter()
+        # 整列解析时间并一次性本地化, 替代逐行 strptime
+        dt = pd.to_datetime(df_data[datetime_head], format=datetime_format if datetime_format else "ISO8601")
+        dt = dt.dt.tz_localize(ZoneInfo(tz_name))
+        db_dt = dt.dt.tz_convert(DB_TZ).dt.strftime("%Y-%m-%d %H:%M:%S")
+
+        def to_array(head: str) -> list:
+            if not head or head not in df_data:
+                return [0.0] * len(df_data)
+            return pd.to_numeric(df_data[head], errors="coerce").fillna(0).astype(float).tolist()
+
+        rows = zip(
+            repeat(symbol),
+            repeat(exchange.value),
+            db_dt.tolist(),
+            repeat(interval.value),
+            to_array(volume_head),
+            to_array(turnover_head),
+            to_array(open_interest_head),
+            to_array(open_head),
+            to_array(high_head),
+            to_array(low_head),
+            to_array(close_head),
+        )
+        count = self.save_bar_rows(list(rows), symbol, exchange, interval)
+
+        start: datetime = dt.iloc[0].to_pydatetime()
+        end: datetime = dt.iloc[-1].to_pydatetime()
+        elapsed = time.perf_counter() - t0
+        print(f"{count} bars imported in {elapsed:.3f}s ({count / max(elapsed, 1e-9):.0f} rows/sec)")
         return start, end, count
 
-    def start_download_data(self) -> None:
-        """ """
+    def save_bar_rows(self, rows: List[tuple], symbol: str, exchange: Exchange, interval: Interval, batch_size: int = 50_000) -> int:
+        """
+        Write bar rows into `dbbardata` with batched executemany and refresh `dbbaroverview`
+        @param rows: (symbol, exchange, datetime, interval, volume, turnover, open_interest, open, high, low, close)
+        """
+        conn = sqlite3.connect(str(get_file_path("database.db")))
+        try:
+            with conn:
+                for i in range(0, len(rows), batch_size):
+                    conn.executemany(
+                        "INSERT OR REPLACE INTO dbbardata (symbol, exchange, datetime, interval, volume, turnover, "
+                        "open_interest, open_price, high_price, low_price, close_price) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                        rows[i:i + batch_size]
+                    )
+
+                # 与 vnpy_sqlite 保持一致: 按数据表重新统计概览
+                key = (symbol, exchange.value, interval.value)
+                start, end, count = conn.execute(
+                    "SELECT MIN(datetime), MAX(datetime), COUNT(*) FROM dbbardata "
+                    "WHERE symbol = ? AND exchange = ? AND interval = ?",
+                    key
+                ).fetchone()
+                conn.execute(
+                    "INSERT INTO dbbaroverview (symbol, exchange, interval, count, start, end) VALUES (?, ?, ?, ?, ?, ?) "
+                    "ON CONFLICT(symbol, exchange, interval) DO UPDATE SET "
+                    "count = excluded.count, start = excluded.start, end = excluded.end",
+                    (*key, count, start, end)
+                )
+        finally:
+            conn.close()
+        return len(rows)
+
+    def get_bar_overview(self, symbol: str, exchange: Exchange, interval: Interval) -> Union[tuple, None]:
+        """ Read (start, end, count) of the stored bars from `dbbaroverview` """
+        conn = sqlite3.connect(str(get_file_path("database.db")))
+        try:
+            row = conn.execute(
+                "SELECT start, end, count FROM dbbaroverview WHERE symbol = ? AND exchange = ? AND interval = ?",
+                (symbol, exchange.value, interval.value)
+            ).fetchone()
+        finally:
+            conn.close()
+
+        if not row:
+            return None
+        start = datetime.strptime(row[0][:19], "%Y-%m-%d %H:%M:%S").replace(tzinfo=DB_TZ)
+        end = datetime.strptime(row[1][:19], "%Y-%m-%d %H:%M:%S").replace(tzinfo=DB_TZ)
+        return start, end, row[2]
+
+    def find_data_holes(self, symbol: str, exchange: Exchange, interval: Interval) -> List[date]:
+        """ Trading days inside the stored range that have no bars at all """
+        overview = self.get_bar_overview(symbol, exchange, interval)
+        if not overview:
+            return []
+
+        conn = sqlite3.connect(str(get_file_path("database.db")))
+        try:
+            # 按小时去重后再换算交易所时区, 避免读取整列分钟数据
+            hours = conn.execute(
+                "SELECT DISTINCT substr(datetime, 1, 13) FROM dbbardata WHERE symbol = ? AND exchange = ? AND interval = ?",
+                (symbol, exchange.value, interval.value)
+            ).fetchall()
+        finally:
+            conn.close()
+
+        stored = pd.to_datetime(pd.Series([h[0] for h in hours]), format="%Y-%m-%d %H")
+        stored_days = set(stored.dt.tz_localize(DB_TZ).dt.tz_convert(EXCHANGE_TZ).dt.date)
+        start = overview[0].astimezone(EXCHANGE_TZ).date()
+        end = overview[1].astimezone(EXCHANGE_TZ).date()
+        return self.trading_days_between(start, end, stored_days)
+
+    def trading_days_between(self, start: date, end: date, exclude: set = None) -> List[date]:
+        """ Trading days in [start, end] according to the exchange calendar """
+        exclude = exclude or set()
+        trade_dates = self.df_trade_date["trade_date"]
+        return [d for d in trade_dates[(trade_dates >= start) & (trade_dates <= end)] if d not in exclude]
+
+    def start_download_data(self, incremental: bool = True) -> None:
+        """
+        @param incremental: only store bars newer than the last bar in `dbbaroverview`
+        """
         config = self.get_config()
-        df_futures_comm = self.df_futures_comm_info
-        df_futures_comm["交易所"] = df_futures_comm["交易所名称"].map(FUTURES_EXCHANGE)
 
         timerange = config["timerange"]
         start_time, end_time = timerange.split("-")
@@ -160,18 +250,40 @@ class VnpyCommands:
         print("AkShare不支持指定时间周期数据下载, 默认下载1024根K线数据...")
 
         symbol = config["vt_symbol"].split(".")[0]
-        contract = re.sub('[^a-zA-Z]', '', symbol)
-        exchange = df_futures_comm[df_futures_comm["合约"] == contract].reset_index().loc[0, "交易所"]
+        exchange = self.contract_index.get(symbol).exchange
 
         period = config["interval"]
         period_suffix = period[-1].lower()
+        interval = FUTURES_INTERVAL[period_suffix]
         print(symbol, ", ", period)
         data = ak.futures_zh_minute_sina(symbol, period)
+
+        overview = self.get_bar_overview(symbol, exchange, interval) if incremental else None
+        if overview and not data.empty:
+            last_end = overview[1]
+            dt = pd.to_datetime(data["datetime"]).dt.tz_localize(EXCHANGE_TZ)
+            new_mask = (dt > last_end).to_numpy()
+
+            holes = self.find_data_holes(symbol, exchange, interval)
+            if new_mask.any():
+                # 新数据窗口与已有数据之间缺失的交易日
+                first_new = dt[new_mask].iloc[0]
+                holes += self.trading_days_between(
+                    last_end.astimezone(EXCHANGE_TZ).date(), first_new.date(), {last_end.astimezone(EXCHANGE_TZ).date(), first_new.date()}
+                )
+            if holes:
+                print(f"Missing trading days in stored data ({len(holes)}): ", [d.strftime("%Y%m%d") for d in holes])
+
+            if not new_mask.any():
+                print(f"No new bars after {last_end}, database write skipped. ")
+                return
+            data = data[new_mask]
+
         info = self.import_data_from_csv(
             df_data=data,
             symbol=symbol,
             exchange=exchange,
-            interval=FUTURES_INTERVAL[period_suffix],
+            interval=interval,
             tz_name="Asia/Shanghai",
             datetime_head="datetime",
             open_head="open",
@@ -211,38 +323,13 @@ class VnpyCommands:
         """  """
         # 动态导入策略
         config = self.get_config()
-        strategy_file = camel_to_underscore(strategy_name)
-
-        # 先检查默认策略路径是否存在策略
-        directory = f"{os.path.dirname(template.__file__)}/strategies"
-        strategy = ""
-        for filename in os.listdir(directory):
-            if filename.endswith(".py"):
-                module_name = filename[:-3]  # 去掉 ".py"
-                if module_name == strategy_file:
-                    # 动态导入模块
-                    full_name = f"vnpy_ctastrategy.strategies.{module_name}"
-                    module = importlib.import_module(full_name)
-                    strategy = getattr(module, strategy_name)
-                    break
-        # 再检查自定义路径策略
-        if strategy == "":
+        strategy = load_strategy_class(strategy_name, config["strategy_path"])
+        if strategy is None:
             print("策略文件不存在...")
             return
 
-        timerange = config["timerange"]
-        start_time, end_time = timerange.split("-")
-        start = datetime.strptime(start_time, "%Y%m%d")
-        end = datetime.strptime(end_time, "%Y%m%d") if end_time else datetime.today()
-
-        symbol = config["vt_symbol"].split(".")[0]
-        contract = re.sub('[^a-zA-Z]', '', symbol)
-        self.df_futures_comm_info["手续费标准-开仓-万分之"].fillna(0.00001, inplace=True)
-
-        ext_fees = self.df_futures_comm_info[self.df_futures_comm_info["合约"] == contract].reset_index().loc[0, "手续费标准-开仓-万分之"]
-        contract_upper = contract.upper()
-        pricetick = self.df_futures_rule[self.df_futures_rule["代码"] == contract_upper].reset_index().loc[0, "最小变动价位"]
-        size = self.df_futures_rule[self.df_futures_rule["代码"] == contract_upper].reset_index().loc[0, "合约乘数"]
+        start, end = parse_timerange(config["timerange"])
+        spec = self.contract_index.get(config["vt_symbol"], require_rule=True)
 
         engine = BacktestingEngine()
         engine.set_parameters(
@@ -250,10 +337,10 @@ class VnpyCommands:
             interval=config["interval"],
             start=start,
             end=end,
-            rate=(fees if fees else ext_fees) * 2,
-            slippage=pricetick,
-            size=size,
-            pricetick=pricetick,
+            rate=(fees if fees else spec.rate) * 2,
+            slippage=spec.pricetick,
+            size=spec.size,
+            pricetick=spec.pricetick,
             capital=1_000_000,
         )
         engine.add_strategy(strategy, {})
@@ -262,16 +349,7 @@ class VnpyCommands:
         engine.calculate_result()
 
         self.backtest_engine = engine
-        result = engine.calculate_statistics()
-        result["start_date"] = result["start_date"].strftime("%Y-%m-%d")
-        result["end_date"] = result["end_date"].strftime("%Y-%m-%d")
-        for key in result:
-            if type(result[key]) == np.float64:
-                result[key] = round(float(result[key]), 6)
-            elif type(result[key]) == np.int32:
-                result[key] = int(result[key])
-            elif type(result[key]) == np.int64:
-                result[key] = int(result[key])
+        result = normalize_statistics(engine.calculate_statistics())
         with open(f'{config["datadir"]}/last_backtest.json', "w") as f:
             json.dump(result, f, indent=4)
         return result
@@ -292,19 +370,176 @@ class VnpyCommands:
             for key in result:
                 print(key, ": ", result[key])
 
-    def start_hyperopt(self) -> None:
-        """ """
+    def start_backtesting_batch(
+            self,
+            strategy_name: str,
+            vt_symbols: List[str],
+            intervals: Union[str, List[str]] = "",
+            fees: float = 0.0,
+            setting: Dict = None,
+            max_workers: int = None,
+    ) -> pd.DataFrame:
+        """
+        Backtest one strategy over many contracts in a process pool
+        @param strategy_name: eg: "AtrRsiStrategy"
+        @param vt_symbols: eg: ["IF2309.CFFEX", "rb2310.SHFE"]
+        @param intervals: one interval for every symbol or one per symbol, default: config["interval"]
+        @param fees: override the commission rate of every contract
+        @param setting: strategy parameters
+        @param max_workers: process count, default: cpu count
+        @return: one row of statistics per (vt_symbol, interval) in input order, a repeated pair is backtested once
+            and its later rows carry a "duplicate" error
+        """
         config = self.get_config()
+        start, end = parse_timerange(config["timerange"])
+        if isinstance(intervals, str):
+            intervals = [intervals or config["interval"]] * len(vt_symbols)
+        if len(intervals) != len(vt_symbols):
+            raise ValueError(f"{len(vt_symbols)} symbols but {len(intervals)} intervals, "
+                             f"give one interval for all symbols or one per symbol. ")
+
+        jobs = []
+        seen = set()
+        for vt_symbol, interval in zip(vt_symbols, intervals):
+            job = {"strategy_name": strategy_name, "strategy_path": config["strategy_path"],
+                   "vt_symbol": vt_symbol, "interval": interval}
+            if (vt_symbol, interval) in seen:
+                print(f"{vt_symbol} {interval} is listed more than once, it is backtested once. ")
+                jobs.append((job, "duplicate"))
+                continue
+            seen.add((vt_symbol, interval))
+            try:
+                spec = self.contract_index.get(vt_symbol, require_rule=True)
+            except ValueError as e:
+                jobs.append((job, str(e)))
+                continue
+            job.update({
+                "start": start,
+                "end": end,
+                "rate": (fees if fees else spec.rate) * 2,
+                "slippage": spec.pricetick,
+                "size": spec.size,
+                "pricetick": spec.pricetick,
+                "capital": 1_000_000,
+                "setting": setting or {},
+            })
+            jobs.append((job, ""))
+
+        t0 = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = [executor.submit(run_backtest, job) if not error else None for job, error in jobs]
+            items = []
+            for (job, error), future in zip(jobs, futures):
+                if future is not None:
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        # worker process crashed
+                        result = {"error": repr(e)}
+                else:
+                    result = {"error": error}
+                items.append({"vt_symbol": job["vt_symbol"], "interval": job["interval"], "error": "", **result})
 
+        df = pd.DataFrame(items)
+        print(f"{len(jobs)} backtests finished in {time.perf_counter() - t0:.1f}s, "
+              f"{(df['error'] != '').sum()} failed")
+        df.to_csv(f'{config["datadir"]}/last_backtest_batch.csv', index=False)
+        return df
+
+    def start_hyperopt(
+            self,
+            strategy_name: str = "AtrRsiStrategy",
+            method: str = "ga",
+            parameters: Dict[str, tuple] = None,
+            target: str = "sharpe_ratio",
+            max_workers: int = None,
+            n_trials: int = 100,
+            population_size: int = 20,
+            generations: int = 10,
+            resume: bool = True,
+            fees: float = 0.0,
+    ) -> Union[pd.DataFrame, None]:
+        """
+        Optimize strategy parameters
+        @param strategy_name: any CtaTemplate subclass in the strategy path
+        @param method: "grid", "random" or "ga"
+        @param parameters: {name: (start, end, step)}, default: discovered from `strategy.parameters`
+        @param target: statistics key to maximize
+        @param max_workers: process count, default: cpu count
+        @param n_trials: number of settings sampled by the random search
+        @param population_size: ga population size
+        @param generations: ga generations
+        @param resume: reuse the settings already evaluated in the results store
+        @param fees: override the commission rate of the contract
+        """
+        config = self.get_config()
+        strategy = load_strategy_class(strategy_name, config["strategy_path"])
+        if strategy is None:
+            print("策略文件不存在...")
+            return
+
+        parameters = parameters or discover_parameters(strategy)
+        if not parameters:
+            print(f"{strategy_name} has no numeric parameters to optimize. ")
+            return pd.DataFrame()
         setting = OptimizationSetting()
-        setting.set_target("sharpe_ratio")
-        setting.add_parameter("atr_length", 25, 27, 1)
-        setting.add_parameter("atr_ma_length", 10, 30, 10)
+        setting.set_target(target)
+        for name, (start, end, step) in parameters.items():
+            setting.add_parameter(name, start, end, step)
+
+        # 数据只加载一次, 通过进程初始化函数分发给各个工作进程
+        start, end = parse_timerange(config["timerange"])
+        spec = self.contract_index.get(config["vt_symbol"], require_rule=True)
+        engine_params = {
+            "vt_symbol": config["vt_symbol"],
+            "interval": config["interval"],
+            "start": start,
+            "end": end,
+            "rate": (fees if fees else spec.rate) * 2,
+            "slippage": spec.pricetick,
+            "size": spec.size,
+            "pricetick": spec.pricetick,
+            "capital": 1_000_000,
+        }
+        symbol, exchange = extract_vt_symbol(config["vt_symbol"])
+        history_data = self.sqlite_db.load_bar_data(symbol, exchange, Interval(config["interval"]), start, end)
+        if not history_data:
+            print(f'No bars of {config["vt_symbol"]} in the database, please download data first. ')
+            return
 
-        self.start_backtesting("AtrRsiStrategy")
-        result = self.backtest_engine.run_ga_optimization(setting)
-        df = pd.DataFrame(result)
+        # the stored rows hold the target of the run that wrote them, and depend on the fees
+        store_file = (f'{config["datadir"]}/hyperopt_{strategy_name}_{symbol}_{config["interval"]}_'
+                      f'{config["timerange"]}_{target}_fees{fees:g}.csv')
+        store = ResultStore(store_file, target, resume=resume)
+        print(f"Optimizing {list(parameters)} of {strategy_name} with {method} search, "
+              f"{len(store.results)} settings already evaluated in {store_file}")
+
+        with ProcessPoolExecutor(
+                max_workers=max_workers,
+                initializer=init_worker,
+                initargs=(strategy_name, config["strategy_path"], engine_params, history_data),
+        ) as executor:
+            optimizer = Optimizer(setting, store, executor)
+            if method == "grid":
+                optimizer.grid()
+            elif method == "random":
+                optimizer.random(n_trials)
+            elif method == "ga":
+                optimizer.ga(population_size, generations)
+            else:
+                raise ValueError(f"Unknown optimization method `{method}`, use grid, random or ga. ")
+
+        rows = []
+        for key, row in store.results.items():
+            rows.append({**json.loads(key), **{k: v for k, v in row.items() if k != "setting"}})
+        if not rows:
+            print("No setting was evaluated. ")
+            return pd.DataFrame()
+        df = pd.DataFrame(rows)
+        df["target"] = pd.to_numeric(df["target"], errors="coerce")
+        df = df.sort_values("target", ascending=False).reset_index(drop=True)
         df.to_csv(f'{config["datadir"]}/last_hyperopt.csv', index=False)
+        return df
 
     def start_hyperopt_show(self, index: int = -1) -> None:
         """ Show details of a hyperopt epoch previously evaluated """
@@ -314,18 +549,8 @@ class VnpyCommands:
         print(df)
 
     def find_classes_in_directory(self, directory, base_class_name) -> Dict:
-        subclasses = {}
-        for filename in os.listdir(directory):
-            if filename.endswith(".py"):
-                module_name = filename[:-3]  # 去掉 ".py"
-                module_path = os.path.join(directory, filename)
-                loader = importlib.machinery.SourceFileLoader(module_name, module_path)
-                module = loader.load_module()
-
-                for name, obj in inspect.getmembers(module):
-                    if inspect.isclass(obj) and issubclass(obj, base_class_name):
-                        subclasses[name] = filename
-        return subclasses
+        """ {class_name: filename} of the `base_class_name` subclasses, found without importing the files """
+        return StrategyRegistry(directory, base_class_name.__name__).refresh()
 
     def start_list_strategies(self) -> pd.DataFrame:
         """
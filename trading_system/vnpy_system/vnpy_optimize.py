@@ -0,0 +1,164 @@
+import os
+import csv
+import json
+import math
+import random
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, List, Tuple, Type
+
+from vnpy.trader.optimize import OptimizationSetting
+from vnpy_ctastrategy.backtesting import BacktestingEngine
+from vnpy_ctastrategy.template import CtaTemplate
+
+from trading_system.vnpy_system.vnpy_backtest import load_strategy_class, normalize_statistics
+
+
+RESULT_FIELDS = ["setting", "target", "total_return", "annual_return", "max_ddpercent",
+                 "sharpe_ratio", "total_trade_count", "error"]
+
+# 子进程内共享的回测数据, 由 init_worker 每个进程加载一次
+_WORKER: Dict = {}
+
+
+def discover_parameters(strategy_class: Type[CtaTemplate]) -> Dict[str, Tuple[float, float, float]]:
+    """
+    Build a search range (start, end, step) around the default value of every
+    numeric name listed in `strategy_class.parameters`.
+    """
+    ranges = {}
+    for name in strategy_class.parameters:
+        default = getattr(strategy_class, name, None)
+        if isinstance(default, bool) or not isinstance(default, (int, float)) or not default:
+            continue
+        if isinstance(default, int):
+            step = max(1, abs(default) // 4)
+            start, end = sorted((default // 2, default * 2))
+            # a positive window / period never goes below 1
+            ranges[name] = (max(1, start) if default > 0 else start, end, step)
+        else:
+            start, end = sorted((default * 0.5, default * 1.5))
+            ranges[name] = (round(start, 6), round(end, 6), round(abs(default) * 0.1, 6))
+    return ranges
+
+
+def init_worker(strategy_name: str, strategy_path: str, engine_params: Dict, history_data: List) -> None:
+    """ Process initializer: receive the bars once per worker instead of once per evaluation """
+    _WORKER["strategy"] = load_strategy_class(strategy_name, strategy_path)
+    _WORKER["engine_params"] = engine_params
+    _WORKER["history_data"] = history_data
+
+
+def evaluate(setting: Dict) -> Tuple[Dict, Dict]:
+    """ Backtest one parameter setting on the shared bars """
+    try:
+        engine = BacktestingEngine()
+        engine.output = lambda msg: None
+        engine.set_parameters(**_WORKER["engine_params"])
+        engine.add_strategy(_WORKER["strategy"], setting)
+        engine.history_data = _WORKER["history_data"]
+        engine.run_backtesting()
+        engine.calculate_result()
+        return setting, normalize_statistics(engine.calculate_statistics(output=False))
+    except Exception:
+        return setting, {"error": traceback.format_exc(limit=3).strip()}
+
+
+def setting_key(setting: Dict) -> str:
+    return json.dumps(setting, sort_keys=True)
+
+
+class ResultStore:
+    """ Append-only csv of evaluated settings, so that an interrupted run can be resumed """
+
+    def __init__(self, path: str, target: str, resume: bool = True):
+        self.path = path
+        self.target = target
+        self.results: Dict[str, Dict] = {}
+        if resume and os.path.exists(path):
+            with open(path, "r", newline="") as f:
+                for row in csv.DictReader(f):
+                    self.results[row["setting"]] = row
+        elif os.path.exists(path):
+            os.remove(path)
+
+    def __contains__(self, setting: Dict) -> bool:
+        return setting_key(setting) in self.results
+
+    def target_value(self, setting: Dict) -> float:
+        value = self.results[setting_key(setting)]["target"]
+        return float(value) if value not in ("", None) else float("-inf")
+
+    def add(self, setting: Dict, statistics: Dict) -> None:
+        row = {field: statistics.get(field, "") for field in RESULT_FIELDS}
+        row["setting"] = setting_key(setting)
+        row["target"] = statistics.get(self.target, "")
+        self.results[row["setting"]] = row
+
+        new_file = not os.path.exists(self.path)
+        with open(self.path, "a", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=RESULT_FIELDS)
+            if new_file:
+                writer.writeheader()
+            writer.writerow(row)
+
+
+class Optimizer:
+    """ Grid, random and genetic search over the parameters of a CtaTemplate subclass """
+
+    def __init__(self, setting: OptimizationSetting, store: ResultStore, executor: ProcessPoolExecutor):
+        self.setting = setting
+        self.store = store
+        self.executor = executor
+        # 每个参数的候选值列表
+        self.values: Dict[str, List] = setting.params
+
+    def evaluate_many(self, settings: List[Dict]) -> None:
+        """ Evaluate the settings not in the store yet and stream every result into it """
+        pending = list({setting_key(s): s for s in settings if s not in self.store}.values())
+        futures = [self.executor.submit(evaluate, s) for s in pending]
+        for i, future in enumerate(as_completed(futures), 1):
+            setting, statistics = future.result()
+            self.store.add(setting, statistics)
+            print(f"[{i}/{len(pending)}] {setting} -> {self.store.target}: {statistics.get(self.store.target, statistics.get('error'))}")
+
+    def space_size(self) -> int:
+        return math.prod(len(values) for values in self.values.values())
+
+    def sample(self, n: int) -> List[Dict]:
+        """ `n` distinct settings drawn parameter by parameter, the full grid is built only when it is not larger """
+        if self.space_size() <= n:
+            return self.setting.generate_settings()
+        settings = {}
+        while len(settings) < n:
+            setting = {name: random.choice(values) for name, values in self.values.items()}
+            settings.setdefault(setting_key(setting), setting)
+        return list(settings.values())
+
+    def grid(self) -> None:
+        self.evaluate_many(self.setting.generate_settings())
+
+    def random(self, n_trials: int) -> None:
+        self.evaluate_many(self.sample(n_trials))
+
+    def ga(self, population_size: int, generations: int, mutation_rate: float = 0.2) -> None:
+        population = self.sample(population_size)
+        for generation in range(generations):
+            self.evaluate_many(population)
+            ranked = sorted(population, key=self.store.target_value, reverse=True)
+            parents = ranked[:max(2, len(ranked) // 2)]
+            print(f"Generation {generation + 1}/{generations}, best: {ranked[0]} "
+                  f"{self.store.target}: {self.store.target_value(ranked[0])}")
+
+            if len(parents) < 2:
+                break
+            children = []
+            while len(parents) + len(children) < population_size:
+                a, b = random.sample(parents, 2)
+                child = {name: random.choice((a[name], b[name])) for name in a}
+                for name in child:
+                    if name in self.values and random.random() < mutation_rate:
+                        child[name] = random.choice(self.values[name])
+                children.append(child)
+            population = parents + children
+        self.evaluate_many(population)
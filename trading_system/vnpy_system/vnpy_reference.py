@@ -0,0 +1,198 @@
+import re
+from pathlib import Path
+from datetime import datetime
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Callable, Optional, Dict, Mapping, Tuple
+
+import pandas as pd
+import akshare as ak
+
+from vnpy.trader.constant import Exchange
+from vnpy.trader.utility import get_file_path
+
+
+FUTURES_EXCHANGE = {
+    "中国金融期货交易所": Exchange.CFFEX,
+    "上海期货交易所": Exchange.SHFE,
+    "上海国际能源交易中心": Exchange.INE,
+    "郑州商品交易所": Exchange.CZCE,
+    "大连商品交易所": Exchange.DCE,
+    "广州期货交易所": Exchange.GFEX,
+}
+
+# 手续费缺失时的默认值(与原回测逻辑一致)
+DEFAULT_RATE = 0.00001
+
+
+def contract_root(symbol: str) -> str:
+    """ "rb2310" -> "RB" """
+    return re.sub('[^a-zA-Z]', '', symbol).upper()
+
+
+@dataclass(frozen=True)
+class ContractSpec:
+    """ Static specification of one futures contract """
+    symbol: str
+    root: str
+    exchange: Exchange
+    rate: float
+    # None when the contract has no futures_rule row
+    pricetick: Optional[float] = None
+    size: Optional[float] = None
+    trading_hours: str = ""
+
+
+class ContractIndex:
+    """ Immutable contract lookup keyed by full symbol and contract root (case-insensitive) """
+
+    def __init__(self, specs: Dict[str, ContractSpec]):
+        self._specs: Mapping[str, ContractSpec] = MappingProxyType(dict(specs))
+
+    @classmethod
+    def from_frames(cls, df_comm_info: pd.DataFrame, df_rule: pd.DataFrame) -> "ContractIndex":
+        rules = {}
+        for rule in df_rule.to_dict("records"):
+            code = str(rule.get("代码", "")).upper()
+            if code and code not in rules:
+                rules[code] = rule
+
+        specs = {}
+        for symbol, exchange_name, rate in zip(
+                df_comm_info["合约代码"], df_comm_info["交易所名称"], df_comm_info["手续费标准-开仓-万分之"]):
+            exchange = FUTURES_EXCHANGE.get(exchange_name)
+            root = contract_root(str(symbol))
+            rule = rules.get(root)
+            if exchange is None:
+                continue
+            spec = ContractSpec(
+                symbol=str(symbol),
+                root=root,
+                exchange=exchange,
+                rate=DEFAULT_RATE if pd.isna(rate) else float(rate),
+                pricetick=float(rule["最小变动价位"]) if rule else None,
+                size=float(rule["合约乘数"]) if rule else None,
+                trading_hours=str(rule.get("交易时间", "")) if rule else "",
+            )
+            specs.setdefault(spec.symbol.upper(), spec)
+            # 品种代码指向该品种的第一个合约
+            specs.setdefault(root, spec)
+        return cls(specs)
+
+    def get(self, symbol: str, require_rule: bool = False) -> ContractSpec:
+        """
+        @param symbol: full symbol, vt_symbol or contract root, eg: "rb2310", "IF2309.CFFEX", "RB"
+        @param require_rule: the caller needs pricetick and size, eg: a backtest
+        """
+        key = symbol.split(".")[0].upper()
+        spec = self._specs.get(key) or self._specs.get(contract_root(key))
+        if spec is None:
+            raise ValueError(f"Unknown futures contract `{symbol}`, it is not listed in futures_comm_info. ")
+        if require_rule and (spec.pricetick is None or spec.size is None):
+            raise ValueError(f"No pricetick / size of `{symbol}`, it is not listed in futures_rule. ")
+        return spec
+
+    def __contains__(self, symbol: str) -> bool:
+        key = symbol.split(".")[0].upper()
+        return key in self._specs or contract_root(key) in self._specs
+
+    def __len__(self) -> int:
+        return len(self._specs)
+
+
+class ReferenceDataCache:
+    """
+    On-disk snapshots of the futures reference data used by VnpyCommands.
+    Commission info and contract rules are keyed on the last completed trading date,
+    the trading calendar is keyed on the current date.
+    """
+    # ContractIndex shared by every VnpyCommands in the process, keyed on trading date
+    _contract_indexes: Dict[str, ContractIndex] = {}
+
+    def __init__(self, cache_dir: str = "", offline: bool = False):
+        """
+        @param cache_dir: snapshot directory, default: `<vntrader>/reference_data`
+        @param offline: never touch the network, serve the last snapshot instead
+        """
+        self.cache_dir = Path(cache_dir) if cache_dir else get_file_path("reference_data")
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.offline = offline
+        # (today, calendar snapshot, its mtime) -> last trade date, see `last_trade_date`
+        self._last_trade_date: Optional[Tuple[Tuple, str]] = None
+
+    def _calendar_signature(self, snapshot: Optional[Path]) -> Tuple:
+        mtime = snapshot.stat().st_mtime_ns if snapshot is not None and snapshot.exists() else None
+        return datetime.today().date(), snapshot, mtime
+
+    def _latest_snapshot(self, name: str) -> Optional[Path]:
+        snapshots = sorted(self.cache_dir.glob(f"{name}_*.feather"))
+        return snapshots[-1] if snapshots else None
+
+    def load(self, name: str, key: str, fetch: Callable[[], pd.DataFrame]) -> pd.DataFrame:
+        """
+        Return the snapshot `name` for `key`, fetching and storing it when missing.
+        Falls back to the last snapshot when offline or when the fetch fails.
+        """
+        path = self.cache_dir / f"{name}_{key}.feather"
+        if path.exists():
+            return pd.read_feather(path)
+
+        latest = self._latest_snapshot(name)
+        if self.offline:
+            if latest is None:
+                raise FileNotFoundError(f"No cached snapshot of {name} in {self.cache_dir}, cannot run offline. ")
+            return pd.read_feather(latest)
+
+        try:
+            df = fetch()
+        except Exception as e:
+            if latest is None:
+                raise
+            print(f"Failed to fetch {name} ({e}), using cached snapshot {latest.name}")
+            return pd.read_feather(latest)
+
+        df = df.reset_index(drop=True)
+        df.to_feather(path)
+        # 只保留最新快照
+        for old in self.cache_dir.glob(f"{name}_*.feather"):
+            if old != path:
+                old.unlink()
+        return df
+
+    def trade_calendar(self) -> pd.DataFrame:
+        """ Trading calendar, refreshed once per day """
+        today = datetime.today().strftime("%Y%m%d")
+        df = self.load("trade_calendar", today, ak.tool_trade_date_hist_sina)
+        df["trade_date"] = pd.to_datetime(df["trade_date"]).dt.date
+        return df
+
+    def last_trade_date(self) -> str:
+        """ Last completed trading date, eg: "20230707", read again only on a new day or a new calendar snapshot """
+        if self._last_trade_date is not None:
+            signature, last_date = self._last_trade_date
+            if signature == self._calendar_signature(signature[1]):
+                return last_date
+
+        df = self.trade_calendar()
+        today = datetime.today().date()
+        last_date = df[df["trade_date"] < today]["trade_date"].tolist()[-1].strftime("%Y%m%d")
+        self._last_trade_date = (self._calendar_signature(self._latest_snapshot("trade_calendar")), last_date)
+        return last_date
+
+    def futures_comm_info(self) -> pd.DataFrame:
+        """ Commission and margin info of all futures contracts """
+        return self.load("futures_comm_info", self.last_trade_date(), lambda: ak.futures_comm_info(symbol="所有"))
+
+    def futures_rule(self) -> pd.DataFrame:
+        """ Exchange trading rules: multiplier, price tick, ... """
+        last_date = self.last_trade_date()
+        return self.load("futures_rule", last_date, lambda: ak.futures_rule(date=last_date))
+
+    def contract_index(self) -> ContractIndex:
+        """ Contract index of the last completed trading date, built once per process, a dict lookup afterwards """
+        key = self.last_trade_date()
+        if key not in ReferenceDataCache._contract_indexes:
+            ReferenceDataCache._contract_indexes[key] = ContractIndex.from_frames(
+                self.futures_comm_info(), self.futures_rule()
+            )
+        return ReferenceDataCache._contract_indexes[key]
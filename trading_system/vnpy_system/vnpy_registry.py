@@ -0,0 +1,134 @@
+import os
+import ast
+import sys
+import json
+import hashlib
+import importlib
+import importlib.util
+from typing import Dict, List, Type, Union
+
+from filelock import FileLock
+from vnpy.trader.utility import get_file_path
+from vnpy_ctastrategy import template
+
+
+DEFAULT_STRATEGY_PATH = os.path.join(os.path.dirname(template.__file__), "strategies")
+# strategy files outside vnpy_ctastrategy are imported under this prefix, a bare file stem could shadow a package
+MODULE_PREFIX = "vnpy_strategies"
+
+# vnpy_ctastrategy 中已知的 CtaTemplate 子类, 策略文件通常直接继承它们
+KNOWN_SUBCLASSES = {
+    "CtaTemplate": {"CtaTemplate", "TargetPosTemplate"},
+}
+
+
+def _base_names(node: ast.ClassDef) -> List[str]:
+    names = []
+    for base in node.bases:
+        if isinstance(base, ast.Name):
+            names.append(base.id)
+        elif isinstance(base, ast.Attribute):
+            names.append(base.attr)
+    return names
+
+
+class StrategyRegistry:
+    """
+    Index of strategy classes in a directory, built by parsing the source with `ast`
+    so that no strategy module is executed while listing.
+    The parsed classes of every file are cached on disk keyed by mtime, size and sha1.
+    """
+
+    def __init__(self, directory: str = "", base_class_name: str = "CtaTemplate", index_file: str = ""):
+        self.directory = os.path.abspath(directory or DEFAULT_STRATEGY_PATH)
+        self.base_class_name = base_class_name
+        self.index_file = index_file or str(get_file_path("strategy_index.json"))
+        self.strategies: Dict[str, str] = {}
+
+    def _read_index(self) -> Dict:
+        if not os.path.exists(self.index_file):
+            return {}
+        try:
+            with open(self.index_file, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except ValueError:
+            return {}
+
+    def _write_entries(self, entries: Dict) -> None:
+        """ Replace the entries of this directory, the index is shared by every process and directory """
+        with FileLock(f"{self.index_file}.lock"):
+            index = self._read_index()
+            index[self.directory] = entries
+            tmp_file = f"{self.index_file}.{os.getpid()}.tmp"
+            with open(tmp_file, "w", encoding="utf-8") as f:
+                json.dump(index, f)
+            os.replace(tmp_file, self.index_file)
+
+    def _parse_file(self, path: str, source: bytes) -> List[list]:
+        try:
+            tree = ast.parse(source, filename=path)
+        except SyntaxError as e:
+            print(f"Skip strategy file with syntax error: {path} ({e})")
+            return []
+        return [[node.name, _base_names(node)] for node in tree.body if isinstance(node, ast.ClassDef)]
+
+    def refresh(self) -> Dict[str, str]:
+        """ Rescan the directory, parsing only changed files. Return {class_name: filename} """
+        cached = self._read_index().get(self.directory, {})
+        entries = {}
+        changed = False
+
+        for filename in sorted(os.listdir(self.directory)):
+            if not filename.endswith(".py"):
+                continue
+            path = os.path.join(self.directory, filename)
+            stat = os.stat(path)
+            entry = cached.get(filename)
+            if entry and entry["mtime"] == stat.st_mtime_ns and entry["size"] == stat.st_size:
+                entries[filename] = entry
+                continue
+
+            with open(path, "rb") as f:
+                source = f.read()
+            sha1 = hashlib.sha1(source).hexdigest()
+            if entry and entry["sha1"] == sha1:
+                classes = entry["classes"]
+            else:
+                classes = self._parse_file(path, source)
+            entries[filename] = {"mtime": stat.st_mtime_ns, "size": stat.st_size, "sha1": sha1, "classes": classes}
+            changed = True
+
+        if changed or set(entries) != set(cached):
+            self._write_entries(entries)
+
+        # 按继承关系逐轮扩展, 支持继承目录内其他策略类
+        known = set(KNOWN_SUBCLASSES.get(self.base_class_name, {self.base_class_name}))
+        classes = [(name, bases, filename) for filename, entry in entries.items() for name, bases in entry["classes"]]
+        self.strategies = {}
+        while True:
+            found = {name: filename for name, bases, filename in classes
+                     if name not in self.strategies and known.intersection(bases)}
+            if not found:
+                break
+            self.strategies.update(found)
+            known.update(found)
+        return dict(self.strategies)
+
+    def load(self, strategy_name: str) -> Union[Type, None]:
+        """ Import only the module that defines `strategy_name` """
+        if strategy_name not in self.strategies:
+            self.refresh()
+        filename = self.strategies.get(strategy_name)
+        if not filename:
+            return None
+
+        module_name = filename[:-3]  # 去掉 ".py"
+        if self.directory == os.path.abspath(DEFAULT_STRATEGY_PATH):
+            module = importlib.import_module(f"vnpy_ctastrategy.strategies.{module_name}")
+        else:
+            module_name = f"{MODULE_PREFIX}.{module_name}"
+            spec = importlib.util.spec_from_file_location(module_name, os.path.join(self.directory, filename))
+            module = importlib.util.module_from_spec(spec)
+            sys.modules[module_name] = module
+            spec.loader.exec_module(module)
+        return getattr(module, strategy_name, None)
@@ -12,7 +12,8 @@ from langchain.prompts import PromptTemplate
 from langchain.tools.base import BaseTool
 
 from trading_system.base import llm_chatgpt
-from trading_system.utilities import print_red
+from trading_system.utilities import print_red, run_blocking
+from trading_system.llm_cache import llm_cache_enabled
 from trading_system.functions_chain import FunctionsChain
 
 from trading_system.vnpy_system.vnpy_functions import VNPY_COMMANDS
@@ -46,6 +47,7 @@ def set_parameters(config_file: str, rebuild_direct: bool = False) -> VnpyComman
                 interval=config["interval"],
                 timerange=config["timerange"],
                 dry_run=config["dry_run"],
+                offline=config.get("offline", False),
             )
             vc.init_config()
             vc.validity_test()
@@ -113,12 +115,23 @@ class VnpyBaseTool(BaseTool):
     name = Field(default="", exclude=True)
     description = Field(default="", exclude=True)
 
+    # False: always query the LLM, eg: to regenerate a strategy for the same description
+    use_llm_cache: bool = Field(default=True)
+
+    def run(self, *args: Any, **kwargs: Any) -> Any:
+        with llm_cache_enabled(self.use_llm_cache):
+            return super().run(*args, **kwargs)
+
+    async def arun(self, *args: Any, **kwargs: Any) -> Any:
+        with llm_cache_enabled(self.use_llm_cache):
+            return await super().arun(*args, **kwargs)
+
     def _run(self, *args: Any, **kwargs: Any,) -> Any:
         return ""
 
-    async def _arun(self, input_str: str, run_manager: Optional[AsyncCallbackManagerForToolRun] = None) -> str:
-        """Use the tool asynchronously."""
-        raise NotImplementedError("custom_search does not support async")
+    async def _arun(self, *args: Any, **kwargs: Any) -> Any:
+        """ Run the blocking vnpy work of `_run` in a worker thread """
+        return await run_blocking(self._run, *args, **kwargs)
 
 
 class VnpyCommandsTool(VnpyBaseTool):
@@ -184,7 +197,6 @@ class StrategyOptimizationTool(VnpyBaseTool):
             print_red("No strategy. You need create a new strategy")
         else:
             input_stname = "AtrRsiStrategy"
-            print_red("暂时只支持: AtrRsiStrategy")
             if not VnpyBaseTool.return_direct:
                 input_stname = VnpyBaseTool.strategy_name
 
@@ -192,7 +204,7 @@ class StrategyOptimizationTool(VnpyBaseTool):
                 input_stname = input("Enter the name of strategy: ").strip()
                 if input_stname not in df_stname["StrategyName"].tolist():
                     input_stname = ""
-            VnpyBaseTool.vc.start_hyperopt()
+            VnpyBaseTool.vc.start_hyperopt(input_stname)
         return "Strategy parameter optimization is complete. "
 
 
@@ -206,10 +218,20 @@ class StrategyCreationTool(VnpyBaseTool):
         print_red(input_str)
 
         print_red("ChatGPT暂无法用vnpy写出完整的交易策略")
-        strategy_prompt = PromptTemplate.from_template(STRATEGY_CREATE)
-        strategy_prompt = strategy_prompt.format(describe=input_str)
+        strategy_prompt = PromptTemplate.from_template(STRATEGY_CREATE).format(describe=input_str)
         strategy_content = llm_chatgpt.predict(strategy_prompt)
+        return self._save_strategy(input_str, strategy_content)
+
+    async def _arun(self, input_str: str, run_manager: Optional[AsyncCallbackManagerForToolRun] = None) -> str:
+        print_red(input_str)
+
+        print_red("ChatGPT暂无法用vnpy写出完整的交易策略")
+        strategy_prompt = PromptTemplate.from_template(STRATEGY_CREATE).format(describe=input_str)
+        strategy_content = await llm_chatgpt.apredict(strategy_prompt)
+        return await run_blocking(self._save_strategy, input_str, strategy_content)
 
+    @staticmethod
+    def _save_strategy(input_str: str, strategy_content: str) -> str:
         pattern = r"```python(.+?)```"
         matches = re.findall(pattern, strategy_content, re.DOTALL)
 